@@ -7,18 +7,36 @@ Features:
 - NewsAPI integration
 - Dual WhatsApp panels
 - Fully compatible with Vercel serverless
+Routing only - providers, caching and live state live in the euro_live package.
 """
 
 import os
 import logging
-import re
-from flask import Flask, jsonify, render_template, request, send_from_directory
-from dotenv import load_dotenv
+import time
+from flask import Flask, Response, g, jsonify, render_template, request, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from datetime import datetime, timedelta
-import requests
 
-# ==================== LOAD ENVIRONMENT VARIABLES ====================
-load_dotenv()
+from euro_live.assets import assets
+from euro_live import batch
+from euro_live.breaker import breaker_stats
+from euro_live.cache import upstream_cache
+from euro_live.competitions import EUROPEAN_COMPETITIONS
+from euro_live.message_templates import engine as templates, medal, state_hash
+from euro_live.metrics import http_latency, http_requests, http_response_size, registry as metrics_registry
+from euro_live.live_snapshot import FINISHED, LIVE, MATCH_FIELDS, Snapshot, SnapshotHolder
+from euro_live.livescore import FIXTURES_REFRESH_SECONDS, LIVE_REFRESH_SECONDS
+from euro_live.news import NEWS_COUNTRIES, NEWS_REFRESH_SECONDS
+from euro_live.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, field_paths, parse_fields
+from euro_live.push import VAPID_PUBLIC_KEY, parse_subscription
+from euro_live.replay import upstream
+from euro_live.response_cache import PreparedResponse, data_age, dumps as fast_dumps, embed_json, responses
+from euro_live.services import (
+    current_live_snapshot, event_pipeline, gemini, history, livescore, newsapi, push, push_subscriptions,
+    team_registry,
+)
+from euro_live.streaming import event_frame
+from euro_live.tracing import tracer
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -31,366 +49,113 @@ app = Flask(__name__,
 )
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', os.urandom(24).hex())
 
-# ==================== LIVESCORE API WRAPPER ====================
-class LiveScoreAPI:
-    """LiveScore API wrapper - FIXED score extraction"""
-    
-    def __init__(self, api_key: str, api_secret: str):
-        self.api_key = api_key
-        self.api_secret = api_secret
-        self.base_url = "https://livescore-api.com/api-client"
-        self.session = requests.Session()
-        
-    def _get(self, endpoint: str, params: dict = None) -> dict:
-        """Base request method"""
-        if params is None:
-            params = {}
-        
-        params.update({
-            "key": self.api_key,
-            "secret": self.api_secret
-        })
-        
-        url = f"{self.base_url}{endpoint}"
-        
-        try:
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            logger.error(f"API Request failed: {e}")
-            return {"success": False, "error": str(e)}
-    
-    def get_live_scores(self, competition_id: int = None) -> list:
-        """Get all live matches - FIXED score extraction"""
-        params = {}
-        if competition_id:
-            params["competition_id"] = competition_id
-        
-        data = self._get("/scores/live.json", params)
-        if data.get("success"):
-            matches = data.get("data", {}).get("match", [])
-            
-            processed_matches = []
-            for match in matches:
-                processed = self._extract_match_data(match)
-                
-                status = processed.get('status', '')
-                minute = processed.get('minute', '0')
-                
-                if status not in ['FINISHED', 'FT', 'FULL_TIME', 'NS', 'Not Started']:
-                    if minute not in ['0', 'NS', ''] or status in ['IN PLAY', 'ADDED TIME']:
-                        processed_matches.append(processed)
-            
-            return processed_matches
-        return []
-    
-    def _extract_match_data(self, match: dict) -> dict:
-        """Extract match data - CRITICAL: scores from 'score' string field"""
-        processed = match.copy() if isinstance(match, dict) else {}
-        
-        if not isinstance(processed, dict):
-            return {}
-        
-        # ===== SCORE EXTRACTION - FIXED =====
-        home_score = 0
-        away_score = 0
-        
-        # Method 1: Parse from 'score' field (THIS IS WHERE THE REAL SCORE IS!)
-        score_str = processed.get('score', '')
-        if score_str and isinstance(score_str, str):
-            parts = re.split(r'\s*-\s*', score_str)
-            if len(parts) == 2:
-                home_score = int(parts[0]) if parts[0].isdigit() else 0
-                away_score = int(parts[1]) if parts[1].isdigit() else 0
-        
-        # Method 2: Parse from 'ft_score' for finished matches
-        if home_score == 0 and away_score == 0:
-            ft_score = processed.get('ft_score', '')
-            if ft_score and isinstance(ft_score, str):
-                parts = re.split(r'\s*-\s*', ft_score)
-                if len(parts) == 2:
-                    home_score = int(parts[0]) if parts[0].isdigit() else 0
-                    away_score = int(parts[1]) if parts[1].isdigit() else 0
-        
-        processed['home_score'] = home_score
-        processed['away_score'] = away_score
-        processed['score_display'] = score_str
-        
-        # ===== Minute formatting =====
-        minute = processed.get('time', processed.get('minute', '0'))
-        if isinstance(minute, str):
-            minute = minute.replace('\u200e', '').strip()
-        else:
-            minute = str(minute)
-        
-        if minute in ['NS', 'Not Started', '']:
-            minute = '0'
-        elif minute == 'HT':
-            minute = '45'
-        elif minute == 'FT':
-            minute = '90'
-        
-        processed['minute'] = minute
-        
-        # ===== Team name normalization =====
-        if 'home_name' not in processed and 'home' in processed:
-            home = processed.get('home', {})
-            if isinstance(home, dict):
-                processed['home_name'] = home.get('name', 'Home')
-                processed['home_id'] = home.get('id')
-        
-        if 'away_name' not in processed and 'away' in processed:
-            away = processed.get('away', {})
-            if isinstance(away, dict):
-                processed['away_name'] = away.get('name', 'Away')
-                processed['away_id'] = away.get('id')
-        
-        return processed
-    
-    def get_today_fixtures(self) -> list:
-        """Get today's fixtures"""
-        data = self._get("/fixtures/list.json")
-        if data.get("success"):
-            fixtures = data.get("data", {}).get("fixtures", [])
-            processed_fixtures = []
-            for fixture in fixtures:
-                processed = self._extract_fixture_data(fixture)
-                processed_fixtures.append(processed)
-            return processed_fixtures
-        return []
-    
-    def _extract_fixture_data(self, fixture: dict) -> dict:
-        """Normalize fixture data"""
-        processed = fixture.copy() if isinstance(fixture, dict) else {}
-        
-        if 'home_name' not in processed and 'home' in processed:
-            home = processed.get('home', {})
-            if isinstance(home, dict):
-                processed['home_name'] = home.get('name', 'Home')
-                processed['home_id'] = home.get('id')
-        
-        if 'away_name' not in processed and 'away' in processed:
-            away = processed.get('away', {})
-            if isinstance(away, dict):
-                processed['away_name'] = away.get('name', 'Away')
-                processed['away_id'] = away.get('id')
-        
-        return processed
-    
-    def get_league_table(self, competition_id: int) -> list:
-        """Get league standings"""
-        data = self._get("/leagues/table.json", {"competition_id": competition_id})
-        if data.get("success"):
-            try:
-                return data.get("data", {}).get("table", [])
-            except:
-                stages = data.get("data", {}).get("stages", [])
-                if stages:
-                    groups = stages[0].get("groups", [])
-                    if groups:
-                        return groups[0].get("standings", [])
-        return []
-    
-    def test_connection(self) -> dict:
-        """Test API connection"""
-        try:
-            data = self._get("/scores/live.json", {"limit": 1})
-            if data.get("success"):
-                matches = data.get("data", {}).get("match", [])
-                return {
-                    "status": "ok",
-                    "key_valid": True,
-                    "message": "API connected",
-                    "live_matches": len(matches)
-                }
-            return {"status": "error", "key_valid": False, "message": "API error"}
-        except Exception as e:
-            return {"status": "error", "key_valid": False, "message": str(e)}
-
-
-# ==================== GEMINI AI SERVICE ====================
-class GeminiService:
-    def __init__(self, api_key: str = None):
-        self.api_key = api_key
-        self.is_available_flag = bool(api_key)
-        if self.is_available_flag:
-            try:
-                import google.generativeai as genai
-                genai.configure(api_key=self.api_key)
-                self.model = genai.GenerativeModel('gemini-pro')
-                logger.info("✅ Gemini AI initialized")
-            except Exception as e:
-                logger.error(f"Gemini init failed: {e}")
-                self.is_available_flag = False
-    
-    def is_available(self) -> bool:
-        return self.is_available_flag
-    
-    def enhance_message(self, message: str) -> str:
-        if not self.is_available():
-            return message
-        try:
-            prompt = f"Enhance this football WhatsApp message with emojis and make it engaging: {message}"
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
-        except:
-            return message
-    
-    def translate_message(self, message: str, language: str) -> str:
-        if not self.is_available():
-            return message
-        try:
-            lang_names = {'es': 'Spanish', 'fr': 'French', 'de': 'German', 'it': 'Italian', 'pt': 'Portuguese'}
-            lang = lang_names.get(language, language)
-            prompt = f"Translate this football message to {lang}, keep emojis: {message}"
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
-        except:
-            return message
-    
-    def summarize_news(self, articles: list) -> str:
-        if not self.is_available() or not articles:
-            return "News summary unavailable"
-        try:
-            news_text = "\n".join([f"• {a.get('title')}" for a in articles[:5]])
-            prompt = f"Create a football news digest from these headlines:\n{news_text}"
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
-        except:
-            return "AI summary unavailable"
-    
-    def test_connection(self) -> dict:
-        if not self.is_available():
-            return {"available": False, "message": "Not configured"}
-        return {"available": True, "message": "Connected"}
-
-
-# ==================== NEWSAPI SERVICE ====================
-class NewsAPIService:
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-        self.base_url = "https://newsapi.org/v2"
-        self.session = requests.Session()
-    
-    def get_sports_headlines(self, country: str = 'us', page_size: int = 20) -> list:
-        try:
-            url = f"{self.base_url}/top-headlines"
-            params = {
-                'apiKey': self.api_key,
-                'country': country,
-                'category': 'sports',
-                'pageSize': min(page_size, 100)
-            }
-            response = self.session.get(url, params=params, timeout=10)
-            data = response.json()
-            
-            if data.get('status') == 'ok':
-                return self._format_articles(data.get('articles', []))
-            return []
-        except Exception as e:
-            logger.error(f"NewsAPI error: {e}")
-            return []
-    
-    def get_league_news(self, league: str, page_size: int = 15) -> list:
-        try:
-            url = f"{self.base_url}/everything"
-            params = {
-                'apiKey': self.api_key,
-                'q': league,
-                'language': 'en',
-                'sortBy': 'publishedAt',
-                'pageSize': min(page_size, 100)
-            }
-            response = self.session.get(url, params=params, timeout=10)
-            data = response.json()
-            
-            if data.get('status') == 'ok':
-                return self._format_articles(data.get('articles', []))
-            return []
-        except:
-            return []
-    
-    def _format_articles(self, articles: list) -> list:
-        formatted = []
-        for article in articles:
-            if not article.get('title') or article.get('title') == '[Removed]':
-                continue
-            formatted.append({
-                'id': hash(article.get('url', '')),
-                'title': article.get('title', 'No title'),
-                'description': (article.get('description') or '')[:200] + '...',
-                'url': article.get('url', '#'),
-                'image': article.get('urlToImage', 'https://images.unsplash.com/photo-1574629810360-7efbbe195018?w=600'),
-                'source': article.get('source', {}).get('name', 'News'),
-                'published_at': self._format_date(article.get('publishedAt'))
-            })
-        return formatted
-    
-    def _format_date(self, date_str: str) -> str:
-        if not date_str:
-            return 'Recent'
-        try:
-            date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-            now = datetime.now()
-            diff = now - date
-            if diff.days == 0:
-                if diff.seconds < 3600:
-                    return f"{diff.seconds // 60} min ago"
-                return f"{diff.seconds // 3600} hours ago"
-            elif diff.days == 1:
-                return "Yesterday"
-            return f"{diff.days} days ago"
-        except:
-            return "Recent"
-    
-    def test_connection(self) -> dict:
-        try:
-            news = self.get_sports_headlines(page_size=1)
-            return {"available": True, "message": f"Connected, found news"}
-        except:
-            return {"available": False, "message": "Connection failed"}
-
-
-# ==================== INITIALIZE ALL SERVICES ====================
-LIVESCORE_API_KEY = os.getenv("LIVESCORE_API_KEY")
-LIVESCORE_API_SECRET = os.getenv("LIVESCORE_API_SECRET")
-livescore = LiveScoreAPI(LIVESCORE_API_KEY, LIVESCORE_API_SECRET) if LIVESCORE_API_KEY and LIVESCORE_API_SECRET else None
-
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-gemini = GeminiService(GEMINI_API_KEY)
-
-NEWS_API_KEY = os.getenv("NEWS_API_KEY")
-newsapi = NewsAPIService(NEWS_API_KEY) if NEWS_API_KEY else None
-
-
-# ==================== EUROPEAN COMPETITIONS ====================
-EUROPEAN_COMPETITIONS = {
-    2: {"name": "Premier League", "country": "England", "flag": "🏴󠁧󠁢󠁥󠁮󠁧󠁿"},
-    3: {"name": "LaLiga", "country": "Spain", "flag": "🇪🇸"},
-    1: {"name": "Bundesliga", "country": "Germany", "flag": "🇩🇪"},
-    4: {"name": "Serie A", "country": "Italy", "flag": "🇮🇹"},
-    5: {"name": "Ligue 1", "country": "France", "flag": "🇫🇷"},
-    75: {"name": "Scottish Premiership", "country": "Scotland", "flag": "🏴󠁧󠁢󠁳󠁣󠁴󠁿"},
-    40: {"name": "Danish Superliga", "country": "Denmark", "flag": "🇩🇰"},
-    244: {"name": "UEFA Champions League", "country": "Europe", "flag": "🇪🇺"},
-    245: {"name": "UEFA Europa League", "country": "Europe", "flag": "🇪🇺"},
-    446: {"name": "UEFA Conference League", "country": "Europe", "flag": "🇪🇺"},
-}
+
+class TracedJSONProvider(DefaultJSONProvider):
+    """jsonify() through the fast encoder, with a serialize span on traced requests"""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.get('indent'):  # pretty-printed debug output
+            return super().dumps(obj, **kwargs)
+        return fast_dumps(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        with tracer.span("serialize") as span:
+            response = super().response(*args, **kwargs)
+            span.set("bytes", response.calculate_content_length())
+        return response
+
+
+app.json = TracedJSONProvider(app)
+
+# Headlines rendered into the dashboard page
+DASHBOARD_HEADLINES = 12
+
+# Days ahead /api/fixtures/upcoming covers at most
+MAX_UPCOMING_DAYS = 14
+
+
+# ==================== REQUEST METRICS ====================
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    data_age.reset()
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    # X-Trace: 1 forces a trace regardless of TRACE_SAMPLE_RATE
+    tracer.start(f"{request.method} {route}", force=request.headers.get('X-Trace') == '1',
+                 **{"http.route": route, "http.method": request.method})
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Route template, not the raw path, keeps label cardinality bounded
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        http_latency.observe(time.perf_counter() - started, route, request.method)
+        http_requests.inc(route, request.method, response.status_code)
+        if not response.is_streamed:
+            http_response_size.observe(response.calculate_content_length() or 0, route)
+    # Age of the upstream data behind this response, and whether it is a stale fallback
+    for header, value in data_age.headers().items():
+        response.headers.setdefault(header, value)
+    trace = tracer.finish(**{"http.status_code": response.status_code})
+    if trace is not None:
+        response.headers['X-Trace-Id'] = trace.trace_id
+    return response
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus text exposition"""
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
 
 
 # ==================== ROUTES ====================
 
 @app.route('/')
 def index():
-    """Serve the main dashboard"""
+    """Serve the main dashboard, rendered with the current data once per refresh window"""
     try:
-        return render_template('index.html')
+        prepared = responses.get(("dashboard",), LIVE_REFRESH_SECONDS, build_dashboard, mimetype='text/html')
+        return prepared.to_response(request)
     except Exception as e:
         logger.error(f"Template error: {e}")
         return f"Error loading template: {e}", 500
 
 
+def build_dashboard() -> str:
+    """
+    The page with live scores, today's fixtures and top headlines already in
+    it, so first paint needs no API round trips. The same prepared JSON the
+    API routes serve is embedded for the scripts to start from.
+    """
+    live = fixtures = news = None
+    try:
+        if livescore:
+            live = cached_live_scores()
+            fixtures = cached_today_fixtures()
+        if newsapi:
+            news = cached_sports_news('us', DASHBOARD_HEADLINES)
+    except Exception as e:
+        # A partial page still beats an error page, the scripts fill the gaps
+        logger.error(f"Dashboard data unavailable: {e}")
+
+    state = {
+        "live": live.body if live else b"null",
+        "fixtures": fixtures.body if fixtures else b"null",
+        "news": news.body if news else b"null",
+    }
+    return render_template(
+        'index.html',
+        assets=assets.bundle(reload=app.debug),
+        live=live.payload if live else None,
+        fixtures=fixtures.payload if fixtures else None,
+        news=news.payload["news"] if news else None,
+        state=embed_json(state),
+    )
+
+
 @app.route('/api/status')
 def api_status():
     """Check all API connections"""
@@ -398,11 +163,35 @@ def api_status():
         "livescore": livescore.test_connection() if livescore else {"available": False, "message": "Not configured"},
         "gemini": gemini.test_connection(),
         "newsapi": newsapi.test_connection() if newsapi else {"available": False, "message": "Not configured"},
+        "circuits": breaker_stats(),
+        "cache": upstream_cache.stats(),
+        "push": push.stats() if push else {"available": False, "message": "Not configured"},
         "timestamp": datetime.now().isoformat()
     }
     return jsonify(status)
 
 
+# ==================== BATCH ====================
+
+@app.route('/api/batch', methods=['GET', 'POST'])
+def get_batch():
+    """
+    Several GET /api/ resources in one round trip, resolved concurrently:
+    POST {"parts": [...]} or GET ?part=/api/livescores&part=/api/standings/2
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        parts = data.get('parts') if isinstance(data, dict) else data
+    else:
+        parts = request.args.getlist('part')
+    
+    try:
+        combined = batch.resolve(app, parts, dict(request.headers), cacheable=request.method == 'GET')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return combined.to_response(request)
+
+
 # ==================== LIVE SCORES ====================
 
 @app.route('/api/live')
@@ -410,66 +199,273 @@ def api_status():
 @app.route('/api/fixtures/live')
 @app.route('/api/fixtures/live/details')
 def get_live_scores():
-    """Get all live matches - FIXED score mapping"""
+    """
+    Live matches from the indexed snapshot, optionally filtered:
+    ?competitions=2,3&teams=19&state=live (competition_id= still works).
+    Paged with ?limit=&cursor= (next page in the Link header), trimmed
+    with ?fields=id,minute,home_team.score,away_team.score
+    """
     if not livescore:
         return jsonify({"error": "LiveScore API not configured"}), 503
     
-    competition_id = request.args.get('competition_id', type=int)
-    matches = livescore.get_live_scores(competition_id)
-    
-    formatted_matches = []
-    for match in matches[:30]:
-        comp_id = match.get('competition_id')
-        comp_info = EUROPEAN_COMPETITIONS.get(comp_id, {})
-        
-        home_score = match.get('home_score', 0)
-        away_score = match.get('away_score', 0)
-        home_name = match.get('home_name', 'Home')
-        away_name = match.get('away_name', 'Away')
-        minute = match.get('minute', '0')
-        
-        is_live = minute not in ['0', 'NS', 'FT'] and minute != '90'
-        
-        formatted_matches.append({
-            "id": match.get('id', match.get('fixture_id')),
-            "competition_id": comp_id,
-            "competition_name": comp_info.get("name", match.get('competition_name', 'Live Match')),
-            "competition_flag": comp_info.get("flag", "⚽"),
-            "home_team": {"name": home_name, "score": home_score},
-            "away_team": {"name": away_name, "score": away_score},
-            "minute": minute,
-            "is_live": is_live,
-            "score_display": f"{home_score} - {away_score}"
-        })
+    try:
+        competitions = _int_list_arg('competitions') or _int_list_arg('competition_id')
+        teams = _int_list_arg('teams')
+    except ValueError:
+        return jsonify({"error": "competitions and teams take comma-separated ids"}), 400
+    state = request.args.get('state')
+    if state not in (None, LIVE, FINISHED):
+        return jsonify({"error": f"state must be {LIVE} or {FINISHED}"}), 400
+    try:
+        cursor, limit, fields = _page_args(MATCH_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # One cache entry per known competition at most, other ids are answered from the index
+    if (not teams and not state and len(competitions) <= 1 and _first_page(cursor, limit, fields)
+            and all(competition in EUROPEAN_COMPETITIONS for competition in competitions)):
+        return cached_live_scores(competitions[0] if competitions else None).to_response(request)
+
+    # Ad-hoc combinations and later pages are cheap to answer from the index, but not worth a cache entry each
+    snapshot = current_live_snapshot()
+    return _page_response(snapshot, LIVE_REFRESH_SECONDS, cursor, limit, fields,
+                          snapshot.select(competitions, teams, state))
+
+
+def cached_live_scores(competition_id: int = None):
+    """Same bytes for every viewer until the next refresh"""
+    return responses.get(("livescores", competition_id), LIVE_REFRESH_SECONDS,
+                         lambda: build_live_scores(competition_id))
+
+
+def build_live_scores(competition_id: int = None):
+    """First page of formatted live matches from the snapshot, no upstream call of its own"""
+    snapshot = current_live_snapshot()
+    positions = snapshot.select(competitions=(competition_id,) if competition_id else None)
+    return snapshot.page(positions=positions, query={"competition_id": competition_id})
+
+
+# ==================== LIVE EVENTS ====================
+
+def refresh_live_events():
+    """Make sure the event pipeline has seen this refresh window's snapshot"""
+    if livescore:
+        current_live_snapshot()
+
+
+@app.route('/api/events')
+def get_live_events():
+    """Formatted WhatsApp event messages newer than ?since="""
+    since = request.args.get('since', 0, type=int)
+    refresh_live_events()
+    messages = event_pipeline.broker.since(since)
+    return jsonify({
+        "success": True,
+        "cursor": event_pipeline.broker.last_id,
+        "count": len(messages),
+        "messages": messages
+    })
+
+
+@app.route('/api/events/stream')
+def stream_live_events():
+    """Server-Sent Events stream of event messages"""
+    cursor = request.headers.get('Last-Event-ID', request.args.get('since', 0), type=int) or 0
+    max_duration = request.args.get('max_duration', 300, type=int)
+
+    def generate():
+        started = time.time()
+        last = cursor
+        yield "retry: 5000\n\n"
+        while time.time() - started < max_duration:
+            refresh_live_events()
+            messages = event_pipeline.broker.wait(last, timeout=LIVE_REFRESH_SECONDS)
+            if not messages:
+                yield ": keepalive\n\n"
+                continue
+            for message in messages:
+                last = message["id"]
+                yield event_frame(message)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+# ==================== PAGING ====================
+
+def _page_args(allowed_fields) -> tuple:
+    """(cursor, limit, fields) from the query string, ValueError on unknown fields"""
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    fields = parse_fields(request.args.get('fields'), allowed_fields)
+    return request.args.get('cursor'), max(1, min(limit, MAX_PAGE_SIZE)), fields
+
+
+def _first_page(cursor, limit: int, fields) -> bool:
+    """The default page - the one worth serving from the response cache"""
+    return not cursor and limit == DEFAULT_PAGE_SIZE and not fields
+
+
+def _page_response(snapshot: Snapshot, ttl: float, cursor, limit: int, fields, positions=None):
+    """One page of a snapshot, fresh for what is left of its window"""
+    try:
+        page = snapshot.page(cursor, limit, positions, fields, query=request.args.to_dict())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    remaining = max(0, upstream.scale(ttl) - snapshot.age())
+    return PreparedResponse(page.items, max_age=remaining, stale=snapshot.stale,
+                            headers=page.headers()).to_response(request)
+
+
+# ==================== MATCH HISTORY ====================
+
+def _int_list_arg(name: str) -> list:
+    """Comma-separated ids in a query argument, ValueError on anything else"""
+    value = request.args.get(name)
+    if not value:
+        return []
+    return [int(part) for part in value.split(',') if part.strip()]
+
+
+def _parse_time_arg(name: str):
+    """Accept unix seconds or ISO 8601 in a query argument"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+@app.route('/api/history/<int:match_id>/timeline')
+def get_match_timeline(match_id):
+    """Recorded minute/score/status changes of a match"""
+    if not history:
+        return jsonify({"error": "Snapshot history disabled"}), 503
     
-    return jsonify(formatted_matches)
+    timeline = history.timeline(match_id, since=_parse_time_arg('since'), until=_parse_time_arg('until'))
+    if not timeline:
+        return jsonify({"error": "No history for this match"}), 404
+    
+    return jsonify({
+        "success": True,
+        "match": history.match_info(match_id),
+        "count": len(timeline),
+        "timeline": timeline
+    })
+
+
+@app.route('/api/history/<int:match_id>/state')
+def get_match_state_at(match_id):
+    """State of a match at ?at= (unix seconds or ISO 8601)"""
+    if not history:
+        return jsonify({"error": "Snapshot history disabled"}), 503
+    
+    at = _parse_time_arg('at')
+    if at is None:
+        return jsonify({"error": "Missing or invalid 'at'"}), 400
+    
+    state = history.state_at(match_id, at)
+    if not state:
+        return jsonify({"error": "No state recorded before that time"}), 404
+    
+    return jsonify({"success": True, "match": history.match_info(match_id), "at": at, "state": state})
+
+
+@app.route('/api/history/stats')
+def get_history_stats():
+    """Size of the snapshot history store"""
+    if not history:
+        return jsonify({"error": "Snapshot history disabled"}), 503
+    return jsonify(history.stats())
 
 
 # ==================== FIXTURES ====================
 
+def format_fixture(fixture: dict) -> dict:
+    """API shape of one fixture"""
+    comp_id = fixture.get('competition_id')
+    comp_info = EUROPEAN_COMPETITIONS.get(comp_id, {})
+    
+    return {
+        "id": fixture.get('id', fixture.get('fixture_id')),
+        "competition_name": comp_info.get("name", fixture.get('competition_name', 'Fixture')),
+        "competition_flag": comp_info.get("flag", "⚽"),
+        "home_team": {"name": fixture.get('home_name', 'Home')},
+        "away_team": {"name": fixture.get('away_name', 'Away')},
+        "date": fixture.get('date'),
+        "time": fixture.get('time', 'TBD')[:5] if fixture.get('time') else 'TBD'
+    }
+
+
+FIXTURE_FIELDS = field_paths(format_fixture({}))
+
+
+def fixture_order(view: dict) -> tuple:
+    """Kick-off order (TBD last within a day), then fixture id"""
+    return (view["date"] or "", view["time"], view["id"] or 0)
+
+
+def build_fixture_snapshot(fetch) -> Snapshot:
+    with data_age.capture() as used:
+        fixtures = fetch()
+    return Snapshot([format_fixture(fixture) for fixture in fixtures], fixture_order, FIXTURE_FIELDS,
+                    data_age=used["age"], stale=used["stale"])
+
+
+today_fixtures = SnapshotHolder()
+# One holder per ?days= value, at most MAX_UPCOMING_DAYS of them
+upcoming_fixtures = {}
+
+
 @app.route('/api/fixtures/today')
 def get_today_fixtures():
-    """Get today's fixtures"""
+    """Today's fixtures in kick-off order, paged and trimmed like /api/livescores"""
     if not livescore:
         return jsonify({"error": "LiveScore API not configured"}), 503
+    try:
+        cursor, limit, fields = _page_args(FIXTURE_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    fixtures = livescore.get_today_fixtures()
-    
-    formatted_fixtures = []
-    for fixture in fixtures[:30]:
-        comp_id = fixture.get('competition_id')
-        comp_info = EUROPEAN_COMPETITIONS.get(comp_id, {})
-        
-        formatted_fixtures.append({
-            "id": fixture.get('id', fixture.get('fixture_id')),
-            "competition_name": comp_info.get("name", fixture.get('competition_name', 'Fixture')),
-            "competition_flag": comp_info.get("flag", "⚽"),
-            "home_team": {"name": fixture.get('home_name', 'Home')},
-            "away_team": {"name": fixture.get('away_name', 'Away')},
-            "time": fixture.get('time', 'TBD')[:5] if fixture.get('time') else 'TBD'
-        })
+    if _first_page(cursor, limit, fields):
+        return cached_today_fixtures().to_response(request)
+    return _page_response(current_today_fixtures(), FIXTURES_REFRESH_SECONDS, cursor, limit, fields)
+
+
+def current_today_fixtures() -> Snapshot:
+    return today_fixtures.get(FIXTURES_REFRESH_SECONDS,
+                              lambda: build_fixture_snapshot(livescore.get_today_fixtures))
+
+
+def cached_today_fixtures():
+    return responses.get(("fixtures_today",), FIXTURES_REFRESH_SECONDS, build_today_fixtures)
+
+
+def build_today_fixtures():
+    """First page of formatted fixtures, built once per refresh window"""
+    return current_today_fixtures().page()
+
+
+@app.route('/api/fixtures/upcoming')
+def get_upcoming_fixtures():
+    """Every fixture of the next ?days= days (default 7), paged like today's"""
+    if not livescore:
+        return jsonify({"error": "LiveScore API not configured"}), 503
+    try:
+        cursor, limit, fields = _page_args(FIXTURE_FIELDS)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    return jsonify(formatted_fixtures)
+    days = max(1, min(request.args.get('days', 7, type=int), MAX_UPCOMING_DAYS))
+    holder = upcoming_fixtures.setdefault(days, SnapshotHolder())
+    snapshot = holder.get(FIXTURES_REFRESH_SECONDS,
+                          lambda: build_fixture_snapshot(lambda: livescore.get_upcoming_fixtures(days)))
+    return _page_response(snapshot, FIXTURES_REFRESH_SECONDS, cursor, limit, fields)
 
 
 # ==================== STANDINGS ====================
@@ -509,6 +505,25 @@ def get_standings(competition_id):
     })
 
 
+# ==================== TEAM SEARCH ====================
+
+@app.route('/api/teams/search')
+def search_teams():
+    """Search the local team registry - no upstream calls"""
+    query = request.args.get('q', '').strip()
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    if not query:
+        return jsonify({"error": "No query"}), 400
+    
+    teams = team_registry.search(query, limit=limit)
+    return jsonify({
+        "success": True,
+        "count": len(teams),
+        "known_teams": len(team_registry),
+        "teams": teams
+    })
+
+
 # ==================== GEMINI AI ENDPOINTS ====================
 
 @app.route('/api/gemini/status', methods=['GET'])
@@ -525,7 +540,7 @@ def gemini_enhance():
     if not message:
         return jsonify({"error": "No message"}), 400
     
-    enhanced = gemini.enhance_message(message)
+    enhanced = gemini.enhance_whatsapp_message(message)
     return jsonify({"success": True, "enhanced": enhanced})
 
 
@@ -558,15 +573,22 @@ def get_sports_news():
     if not newsapi:
         return jsonify({"error": "NewsAPI not configured"}), 503
     
-    country = request.args.get('country', 'us')
-    limit = request.args.get('limit', 15, type=int)
-    news = newsapi.get_sports_headlines(country=country, page_size=limit)
-    
-    return jsonify({
-        "success": True,
-        "count": len(news),
-        "news": news
-    })
+    country = request.args.get('country', 'us').lower()
+    if country not in NEWS_COUNTRIES:
+        return jsonify({"error": "Unknown country"}), 400
+    limit = max(1, min(request.args.get('limit', 15, type=int), 50))
+    return cached_sports_news(country, limit).to_response(request)
+
+
+def cached_sports_news(country: str, limit: int):
+    def build():
+        news = newsapi.get_sports_headlines(country=country, page_size=limit)
+        return {
+            "success": True,
+            "count": len(news),
+            "news": news
+        }
+    return responses.get(("sports_news", country, limit), NEWS_REFRESH_SECONDS, build)
 
 
 @app.route('/api/news/league/<league>')
@@ -608,17 +630,134 @@ def format_standings_whatsapp(competition_id):
     if not table:
         return jsonify({"error": "Standings not available"}), 404
     
-    message = f"🏆 *{comp_info['name']} TABLE* 🏆\n"
-    message += f"📅 {datetime.now().strftime('%d %b %Y')}\n\n"
-    message += "*TOP 5*\n"
+    language = request.args.get('lang', 'en')
+    rows = [
+        {"medal": medal(i), "name": team.get('name'), "points": team.get('points', 0)}
+        for i, team in enumerate(table[:5], 1)
+    ]
+    context = {
+        "competition": comp_info['name'],
+        "date": datetime.now().strftime('%d %b %Y'),
+        "count": len(rows)
+    }
+    message = templates.render("standings", context, rows, language=language,
+                               state=state_hash(competition_id, context, rows))
+    
+    return jsonify({"success": True, "message": message})
+
+
+@app.route('/api/whatsapp/live')
+def format_live_whatsapp():
+    """One WhatsApp line per live match, rendered in a single pass"""
+    if not livescore:
+        return jsonify({"error": "LiveScore API not configured"}), 503
+    
+    template = request.args.get('template', 'live_score')
+    if template not in ('live_score', 'goal_alert', 'half_time', 'full_time', 'match_summary'):
+        return jsonify({"error": "Unknown template"}), 400
+    
+    language = request.args.get('lang', 'en')
+    matches = current_live_snapshot().matches
+    with tracer.span("render_templates", template=template, matches=len(matches)):
+        messages = templates.render_matches(template, matches, language)
+    return jsonify({"success": True, "count": len(messages), "messages": messages})
+
+
+@app.route('/api/whatsapp/fixtures/today')
+def format_fixtures_whatsapp():
+    """Format today's fixtures for WhatsApp"""
+    if not livescore:
+        return jsonify({"error": "LiveScore API not configured"}), 503
+    
+    fixtures = livescore.get_today_fixtures()
+    if not fixtures:
+        return jsonify({"error": "No fixtures today"}), 404
+    
+    language = request.args.get('lang', 'en')
+    rows = []
+    for fixture in fixtures[:30]:
+        comp_info = EUROPEAN_COMPETITIONS.get(fixture.get('competition_id'), {})
+        rows.append({
+            "flag": comp_info.get("flag", "⚽"),
+            "time": fixture.get('time', 'TBD')[:5] if fixture.get('time') else 'TBD',
+            "home_name": fixture.get('home_name', 'Home'),
+            "away_name": fixture.get('away_name', 'Away')
+        })
+    context = {"date": datetime.now().strftime('%d %b %Y')}
+    message = templates.render("fixtures", context, rows, language=language,
+                               state=state_hash(context, rows))
+    
+    return jsonify({"success": True, "message": message})
+
+
+@app.route('/api/whatsapp/news')
+def format_news_whatsapp():
+    """Format the top sports headlines as a WhatsApp digest"""
+    if not newsapi:
+        return jsonify({"error": "NewsAPI not configured"}), 503
+    
+    news = newsapi.get_sports_headlines(country=request.args.get('country', 'us'), page_size=5)
+    if not news:
+        return jsonify({"error": "No news available"}), 404
     
-    for i, team in enumerate(table[:5], 1):
-        medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-        message += f"{medal} {team.get('name')} - *{team.get('points', 0)} pts*\n"
+    language = request.args.get('lang', 'en')
+    rows = [
+        {"index": i, "title": article['title'], "source": article['source']}
+        for i, article in enumerate(news[:5], 1)
+    ]
+    message = templates.render("news_digest", {}, rows, language=language,
+                               state=state_hash(rows))
     
     return jsonify({"success": True, "message": message})
 
 
+# ==================== WEB PUSH ====================
+
+@app.route('/api/push/key')
+def get_push_key():
+    """VAPID public key the browser subscribes with"""
+    if not push:
+        return jsonify({"error": "Web Push not configured"}), 503
+    return jsonify({"publicKey": VAPID_PUBLIC_KEY})
+
+
+@app.route('/api/push/subscribe', methods=['POST'])
+def push_subscribe():
+    """
+    Follow teams/competitions with a browser push subscription:
+    {"subscription": {endpoint, keys}, "teams": [19], "competitions": [2]}
+    Subscribing again with the same endpoint replaces the follow list.
+    """
+    if not push:
+        return jsonify({"error": "Web Push not configured"}), 503
+    try:
+        subscription = parse_subscription(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    push_subscriptions.subscribe(subscription)
+    return jsonify({"success": True, "teams": sorted(subscription.teams),
+                    "competitions": sorted(subscription.competitions)}), 201
+
+
+@app.route('/api/push/unsubscribe', methods=['POST'])
+def push_unsubscribe():
+    """
+    Stop pushes to a browser: {"subscription": {endpoint, keys}}. The auth
+    key proves the caller holds the subscription, not just its endpoint.
+    """
+    if not push:
+        return jsonify({"error": "Web Push not configured"}), 503
+    data = request.get_json(silent=True)
+    subscription = data.get('subscription') if isinstance(data, dict) else None
+    endpoint = subscription.get('endpoint') if isinstance(subscription, dict) else None
+    auth = (subscription.get('keys') or {}).get('auth') if isinstance(subscription, dict) else None
+    if not isinstance(endpoint, str) or not isinstance(auth, str):
+        return jsonify({"error": "subscription with endpoint and keys.auth required"}), 400
+    if not push_subscriptions.remove(endpoint, auth):
+        return jsonify({"error": "Unknown subscription"}), 404
+    return jsonify({"success": True, "removed": 1})
+
+
 # ==================== DEBUG ENDPOINT ====================
 
 @app.route('/api/debug/scores')
@@ -627,7 +766,7 @@ def debug_scores():
     if not livescore:
         return jsonify({"error": "API not configured"})
     
-    matches = livescore.get_live_scores()
+    matches = current_live_snapshot().matches
     debug = []
     for match in matches[:5]:
         debug.append({
@@ -645,8 +784,49 @@ def debug_scores():
     })
 
 
+@app.route('/api/debug/traces')
+def debug_traces():
+    """Recent slow request traces, newest first"""
+    min_ms = request.args.get('min_ms', 0, type=float)
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    return jsonify({"stats": tracer.stats(), "traces": tracer.traces(min_ms, limit)})
+
+
+@app.route('/api/debug/push')
+def debug_push():
+    """Dispatch counters, and what the local stand-in push service received (debug mode only)"""
+    if not app.debug:
+        return jsonify({"error": "Not found"}), 404
+    if not push:
+        return jsonify({"error": "Web Push not configured"}), 503
+    inbox = getattr(push.service, 'inbox', None)
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    return jsonify({
+        "stats": push.stats(),
+        "delivered": inbox(request.args.get('endpoint'), limit) if inbox else None,
+    })
+
+
 # ==================== STATIC FILES ====================
 
+@app.route('/assets/<name>')
+def serve_asset(name):
+    """Content-hashed bundles, cached by browsers for a year"""
+    response = assets.response(name, request)
+    if response is None:
+        return jsonify({"error": "Not found"}), 404
+    return response
+
+
+@app.route('/sw.js')
+def serve_service_worker():
+    """Service worker for push notifications, served from the root so its scope is the whole site"""
+    response = send_from_directory('static', 'sw.js', max_age=0)
+    response.headers['Service-Worker-Allowed'] = '/'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
 @app.route('/static/<path:path>')
 def serve_static(path):
     return send_from_directory('static', path)
@@ -656,7 +836,10 @@ def serve_static(path):
 
 @app.errorhandler(404)
 def not_found(error):
-    return render_template('index.html')
+    """Unknown API paths get a JSON 404, any other path gets the dashboard"""
+    if request.path.startswith('/api/'):
+        return jsonify({'error': 'Not found'}), 404
+    return index()
 
 @app.errorhandler(500)
 def internal_error(error):
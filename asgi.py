@@ -0,0 +1,35 @@
+"""
+ASGI ENTRY POINT - The dashboard under an async server
+Same routes as app.py (which stays the WSGI/Vercel entry point); event
+streams are held on the event loop instead of one worker thread each, and
+/api/ws/matches streams deltas of followed matches over WebSocket.
+Run a single process per core:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+"""
+
+from app import app as flask_app, refresh_live_events
+from euro_live.asgi import ASGIApp
+from euro_live.match_channel import MatchChannel
+from euro_live.metrics import registry as metrics_registry
+from euro_live.livescore import LIVE_REFRESH_SECONDS
+from euro_live.services import current_live_snapshot, event_pipeline, livescore
+
+
+def live_snapshot():
+    return current_live_snapshot() if livescore else None
+
+
+def match_events(match_id) -> dict:
+    """Events feed of one match, cached upstream for a refresh window"""
+    return livescore.get_match_events(match_id) if livescore else {"success": False, "events": []}
+
+
+channel = MatchChannel(live_snapshot, match_events)
+app = ASGIApp(flask_app, event_pipeline.broker, refresh_live_events, wait_seconds=LIVE_REFRESH_SECONDS,
+              channel=channel)
+
+metrics_registry.gauge_callback("stream_clients", "Open event stream connections", (),
+                                lambda: {(): len(app.broadcaster.clients)})
+metrics_registry.gauge_callback("ws_clients", "Open match WebSocket connections", (),
+                                lambda: {(): len(channel.index)})
@@ -0,0 +1,137 @@
+"""
+CANNED UPSTREAM PAYLOADS
+Deterministic, realistically sized responses shaped like livescore-api.com
+and NewsAPI output. Generated from a fixed seed instead of checked-in JSON.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+TEAMS = [
+    "Arsenal", "Chelsea", "Liverpool", "Manchester City", "Manchester United", "Tottenham Hotspur",
+    "Real Madrid", "Barcelona", "Atlético Madrid", "Sevilla", "Bayern München", "Borussia Dortmund",
+    "RB Leipzig", "Bayer Leverkusen", "Juventus", "Inter", "AC Milan", "Napoli", "AS Roma",
+    "Paris Saint-Germain", "Olympique Marseille", "AS Monaco", "Celtic", "Rangers", "FC København",
+    "Benfica", "Porto", "Sporting CP", "Ajax", "PSV Eindhoven", "Feyenoord", "Galatasaray",
+]
+COMPETITIONS = [(2, "Premier League"), (3, "LaLiga"), (1, "Bundesliga"), (4, "Serie A"),
+                (5, "Ligue 1"), (244, "UEFA Champions League"), (245, "UEFA Europa League")]
+STATUSES = ["IN PLAY"] * 8 + ["HALF TIME BREAK", "ADDED TIME"]
+EVENT_TYPES = ["GOAL"] * 3 + ["YELLOW_CARD"] * 4 + ["SUBSTITUTION"] * 6 + \
+              ["GOAL_PENALTY", "OWN_GOAL", "RED_CARD", "MISSED_PENALTY"]
+
+
+def _team(rng: random.Random, index: int) -> Dict:
+    name = TEAMS[index % len(TEAMS)]
+    suffix = "" if index < len(TEAMS) else f" {index // len(TEAMS)}"
+    return {"id": 1000 + index, "name": name + suffix,
+            "logo": f"https://cdn.example.com/teams/{1000 + index}.png",
+            "stadium": f"{name} Stadium", "country_id": rng.randint(1, 60)}
+
+
+def live_payload(count: int, seed: int = 7) -> Dict:
+    """/scores/live.json response with `count` matches"""
+    rng = random.Random(seed)
+    matches = []
+    for i in range(count):
+        comp_id, comp_name = COMPETITIONS[i % len(COMPETITIONS)]
+        status = rng.choice(STATUSES)
+        minute = "HT" if status == "HALF TIME BREAK" else str(rng.randint(1, 90))
+        home_goals, away_goals = rng.randint(0, 4), rng.randint(0, 3)
+        matches.append({
+            "id": 500000 + i,
+            "fixture_id": 900000 + i,
+            "home": _team(rng, 2 * i),
+            "away": _team(rng, 2 * i + 1),
+            "competition": {"id": comp_id, "name": comp_name, "is_league": True},
+            "country": {"id": rng.randint(1, 60), "name": "England", "flag": "gb.png"},
+            "score": f"{home_goals} - {away_goals}",
+            "ht_score": f"{min(home_goals, 1)} - {min(away_goals, 1)}",
+            "ft_score": "",
+            "et_score": "",
+            "time": "‎" + minute,
+            "status": status,
+            "scheduled": "19:45",
+            "added": "2024-04-16 17:00:12",
+            "last_changed": "2024-04-16 20:31:55",
+            "location": "Stadium",
+            "odds": {"pre": {"1": 2.1, "2": 3.4, "X": 3.2}, "live": {"1": None, "2": None, "X": None}},
+            "urls": {"events": f"https://livescore-api.com/api-client/matches/events.json?id={500000 + i}"},
+        })
+    return {"success": True, "data": {"match": matches}}
+
+
+def fixtures_payload(count: int, seed: int = 11) -> Dict:
+    """/fixtures/list.json response with `count` fixtures"""
+    rng = random.Random(seed)
+    fixtures = []
+    for i in range(count):
+        comp_id, comp_name = COMPETITIONS[i % len(COMPETITIONS)]
+        fixtures.append({
+            "id": 700000 + i,
+            "home": _team(rng, 2 * i),
+            "away": _team(rng, 2 * i + 1),
+            "competition": {"id": comp_id, "name": comp_name},
+            "country": {"name": "Europe"},
+            "date": "2024-04-16",
+            "time": f"{rng.randint(12, 21)}:{rng.choice(['00', '15', '30', '45'])}:00",
+            "round": str(rng.randint(1, 38)),
+            "location": "Stadium",
+        })
+    return {"success": True, "data": {"fixtures": fixtures}}
+
+
+def table_payload(count: int = 20, seed: int = 13) -> Dict:
+    """/leagues/table.json response"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        won, drawn, lost = rng.randint(5, 25), rng.randint(0, 10), rng.randint(0, 15)
+        rows.append({"team_id": 1000 + i, "name": TEAMS[i % len(TEAMS)], "rank": i + 1,
+                     "played": won + drawn + lost, "won": won, "drawn": drawn, "lost": lost,
+                     "goals_scored": rng.randint(20, 90), "goals_conceded": rng.randint(15, 70),
+                     "points": won * 3 + drawn})
+    rows.sort(key=lambda r: -r["points"])
+    return {"success": True, "data": {"table": rows}}
+
+
+def events_payload(count: int, seed: int = 17) -> List[Dict]:
+    """Event list for one match (/matches/events.json data.event)"""
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        event_type = rng.choice(EVENT_TYPES)
+        event = {
+            "id": 3000000 + i,
+            "event": event_type,
+            "time": rng.randint(1, 90),
+            "player": {"id": rng.randint(1, 5000), "name": f"Player {rng.randint(1, 500)}"},
+            "is_home": rng.random() < 0.5,
+            "sort": i,
+        }
+        if event_type in ("GOAL", "GOAL_PENALTY", "SUBSTITUTION"):
+            event["info"] = {"id": rng.randint(1, 5000), "name": f"Player {rng.randint(1, 500)}"}
+        events.append(event)
+    return events
+
+
+def news_payload(count: int, seed: int = 19) -> Dict:
+    """NewsAPI /top-headlines or /everything response with `count` articles"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    articles = []
+    for i in range(count):
+        published = now - timedelta(minutes=rng.randint(1, 60 * 24 * 5))
+        articles.append({
+            "source": {"id": None, "name": rng.choice(["BBC Sport", "ESPN", "Sky Sports", "The Athletic"])},
+            "author": f"Reporter {i}",
+            "title": "[Removed]" if i % 25 == 24 else
+                     f"{rng.choice(TEAMS)} beat {rng.choice(TEAMS)} in dramatic late finish ({i})",
+            "description": "Match report and reaction. " * rng.randint(4, 12),
+            "url": f"https://news.example.com/football/{i}",
+            "urlToImage": f"https://news.example.com/img/{i}.jpg",
+            "publishedAt": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "content": "Full article text. " * rng.randint(10, 40),
+        })
+    return {"status": "ok", "totalResults": count, "articles": articles}
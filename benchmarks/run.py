@@ -0,0 +1,497 @@
+"""
+HOT PATH BENCHMARKS
+Measures per-function throughput, per-route latency through the Flask test
+client and allocations (tracemalloc) against canned upstream payloads, with
+no network. Results are written as JSON so two commits can be compared.
+Benchmarks listed in BUDGETS_US also fail --fail-on-regression when their
+median goes over the budget.
+
+    python benchmarks/run.py                       # full run, writes benchmarks/results/<sha>.json
+    python benchmarks/run.py --quick -k livescores # subset, shorter timings
+    python benchmarks/run.py -k startup            # cold start: import + first request
+    python benchmarks/run.py --compare benchmarks/results/abc123.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+WORKDIR = tempfile.mkdtemp(prefix="euro-live-bench-")
+
+# The app reads these at import time: fake credentials, throwaway state files
+os.environ.setdefault("LIVESCORE_API_KEY", "bench")
+os.environ.setdefault("LIVESCORE_API_SECRET", "bench")
+os.environ.setdefault("NEWS_API_KEY", "bench")
+os.environ["GEMINI_API_KEY"] = ""
+os.environ["TEAM_REGISTRY_PATH"] = os.path.join(WORKDIR, "teams.json")
+os.environ["SNAPSHOT_DB_PATH"] = os.path.join(WORKDIR, "history.sqlite3")
+os.environ["CACHE_SQLITE_PATH"] = os.path.join(WORKDIR, "cache.sqlite3")
+
+import payloads  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+LIVE_SIZES = (50, 200, 500)
+
+# Median latency each benchmark must stay under, microseconds
+BUDGETS_US = {
+    "team_registry.search.prefix": 1000,
+    "team_registry.search.fuzzy": 1000,
+}
+
+
+class Suite:
+    def __init__(self, min_time: float, repeat: int, pattern: Optional[str]):
+        self.min_time = min_time
+        self.repeat = repeat
+        self.pattern = pattern
+        self.results: Dict[str, Dict] = {}
+
+    def bench(self, name: str, fn: Callable, items: int = 1, setup: Callable = None) -> None:
+        if self.pattern and self.pattern not in name:
+            return
+        if setup:
+            setup()
+        fn()  # warm caches and lazy imports
+
+        timer = timeit.Timer(fn)
+        loops, _ = timer.autorange()
+        loops = max(1, int(loops * self.min_time / 0.2))
+        per_call = [t / loops for t in timer.repeat(repeat=self.repeat, number=loops)]
+
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        fn()
+        after, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.record(name, per_call, items, loops, peak - before, after - before)
+
+    def record(self, name: str, per_call: List[float], items: int = 1, loops: int = 1,
+               alloc_peak: int = 0, alloc_retained: int = 0) -> None:
+        median = statistics.median(per_call)
+        self.results[name] = {
+            "median_us": round(median * 1e6, 2),
+            "min_us": round(min(per_call) * 1e6, 2),
+            "stdev_us": round(statistics.pstdev(per_call) * 1e6, 2),
+            "ops_per_s": round(1 / median, 1) if median else None,
+            "items_per_s": round(items / median, 1) if median else None,
+            "alloc_peak_kib": round(alloc_peak / 1024, 1),
+            "alloc_retained_kib": round(alloc_retained / 1024, 1),
+            "loops": loops,
+        }
+        r = self.results[name]
+        print(f"  {name:<48} {r['median_us']:>12.1f} us  {r['items_per_s'] or 0:>14,.0f} items/s"
+              f"  {r['alloc_peak_kib']:>9.1f} KiB peak")
+
+
+# ==================== UPSTREAM STAND-IN ====================
+
+def install_recording(responses: List[tuple]) -> None:
+    """Point the shared upstream tap at an in-memory recording"""
+    from euro_live.cache import upstream_cache
+    from euro_live.replay import Recorder, Replayer, upstream
+    from euro_live.response_cache import responses as response_cache
+    from euro_live.services import live_snapshots
+
+    directory = tempfile.mkdtemp(dir=WORKDIR)
+    recorder = Recorder(directory, "bench")
+    for service, endpoint, params, body in responses:
+        recorder.write(service, endpoint, params, body, 0.0)
+    replayer = Replayer([recorder.path])
+    replayer.clock.set(3600)  # well after every recorded entry
+    upstream.mode = "replay"
+    upstream.replayer = replayer
+    # Cached bytes and upstream answers belong to the previous recording
+    response_cache.invalidate()
+    upstream_cache.invalidate()
+    live_snapshots.invalidate()
+
+
+def recording(live: int = 50, fixtures: int = 200, news: int = 100) -> List[tuple]:
+    return [
+        ("livescore", "/scores/live.json", {}, payloads.live_payload(live)),
+        ("livescore", "/fixtures/list.json", {}, payloads.fixtures_payload(fixtures)),
+        ("livescore", "/leagues/table.json", {"competition_id": 2}, payloads.table_payload(20)),
+        # Any match id: replay falls back to the endpoint's recording
+        ("livescore", "/matches/events.json", {}, {"success": True, "data": {"event": payloads.events_payload(20)}}),
+        ("newsapi", "/top-headlines", {"country": "us", "category": "sports", "pageSize": 100},
+         payloads.news_payload(news)),
+    ]
+
+
+# ==================== BENCHMARKS ====================
+
+def function_benchmarks(suite: Suite) -> None:
+    from euro_live import prompts
+    from euro_live.livescore import LiveScoreAPI
+    from euro_live.message_templates import engine, match_context
+    from euro_live.news import NewsAPIService
+    from euro_live.services import team_registry
+
+    api = LiveScoreAPI("k", "s")
+    news = NewsAPIService("k")
+
+    print("functions")
+    for size in LIVE_SIZES:
+        raw = payloads.live_payload(size)["data"]["match"]
+        suite.bench(f"extract_match_data[{size}]",
+                    lambda raw=raw: [api._extract_match_data(m) for m in raw], items=size)
+
+    articles = payloads.news_payload(100)["articles"]
+    suite.bench("format_articles[100]", lambda: news._format_articles(articles), items=100)
+    formatted = news._format_articles(articles)
+    suite.bench("prompts.news_summary[5 articles]",
+                lambda: prompts.build("news_summary", articles=prompts.article_lines(formatted)), items=5)
+
+    events = payloads.events_payload(90)
+    suite.bench("format_events_for_display[90]", lambda: api.format_events_for_display(events), items=90)
+
+    processed = [api._extract_match_data(m) for m in payloads.live_payload(200)["data"]["match"]]
+    suite.bench("render_matches.live_score[200]",
+                lambda: engine.render_matches("live_score", processed), items=200)
+    suite.bench("render_matches.live_score.uncached[200]",
+                lambda: [engine.compiled("live_score").render(match_context(m)) for m in processed],
+                items=200)
+
+    from euro_live.translation_memory import TranslationMemory
+    # Alert lines open with team names, known from the feed like in production
+    team_registry.observe_matches(processed)
+    memory = TranslationMemory(os.path.join(WORKDIR, "translations.sqlite3"),
+                               known_names=team_registry.is_team_name)
+    alerts = [engine.render("goal_alert", match_context(m)) for m in processed[:50]]
+
+    def translate_alerts():
+        for alert in alerts:
+            segments = memory.split(alert)
+            if not memory.missing("es", segments):
+                memory.render("es", segments)
+    suite.bench("translation_memory.goal_alert[50]", translate_alerts, items=50)
+
+    team_registry.observe_matches(payloads.fixtures_payload(500)["data"]["fixtures"])
+    suite.bench("team_registry.search.prefix", lambda: team_registry.search("manch"))
+    suite.bench("team_registry.search.fuzzy", lambda: team_registry.search("barcelnoa"))
+
+    push_benchmarks(suite)
+    stream_benchmarks(suite)
+
+
+def push_benchmarks(suite: Suite) -> None:
+    from euro_live.push import LocalPushService, PushDispatcher, PushSubscription, SubscriptionRegistry
+
+    path = os.path.join(WORKDIR, "push-bench.sqlite3")
+    if os.path.exists(path):
+        os.remove(path)
+    subscriptions = SubscriptionRegistry(path)
+    # 5000 fans of team 1, the rest spread over 200 other teams
+    for i in range(10000):
+        team = 1 if i < 5000 else 2 + i % 200
+        subscriptions.subscribe(PushSubscription(f"https://push.example/{i}", "p256dh", "auth", [team]))
+    dispatcher = PushDispatcher(subscriptions, LocalPushService())
+    goal = {"types": ["goal"], "priority": 10, "match": {
+        "id": 1, "home_id": 1, "away_id": 2, "competition_id": 2, "home_name": "Home", "away_name": "Away",
+        "home_score": 1, "away_score": 0, "minute": "23", "status": "IN PLAY", "competition_name": "Test"}}
+
+    suite.bench("push.recipients[5000 of 10000]", lambda: subscriptions.recipients((1, 2), (2,)), items=5000)
+    suite.bench("push.deliver.goal[5000 subscribers]", lambda: dispatcher.deliver(goal), items=5000)
+
+
+def stream_benchmarks(suite: Suite) -> None:
+    from euro_live.event_pipeline import EventBroker
+    from euro_live.match_channel import MatchChannel, SocketClient
+    from euro_live.streaming import Broadcaster, StreamClient
+
+    broker = EventBroker()
+    broadcaster = Broadcaster(broker, lambda: None)
+    clients = [StreamClient() for _ in range(10000)]
+    broadcaster.clients.update(clients)
+    goal = {"match_id": 1, "types": ["goal"], "priority": 10, "message": "⚽ GOAL! Home 1 - 0 Away",
+            "match": {"id": 1, "home_name": "Home", "away_name": "Away", "home_score": 1, "away_score": 0}}
+
+    def fan_out():
+        broadcaster.fan_out([broker.publish(goal)])
+        for client in clients:
+            client.queue.get_nowait()
+    suite.bench("stream.fan_out.goal[10000 clients]", fan_out, items=10000)
+
+    # 10000 sockets, each following one of 200 live matches: a goal reaches that match's 50
+    matches = [{"id": i, "competition_id": 2, "home_id": 2 * i, "away_id": 2 * i + 1,
+                "home_score": 0, "away_score": 0, "minute": "10"} for i in range(200)]
+    channel = MatchChannel(lambda: None, lambda match_id: {})
+    for i in range(10000):
+        channel.index.subscribe(SocketClient(), {"matches": [i % 200]})
+    channel.publish_snapshot(matches)
+
+    def route_goal():
+        matches[7]["home_score"] += 1
+        channel.publish_snapshot(matches)
+        for client in channel.index.index["matches"][7]:
+            client.queue.get_nowait()
+    suite.bench("ws.route.goal[50 of 10000 sockets]", route_goal, items=50)
+
+
+def cache_benchmarks(suite: Suite) -> None:
+    import threading
+    from euro_live.cache import LocalRedis, RedisTier, SQLiteTier, TieredCache
+
+    body = payloads.live_payload(200)
+    tiers = {
+        "sqlite": SQLiteTier(os.path.join(WORKDIR, "cache-bench.sqlite3")),
+        "redis": RedisTier(LocalRedis()),
+    }
+
+    print("cache")
+    local = TieredCache()
+    local.get("live", 60, lambda: body)
+    suite.bench("upstream_cache.hit.local", lambda: local.get("live", 60, lambda: body))
+
+    for name, tier in tiers.items():
+        # A worker that has not seen the key yet: shared read + decode
+        worker = TieredCache(tier)
+        worker.get("live", 60, lambda: body)
+
+        def shared_hit(worker=worker):
+            worker.local.clear()
+            return worker.get("live", 60, lambda: body)
+        suite.bench(f"upstream_cache.hit.{name}[200]", shared_hit, items=200)
+
+        # Eight cold workers at once: one upstream call, the rest wait for it
+        def cold_fleet(tier=tier, name=name):
+            tier.clear()
+            workers = [TieredCache(tier) for _ in range(8)]
+            builds = []
+
+            def fetch():
+                builds.append(1)
+                time.sleep(0.02)  # upstream round trip
+                return body
+
+            threads = [threading.Thread(target=w.get, args=("live", 60, fetch)) for w in workers]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert len(builds) == 1, (name, len(builds))
+        suite.bench(f"upstream_cache.cold_fill.{name}[8 workers]", cold_fleet, items=8)
+
+
+def route_benchmarks(suite: Suite) -> None:
+    import app
+    from euro_live.cache import upstream_cache
+    from euro_live.response_cache import responses
+    from euro_live.services import live_snapshots
+
+    client = app.app.test_client()
+
+    def get(path: str, headers: Dict = None, cold: bool = False) -> Callable:
+        def call():
+            if cold:
+                responses.invalidate()
+                upstream_cache.invalidate()
+                live_snapshots.invalidate()
+            response = client.get(path, headers=headers)
+            assert response.status_code == 200, (path, response.status_code)
+            return response.data
+        return call
+
+    print("routes")
+    for size in LIVE_SIZES:
+        suite.bench(f"GET /api/livescores[{size}]", get("/api/livescores"), items=1,
+                    setup=lambda size=size: install_recording(recording(live=size)))
+        suite.bench(f"GET /api/livescores.gzip[{size}]",
+                    get("/api/livescores", {"Accept-Encoding": "gzip, br"}), items=1)
+        suite.bench(f"GET /api/livescores.cold[{size}]", get("/api/livescores", cold=True), items=1)
+        suite.bench(f"GET /api/livescores?competitions&teams[{size}]",
+                    get("/api/livescores?competitions=2,3,4&teams=1000,1001,1002"), items=1)
+        suite.bench(f"GET /api/livescores?fields&limit=200[{size}]",
+                    get("/api/livescores?fields=id,minute,home_team.score,away_team.score&limit=200"), items=1)
+
+    install_recording(recording())
+    suite.bench("GET /api/fixtures/today[200]", get("/api/fixtures/today"))
+    suite.bench("GET /api/fixtures/today?cursor[200]", get("/api/fixtures/today?limit=50&cursor="
+                                                           + client.get("/api/fixtures/today").headers["X-Next-Cursor"]))
+    suite.bench("GET /api/standings/2", get("/api/standings/2"))
+    suite.bench("GET /api/news/sports[100]", get("/api/news/sports?limit=100"))
+    suite.bench("GET /api/whatsapp/live[50]", get("/api/whatsapp/live"))
+    suite.bench("GET /api/teams/search", get("/api/teams/search?q=real"))
+    suite.bench("GET /api/events", get("/api/events"))
+
+    startup_parts = ["/api/livescores", "/api/fixtures/today", "/api/standings/2", "/api/standings/3",
+                     "/api/news/sports", "/api/gemini/status"]
+
+    def separately():
+        for path in startup_parts:
+            get(path)()
+
+    suite.bench("GET startup parts separately[6]", separately, items=len(startup_parts))
+    suite.bench("GET /api/batch[6 parts]", get("/api/batch?" + "&".join(f"part={p}" for p in startup_parts)),
+                items=len(startup_parts))
+    # Parts with a public max-age are served from the response cache after the first batch
+    cached_parts = ["/api/livescores", "/api/fixtures/today", "/api/news/sports"]
+    suite.bench("GET cached parts separately[3]", lambda: [get(path)() for path in cached_parts],
+                items=len(cached_parts))
+    suite.bench("GET /api/batch[3 cached parts]", get("/api/batch?" + "&".join(f"part={p}" for p in cached_parts)),
+                items=len(cached_parts))
+
+    page = client.get("/")
+    etag = page.headers["ETag"]
+    suite.bench("GET /", get("/"))
+    suite.bench("GET /.cold", get("/", cold=True))
+    suite.bench("GET /.revalidate", lambda: client.get("/", headers={"If-None-Match": etag}))
+    bundle = app.assets.bundle().url("dashboard.js")
+    suite.bench("GET /assets/dashboard.js.gzip", get(bundle, {"Accept-Encoding": "gzip"}))
+
+
+STARTUP_SCRIPT = """
+import sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get(sys.argv[1])
+done = time.perf_counter()
+print(imported - started, done - started, response.status_code)
+"""
+
+
+def startup_benchmarks(suite: Suite, runs: int) -> None:
+    """Fresh interpreter per run, like a serverless cold start"""
+    if suite.pattern and suite.pattern not in "startup":
+        return
+    from euro_live.replay import Recorder
+
+    recorder = Recorder(tempfile.mkdtemp(dir=WORKDIR), "startup")
+    for service, endpoint, params, body in recording():
+        recorder.write(service, endpoint, params, body, 0.0)
+    env = dict(os.environ, UPSTREAM_MODE="replay", REPLAY_FILE=recorder.path, REPLAY_START="3600",
+               TEAM_REGISTRY_PATH=os.path.join(WORKDIR, "startup-teams.json"),
+               SNAPSHOT_DB_PATH=os.path.join(WORKDIR, "startup-history.sqlite3"))
+
+    def run(*args: str) -> subprocess.CompletedProcess:
+        return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True)
+
+    print("startup")
+    for path in ("/", "/api/livescores"):
+        imports, totals = [], []
+        for _ in range(runs):
+            result = run("-c", STARTUP_SCRIPT, path)
+            imported, total, status = result.stdout.split()[-3:]
+            assert status == "200", (path, status, result.stderr[-500:])
+            imports.append(float(imported))
+            totals.append(float(total))
+        if path == "/":
+            suite.record("startup.import_app", imports)
+        suite.record(f"startup.first_request[{path}]", totals)
+
+    # -X importtime: the slowest modules by cumulative time, for the console only
+    report = run("-X", "importtime", "-c", "import app").stderr
+    rows = []
+    for line in report.splitlines():
+        parts = line.split("|")
+        if line.startswith("import time:") and len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    for cumulative, module in sorted(rows, reverse=True)[:12]:
+        print(f"    {cumulative / 1000:>8.1f} ms  {module}")
+
+
+# ==================== RESULTS ====================
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: Dict, baseline_path: str, threshold: float) -> int:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\ncompared with {baseline['meta']['revision']} ({baseline_path})")
+    regressions = 0
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if not old:
+            continue
+        change = (result["median_us"] - old["median_us"]) / old["median_us"] * 100
+        flag = ""
+        if change > threshold:
+            flag = "  << slower"
+            regressions += 1
+        elif change < -threshold:
+            flag = "  faster"
+        print(f"  {name:<48} {old['median_us']:>12.1f} -> {result['median_us']:>12.1f} us  {change:+7.1f}%{flag}")
+    return regressions
+
+
+def over_budget(current: Dict) -> int:
+    over = 0
+    for name, budget in BUDGETS_US.items():
+        result = current["results"].get(name)
+        if result and result["median_us"] > budget:
+            print(f"  {name:<48} {result['median_us']:>12.1f} us  over its {budget} us budget")
+            over += 1
+    return over
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="pattern", help="only run benchmarks whose name contains this")
+    parser.add_argument("--quick", action="store_true", help="shorter timings, noisier numbers")
+    parser.add_argument("--output", help="results file (default benchmarks/results/<revision>.json)")
+    parser.add_argument("--compare", help="baseline results file to diff against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="exit 1 on a regression or a benchmark over its budget")
+    args = parser.parse_args(argv)
+
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    suite = Suite(min_time=0.05 if args.quick else 0.4, repeat=3 if args.quick else 7, pattern=args.pattern)
+    install_recording(recording())
+    startup_benchmarks(suite, runs=3 if args.quick else 10)
+    function_benchmarks(suite)
+    cache_benchmarks(suite)
+    route_benchmarks(suite)
+
+    revision = git_revision()
+    current = {
+        "meta": {
+            "revision": revision,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "results": suite.results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{revision}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    print(f"\nresults written to {output}")
+
+    regressions = over_budget(current)
+    if args.compare:
+        regressions += compare(current, args.compare, args.threshold)
+    if regressions and args.fail_on_regression:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
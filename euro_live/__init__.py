@@ -0,0 +1,15 @@
+"""
+EURO LIVE - Provider services and the shared layers under them
+    client             one HTTP path for every provider: pooling, timeouts, replay, tracing, metrics
+    livescore / news / gemini   one implementation per provider
+    services           process-wide instances, built on first use
+app.py only does routing on top of this package.
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+# Load .env before any submodule reads its settings (Vercel injects the environment itself)
+if not os.getenv("VERCEL"):
+    load_dotenv()
@@ -0,0 +1,296 @@
+"""
+ASGI - Async serving mode for long-lived connections
+Event streams and the match WebSocket are served natively on the event
+loop: an open connection is a queue and a suspended coroutine, not a worker
+thread, so one process holds tens of thousands of viewers. Every other route
+runs the unchanged Flask app on a bounded thread pool, so both modes share
+the routes, caches, metrics and service layer.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8000
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Dict, List, Optional, Any, Callable, Tuple
+from urllib.parse import parse_qs
+import logging
+
+from .match_channel import MatchChannel, SocketClient
+from .metrics import http_latency, http_requests
+from .streaming import STREAM_SEND_TIMEOUT, Broadcaster, serve_events
+
+logger = logging.getLogger(__name__)
+
+# Threads running ordinary (short) Flask requests
+ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", 32))
+# Request bodies are small JSON documents (batch, push subscriptions)
+MAX_BODY_BYTES = int(os.getenv("ASGI_MAX_BODY", 1024 * 1024))
+
+STREAM_HEADERS = [
+    (b"content-type", b"text/event-stream; charset=utf-8"),
+    (b"cache-control", b"no-cache"),
+    (b"x-accel-buffering", b"no"),
+]
+
+
+# ==================== WSGI BRIDGE ====================
+
+def wsgi_environ(scope: Dict, body: bytes) -> Dict:
+    """PEP 3333 environ for an ASGI HTTP scope"""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", ()):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name != "CONTENT_LENGTH":
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _run_wsgi(wsgi_app: Callable, environ: Dict) -> Tuple[int, List[Tuple[bytes, bytes]], Any]:
+    """
+    Call the app on a worker thread: (status, headers, body). The body is
+    read to bytes here unless it is an event stream, which is handed back
+    as an iterator to be pulled chunk by chunk.
+    """
+    started = {}
+
+    def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None):
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+        return lambda data: None
+
+    result = wsgi_app(environ, start_response)
+    iterator = iter(result)
+    # start_response may wait for the first chunk
+    first = next(iterator, b"") if "status" not in started else None
+    streamed = any(name == b"content-type" and value.startswith(b"text/event-stream")
+                   for name, value in started["headers"])
+    if streamed:
+        return started["status"], started["headers"], _Streamed(first, iterator, result)
+    try:
+        return started["status"], started["headers"], (first or b"") + b"".join(iterator)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+
+
+_DONE = object()
+
+
+class _Streamed:
+    """A streamed WSGI body, closed when the response ends"""
+
+    def __init__(self, first: Optional[bytes], iterator, result):
+        self.pending = [first] if first else []
+        self.iterator = iterator
+        self.result = result
+
+    def next_chunk(self) -> Any:
+        if self.pending:
+            return self.pending.pop()
+        return next(self.iterator, _DONE)
+
+    def close(self) -> None:
+        if hasattr(self.result, "close"):
+            self.result.close()
+
+
+# ==================== APPLICATION ====================
+
+class ASGIApp:
+    """
+    ASGI application around the Flask app. `streams` and `sockets` map
+    paths to async handlers served on the loop; everything else is
+    dispatched to Flask.
+    """
+
+    def __init__(self, wsgi_app: Callable, broker, refresh: Callable[[], None], wait_seconds: float = 10.0,
+                 channel: MatchChannel = None):
+        self.wsgi_app = wsgi_app
+        self.broadcaster = Broadcaster(broker, refresh, wait_seconds)
+        self.channel = channel
+        self.streams = {"/api/events/stream": self.event_stream}
+        self.sockets = {"/api/ws/matches": self.match_socket} if channel is not None else {}
+        self._executor = ThreadPoolExecutor(max_workers=ASGI_WSGI_THREADS, thread_name_prefix="wsgi")
+
+    async def __call__(self, scope: Dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] == "http":
+            handler = self.streams.get(scope["path"])
+            if handler is not None and scope["method"] == "GET":
+                await handler(scope, receive, send)
+            else:
+                await self.wsgi(scope, receive, send)
+        elif scope["type"] == "websocket":
+            handler = self.sockets.get(scope["path"])
+            if handler is not None:
+                await handler(scope, receive, send)
+            else:
+                await receive()
+                await send({"type": "websocket.close", "code": 1008})
+        elif scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+
+    async def lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self.broadcaster.start()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.broadcaster.stop()
+                if self.channel is not None:
+                    await self.channel.stop()
+                self._executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def wsgi(self, scope: Dict, receive: Callable, send: Callable) -> None:
+        body = await self._read_body(receive)
+        if body is None:
+            await self._plain(send, 413, b'{"error": "Request body too large"}')
+            return
+
+        loop = asyncio.get_running_loop()
+        environ = wsgi_environ(scope, body)
+        try:
+            status, headers, body = await loop.run_in_executor(self._executor, _run_wsgi, self.wsgi_app, environ)
+        except Exception as e:
+            logger.error(f"WSGI dispatch failed for {scope['path']}: {e}")
+            await self._plain(send, 500, b'{"error": "Internal server error"}')
+            return
+
+        if isinstance(body, bytes):
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        # A streaming route without a native handler: pull each chunk on the pool
+        try:
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            while True:
+                chunk = await loop.run_in_executor(self._executor, body.next_chunk)
+                if chunk is _DONE:
+                    break
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        except OSError:
+            pass  # client went away
+        finally:
+            await loop.run_in_executor(self._executor, body.close)
+
+    async def _read_body(self, receive: Callable) -> Optional[bytes]:
+        parts = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                return None
+            parts.append(chunk)
+            if not message.get("more_body"):
+                break
+        return b"".join(parts)
+
+    async def _plain(self, send: Callable, status: int, body: bytes) -> None:
+        await send({"type": "http.response.start", "status": status,
+                    "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body})
+
+    # ==================== STREAMS ====================
+
+    async def event_stream(self, scope: Dict, receive: Callable, send: Callable) -> None:
+        """/api/events/stream, same frames and arguments as the Flask route"""
+        started = time.perf_counter()
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        headers = dict(scope.get("headers", ()))
+        try:
+            cursor = int(headers.get(b"last-event-id", b"") or query.get("since", ["0"])[0] or 0)
+            max_duration = int(query.get("max_duration", ["300"])[0])
+        except ValueError:
+            cursor, max_duration = 0, 300
+
+        route = "/api/events/stream"
+        http_requests.inc(route, "GET", 200)
+        await send({"type": "http.response.start", "status": 200, "headers": STREAM_HEADERS})
+        await serve_events(self.broadcaster, cursor, max_duration, send, receive)
+        http_latency.observe(time.perf_counter() - started, route, "GET")
+
+    # ==================== SOCKETS ====================
+
+    async def match_socket(self, scope: Dict, receive: Callable, send: Callable) -> None:
+        """/api/ws/matches: subscribe to matches, competitions or teams, receive their deltas"""
+        message = await receive()
+        if message["type"] != "websocket.connect":
+            return
+        await send({"type": "websocket.accept"})
+        http_requests.inc("/api/ws/matches", "GET", 101)
+
+        client = self.channel.connect()
+        writer = asyncio.ensure_future(self._write_socket(client, send))
+        try:
+            while True:
+                message = await receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message["type"] != "websocket.receive" or writer.done():
+                    continue
+                text = message.get("text")
+                if text is None:
+                    text = (message.get("bytes") or b"").decode("utf-8", "replace")
+                try:
+                    data = json.loads(text)
+                except ValueError:
+                    data = None
+                self.channel.handle(client, data)
+        finally:
+            self.channel.disconnect(client)
+            writer.cancel()
+
+    async def _write_socket(self, client: SocketClient, send: Callable) -> None:
+        try:
+            while True:
+                text = await client.queue.get()
+                if text is None or client.closed:
+                    break
+                await asyncio.wait_for(send({"type": "websocket.send", "text": text}), STREAM_SEND_TIMEOUT)
+            # 1013 "try again later" for a socket that fell behind, 1001 "going away" on shutdown
+            await send({"type": "websocket.close", "code": 1013 if client.closed == "slow" else 1001})
+        except (asyncio.TimeoutError, OSError):
+            client.closed = client.closed or "slow"
+
+    def stats(self) -> Dict:
+        return {
+            "streams": self.broadcaster.stats(),
+            "sockets": self.channel.stats() if self.channel is not None else None,
+            "wsgi_threads": ASGI_WSGI_THREADS,
+        }
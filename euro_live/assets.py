@@ -0,0 +1,325 @@
+"""
+ASSETS - Bundled, minified, content-hashed front-end assets
+Built once per process from the sources in static/:
+    dashboard.css   critical sections are inlined into the page, the rest
+                    becomes a hashed stylesheet that does not block first paint
+    dashboard.js    JS_BUNDLE concatenated in load order and minified
+Hashed files are served from memory with immutable Cache-Control, so a
+repeat visit makes no asset requests at all.
+
+    python -m euro_live.assets              build and print the manifest
+    python -m euro_live.assets --out DIR    also write the hashed files (CDN upload)
+"""
+
+import argparse
+import os
+import re
+import sys
+import threading
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from flask import Response
+
+from .response_cache import PreparedResponse
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+URL_PREFIX = "/assets/"
+
+# Same order the template used to load them in
+JS_BUNDLE = (
+    "js/dashboard-ui.js",
+    "js/tab-coordinator.js",
+    "js/notification-service.js",
+    "js/event-queue.js",
+    "js/live-tracker.js",
+    "js/app.js",
+)
+CSS_SOURCE = "css/dashboard.css"
+
+# Sections (by their /* ===== NAME ===== */ banner) only needed below the fold
+DEFERRED_CSS_SECTIONS = ("NEWS SECTION", "WHATSAPP PANELS", "STANDINGS TABLE")
+# Repeated after the deferred rules so their media overrides still win the cascade
+TRAILING_CSS_SECTIONS = ("RESPONSIVE BREAKPOINTS", "ACCESSIBILITY")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+CSS_SECTION = re.compile(r"/\*\s*=+\s*([A-Z][A-Z &]*?)\s*=+\s*\*/")
+
+
+# ==================== MINIFIERS ====================
+
+# No space is needed next to these (+ and - stay spaced: "a - -b")
+_JS_TIGHT = set("{}()[];,:=<>*&|!?.")
+# After these a "/" starts a regex literal, not a division
+_JS_REGEX_AFTER = set("(,=:[!&|?{};+-*%<>~^")
+_JS_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "void", "yield", "await"}
+_JS_LAST_WORD = re.compile(r"[A-Za-z_$][\w$]*$")
+
+
+def minify_js(source: str) -> str:
+    """
+    Drop comments and indentation, collapse whitespace. Newlines are kept
+    (automatic semicolon insertion), strings/templates/regexes untouched.
+    """
+    out: List[str] = []
+    templates: List[int] = []  # brace depth inside each open ${ }
+    i, n = 0, len(source)
+
+    def last() -> str:
+        return out[-1][-1] if out else ""
+
+    def tail() -> str:
+        return "".join(out[-12:]).rstrip()
+
+    def drop_space() -> None:
+        if out and out[-1].endswith(" "):
+            out[-1] = out[-1][:-1]
+            if not out[-1]:
+                out.pop()
+
+    def scan_template(start: int) -> int:
+        """From just after ` (or }), copy template text up to ` or ${"""
+        j = start
+        while j < n:
+            c = source[j]
+            if c == "\\":
+                j += 2
+                continue
+            if c == "`":
+                out.append(source[start:j + 1])
+                return j + 1
+            if c == "$" and j + 1 < n and source[j + 1] == "{":
+                out.append(source[start:j + 2])
+                templates.append(0)
+                return j + 2
+            j += 1
+        out.append(source[start:])
+        return n
+
+    while i < n:
+        c = source[i]
+
+        if c in "'\"":
+            j = i + 1
+            while j < n and source[j] != c and source[j] != "\n":
+                j += 2 if source[j] == "\\" else 1
+            out.append(source[i:j + 1])
+            i = j + 1
+            continue
+
+        if c == "`":
+            out.append("`")
+            i = scan_template(i + 1)
+            continue
+
+        if templates and c in "{}":
+            if c == "{":
+                templates[-1] += 1
+            elif templates[-1] == 0:
+                templates.pop()
+                out.append("}")
+                i = scan_template(i + 1)
+                continue
+            else:
+                templates[-1] -= 1
+
+        if c == "/" and i + 1 < n:
+            nxt = source[i + 1]
+            if nxt == "/":
+                end = source.find("\n", i)
+                i = n if end < 0 else end
+                continue
+            if nxt == "*":
+                end = source.find("*/", i + 2)
+                i = n if end < 0 else end + 2
+                continue
+            previous = tail()
+            word = _JS_LAST_WORD.search(previous)
+            if not previous or previous[-1] in _JS_REGEX_AFTER or (word and word.group() in _JS_REGEX_KEYWORDS):
+                j, in_class = i + 1, False
+                while j < n and source[j] != "\n":
+                    if source[j] == "\\":
+                        j += 2
+                        continue
+                    if source[j] == "[":
+                        in_class = True
+                    elif source[j] == "]":
+                        in_class = False
+                    elif source[j] == "/" and not in_class:
+                        break
+                    j += 1
+                j += 1
+                while j < n and (source[j].isalnum()):
+                    j += 1
+                out.append(source[i:j])
+                i = j
+                continue
+
+        if c.isspace():
+            j = i
+            while j < n and source[j].isspace():
+                j += 1
+            if "\n" in source[i:j]:
+                drop_space()
+                if out and last() != "\n":
+                    out.append("\n")
+            elif out and last() not in _JS_TIGHT and last() != "\n" and j < n and source[j] not in _JS_TIGHT:
+                out.append(" ")
+            i = j
+            continue
+
+        out.append(c)
+        i += 1
+
+    return "".join(out).strip() + "\n"
+
+
+def minify_css(source: str) -> str:
+    """Drop comments, collapse whitespace around punctuation, strings untouched"""
+    out: List[str] = []
+    i, n = 0, len(source)
+    while i < n:
+        c = source[i]
+        if c in "'\"":
+            j = i + 1
+            while j < n and source[j] != c:
+                j += 2 if source[j] == "\\" else 1
+            out.append(source[i:j + 1])
+            i = j + 1
+        elif c == "/" and source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            i = n if end < 0 else end + 2
+        elif c.isspace():
+            j = i
+            while j < n and source[j].isspace():
+                j += 1
+            previous = out[-1][-1] if out else ""
+            following = source[j] if j < n else ""
+            # A space before ":" can be a descendant combinator (".a :hover"), keep it
+            if previous and previous not in "{};,>:(" and following not in "{};,>)":
+                out.append(" ")
+            i = j
+        else:
+            if c == "}" and out and out[-1] == ";":
+                out.pop()
+            out.append(c)
+            i += 1
+    return "".join(out).strip()
+
+
+def split_css(source: str) -> Tuple[str, str]:
+    """(critical, deferred) CSS by section banner"""
+    parts = CSS_SECTION.split(source)
+    sections = [("BASE", parts[0])] + list(zip(parts[1::2], parts[2::2]))
+    critical = [body for name, body in sections if name not in DEFERRED_CSS_SECTIONS]
+    deferred = [body for name, body in sections if name in DEFERRED_CSS_SECTIONS]
+    deferred += [body for name, body in sections if name in TRAILING_CSS_SECTIONS]
+    return "".join(critical), "".join(deferred)
+
+
+# ==================== BUNDLE ====================
+
+class AssetFile(PreparedResponse):
+    """A hashed asset, compressed variants built on first demand"""
+
+    def __init__(self, name: str, body: bytes, mimetype: str):
+        super().__init__(None, body=body, mimetype=mimetype, cache_control=IMMUTABLE)
+        stem, ext = os.path.splitext(name)
+        self.name = name
+        self.hashed_name = f"{stem}.{self.etag[:10]}{ext}"
+
+
+class AssetBundle:
+    """Everything one build produced: the critical CSS and the hashed files"""
+
+    def __init__(self, static_dir: str = STATIC_DIR):
+        self.static_dir = static_dir
+        self.files: Dict[str, AssetFile] = {}
+        self.by_hashed: Dict[str, AssetFile] = {}
+        self.sources = [CSS_SOURCE] + list(JS_BUNDLE)
+        self.mtime = self._mtime()
+
+        critical, deferred = split_css(self._read(CSS_SOURCE))
+        self.critical_css = minify_css(critical)
+        self._add("dashboard.css", minify_css(deferred), "text/css")
+
+        scripts = [minify_js(self._read(path)) for path in JS_BUNDLE]
+        # ";" keeps one file's last expression from running into the next
+        self._add("dashboard.js", ";\n".join(scripts), "application/javascript")
+
+    def _read(self, path: str) -> str:
+        with open(os.path.join(self.static_dir, path), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def _mtime(self) -> float:
+        return max(os.path.getmtime(os.path.join(self.static_dir, path)) for path in self.sources)
+
+    def _add(self, name: str, text: str, mimetype: str) -> None:
+        asset = AssetFile(name, text.encode("utf-8"), mimetype)
+        self.files[name] = asset
+        self.by_hashed[asset.hashed_name] = asset
+
+    def url(self, name: str) -> str:
+        """Hashed URL for a bundle name (template helper)"""
+        return URL_PREFIX + self.files[name].hashed_name
+
+    def manifest(self) -> Dict[str, str]:
+        return {name: asset.hashed_name for name, asset in self.files.items()}
+
+    def stale(self) -> bool:
+        return self._mtime() != self.mtime
+
+
+class Assets:
+    """The process-wide bundle, built on first use"""
+
+    def __init__(self):
+        self._bundle: Optional[AssetBundle] = None
+        self._lock = threading.Lock()
+
+    def bundle(self, reload: bool = False) -> AssetBundle:
+        """The current bundle; with reload, rebuilt when a source changed (debug)"""
+        bundle = self._bundle
+        if bundle is None or (reload and bundle.stale()):
+            with self._lock:
+                if self._bundle is None or (reload and self._bundle.stale()):
+                    self._bundle = AssetBundle()
+                    logger.info(f"Built assets {self._bundle.manifest()}")
+                bundle = self._bundle
+        return bundle
+
+    def response(self, hashed_name: str, request) -> Optional[Response]:
+        asset = self.bundle().by_hashed.get(hashed_name)
+        return asset.to_response(request) if asset is not None else None
+
+
+assets = Assets()
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Build the front-end bundle")
+    parser.add_argument("--out", help="also write the hashed files to this directory")
+    args = parser.parse_args(argv)
+
+    bundle = AssetBundle()
+    sources = sum(os.path.getsize(os.path.join(bundle.static_dir, path)) for path in bundle.sources)
+    built = len(bundle.critical_css.encode("utf-8")) + sum(len(a.body) for a in bundle.files.values())
+    print(f"critical css (inline)  {len(bundle.critical_css.encode('utf-8')):>8} bytes")
+    for name, asset in bundle.files.items():
+        print(f"{asset.hashed_name:<22} {len(asset.body):>8} bytes  {len(asset.variant('gzip')):>7} gzip")
+    print(f"sources {sources} bytes -> {built} bytes")
+
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+        for asset in bundle.files.values():
+            with open(os.path.join(args.out, asset.hashed_name), "wb") as f:
+                f.write(asset.body)
+        print(f"written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
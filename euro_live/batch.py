@@ -0,0 +1,197 @@
+"""
+BATCH - Several GET /api/ resources in one round trip
+Each part is dispatched through the app exactly like a request of its own
+(same routes, caches, metrics and headers) on a small thread pool, so the
+slowest part sets the latency instead of the sum of all parts. Parts come
+back side by side with their status and the headers that matter to clients:
+
+    POST /api/batch  {"parts": ["/api/livescores?limit=10",
+                                {"id": "table", "path": "/api/standings/2", "etag": "..."}]}
+    GET  /api/batch?part=/api/livescores&part=/api/gemini/status
+
+    {"parts": [{"id": ..., "status": 200, "headers": {...}, "body": ...}, ...]}
+
+A part given the ETag it was last served with comes back as a bodyless 304.
+
+A part answered 200 with a public max-age is kept in the response cache
+until that runs out, so the next batch serves it without dispatching it
+again (only the batch itself then shows in the request metrics).
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Any, Tuple
+from urllib.parse import urlsplit
+import logging
+
+from flask import Flask, request
+from werkzeug.test import EnvironBuilder
+
+from .response_cache import PreparedResponse, dumps, responses
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_PARTS = int(os.getenv("BATCH_MAX_PARTS", 20))
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", 8))
+# Parts still running after this are answered with a 504 of their own
+BATCH_TIMEOUT_SECONDS = float(os.getenv("BATCH_TIMEOUT", 10))
+
+# Response headers repeated in each part
+PART_HEADERS = ("ETag", "Cache-Control", "X-Data-Age", "X-Data-Stale", "Link", "X-Next-Cursor", "X-Total-Count")
+# Request headers passed on to every part
+FORWARDED_HEADERS = ("X-Trace", "Accept-Language")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="batch")
+    return _executor
+
+
+def parse_parts(parts: Any) -> List[Dict]:
+    """Validated part descriptors, ValueError on anything the batch refuses"""
+    if not isinstance(parts, list) or not parts:
+        raise ValueError("parts must be a non-empty list")
+    if len(parts) > MAX_BATCH_PARTS:
+        raise ValueError(f"at most {MAX_BATCH_PARTS} parts per batch")
+
+    parsed = []
+    for part in parts:
+        if isinstance(part, str):
+            part = {"path": part}
+        if not isinstance(part, dict) or not isinstance(part.get("path"), str):
+            raise ValueError("each part is a path or an object with a path")
+        path = part["path"]
+        route = urlsplit(path).path
+        if not route.startswith("/api/") or route.rstrip("/") == "/api/batch":
+            raise ValueError(f"not a batchable resource: {path}")
+        parsed.append({"id": str(part.get("id", path)), "path": path, "etag": part.get("etag")})
+    return parsed
+
+
+def _quote_etag(etag: str) -> str:
+    return etag if etag.startswith(('"', 'W/')) else f'"{etag}"'
+
+
+def _part_key(path: str, headers: Dict[str, str]) -> tuple:
+    return ("batch_part", path, tuple(sorted(headers.items())))
+
+
+def _cached_part(path: str, etag: Optional[str], headers: Dict[str, str]) -> Optional[Tuple[int, Dict, bytes]]:
+    """A part an earlier batch fetched, while its max-age lasts: (status, headers, JSON body)"""
+    entry = responses.peek(_part_key(path, headers))
+    if entry is None:
+        return None
+    part_headers = dict(entry.headers, **{"Cache-Control": f"public, max-age={entry.remaining()}"})
+    if entry.data_age is not None:
+        part_headers["X-Data-Age"] = str(int(entry.data_age + time.time() - entry.created))
+    if etag and _quote_etag(etag) == part_headers.get("ETag"):
+        return 304, part_headers, b"null"
+    return 200, part_headers, entry.body
+
+
+def _keep_part(path: str, headers: Dict[str, str], status: int, part_headers: Dict, body: bytes) -> None:
+    cache_control = part_headers.get("Cache-Control", "")
+    if status != 200 or not cache_control.startswith("public, max-age="):
+        return
+    max_age = int(cache_control.rsplit("=", 1)[1])
+    if max_age > 0:
+        age = part_headers.get("X-Data-Age")
+        responses.put(_part_key(path, headers), PreparedResponse(
+            None, body=body, max_age=max_age, headers=part_headers,
+            data_age=float(age) if age is not None else None, stale="X-Data-Stale" in part_headers))
+
+
+def _dispatch(app: Flask, path: str, etag: Optional[str], headers: Dict[str, str]) -> Tuple[int, Dict, bytes]:
+    """One part through the normal request pipeline: (status, headers, JSON body)"""
+    headers = dict(headers)
+    if etag:
+        headers["If-None-Match"] = _quote_etag(etag)
+    builder = EnvironBuilder(path=path, method="GET", headers=headers)
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+
+    with app.request_context(environ):
+        # Unknown paths and POST-only routes, answered without the HTML error pages
+        error = request.routing_exception
+        if error is not None:
+            return getattr(error, "code", 404), {}, dumps({"error": f"{error.name}: {path}"})
+        try:
+            response = app.full_dispatch_request()
+        except Exception as e:
+            logger.error(f"Batch part {path} failed: {e}")
+            return 500, {}, dumps({"error": "Internal error"})
+        try:
+            if response.is_streamed:
+                return 400, {}, dumps({"error": "streaming resources cannot be batched"})
+            part_headers = {name: response.headers[name] for name in PART_HEADERS if name in response.headers}
+            if response.status_code == 304:
+                return 304, part_headers, b"null"
+            data = response.get_data()
+            if response.mimetype != "application/json":
+                data = dumps(data.decode("utf-8", "replace"))
+            return response.status_code, part_headers, data or b"null"
+        finally:
+            response.close()
+
+
+def resolve(app: Flask, parts: Any, headers: Dict[str, str] = None, cacheable: bool = False) -> PreparedResponse:
+    """
+    Every part of a batch, resolved concurrently. Identical paths in one
+    batch are dispatched once. With `cacheable` (a GET batch) the combined
+    response may be cached as long as its shortest-lived part.
+    """
+    parsed = parse_parts(parts)
+    forwarded = {name: value for name, value in (headers or {}).items() if name in FORWARDED_HEADERS}
+
+    # A forced trace wants every part through the real pipeline
+    reuse = "X-Trace" not in forwarded
+    results = {}
+    futures = {}
+    for part in parsed:
+        key = (part["path"], part["etag"])
+        if key in results or key in futures:
+            continue
+        cached = _cached_part(part["path"], part["etag"], forwarded) if reuse else None
+        if cached is not None:
+            results[key] = cached
+        else:
+            futures[key] = _pool().submit(_dispatch, app, part["path"], part["etag"], forwarded)
+    if futures:
+        wait(futures.values(), timeout=BATCH_TIMEOUT_SECONDS)
+    for (path, etag), future in futures.items():
+        if future.done():
+            results[(path, etag)] = result = future.result()
+            if reuse:
+                _keep_part(path, forwarded, *result)
+        else:
+            results[(path, etag)] = 504, {}, dumps({"error": "timed out"})
+
+    encoded = []
+    max_ages = []
+    for part in parsed:
+        status, part_headers, body = results[(part["path"], part["etag"])]
+        encoded.append(dumps({"id": part["id"], "status": status, "headers": part_headers})[:-1]
+                       + b',"body":' + body + b"}")
+        cache_control = part_headers.get("Cache-Control", "")
+        if status in (200, 304) and cache_control.startswith("public, max-age="):
+            max_ages.append(int(cache_control.rsplit("=", 1)[1]))
+        else:
+            max_ages.append(None)
+
+    body = b'{"parts":[' + b",".join(encoded) + b"]}"
+    if cacheable and None not in max_ages:
+        cache_control = f"public, max-age={min(max_ages)}"
+    else:
+        cache_control = "no-store"
+    return PreparedResponse(None, body=body, cache_control=cache_control)
@@ -0,0 +1,127 @@
+"""
+CIRCUIT BREAKER - Stop hammering an upstream that keeps failing
+    closed      calls go through, consecutive failures are counted
+    open        calls fail at once with CircuitOpen until the cooldown ends
+    half-open   one trial call: success closes the circuit, failure re-opens
+                it with a doubled cooldown (up to BREAKER_MAX_COOLDOWN)
+Callers already handle upstream outages, so an open circuit looks like one
+and the cache keeps serving the last good answer.
+"""
+
+import os
+import threading
+import time
+from typing import Dict
+import logging
+
+import requests
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURES", 5))
+COOLDOWN_SECONDS = float(os.getenv("BREAKER_COOLDOWN", 30))
+MAX_COOLDOWN_SECONDS = float(os.getenv("BREAKER_MAX_COOLDOWN", 300))
+
+
+class CircuitOpen(requests.exceptions.ConnectionError):
+    """The upstream is short-circuited - handled like an outage"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker for one upstream service"""
+
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD,
+                 cooldown: float = COOLDOWN_SECONDS, max_cooldown: float = MAX_COOLDOWN_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> None:
+        """Raises CircuitOpen unless this call may go upstream"""
+        if self.state == CLOSED:
+            return
+        with self._lock:
+            if self.state == OPEN and time.time() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._trial_running = False
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+            if self.state == CLOSED:
+                return
+            self.rejected += 1
+        retry_in = max(0, int(self.opened_at + self.cooldown - time.time()))
+        raise CircuitOpen(f"{self.name} circuit open, retry in {retry_in}s")
+
+    def record_success(self) -> None:
+        if self.state == CLOSED and self.failures == 0:
+            return
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info(f"{self.name} recovered, closing circuit")
+            self.state = CLOSED
+            self.failures = 0
+            self.cooldown = self.base_cooldown
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                self._open()
+            elif self.state == CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self) -> None:
+        self.state = OPEN
+        self.opened_at = time.time()
+        self._trial_running = False
+        logger.error(f"{self.name} failing ({self.failures} in a row), "
+                     f"opening circuit for {self.cooldown:.0f}s")
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "cooldown": self.cooldown,
+            "rejected": self.rejected,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(service: str) -> CircuitBreaker:
+    """The process-wide breaker for an upstream service"""
+    breaker = _breakers.get(service)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(service, CircuitBreaker(service))
+    return breaker
+
+
+def breaker_stats() -> Dict[str, Dict]:
+    return {name: breaker.stats() for name, breaker in list(_breakers.items())}
+
+
+registry.gauge_callback("upstream_circuit_open", "1 while calls to the upstream are short-circuited",
+                        ("service",),
+                        lambda: {(name,): float(b.state != CLOSED) for name, b in list(_breakers.items())})
+registry.gauge_callback("upstream_circuit_rejected_total", "Calls refused by an open circuit", ("service",),
+                        lambda: {(name,): b.rejected for name, b in list(_breakers.items())}, kind="counter")
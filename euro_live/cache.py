@@ -0,0 +1,539 @@
+"""
+SHARED CACHE - Upstream answers shared by every worker and instance
+An in-process LRU sits in front of an optional shared tier, so one upstream
+call per refresh window serves the whole fleet instead of one per worker.
+
+    CACHE_BACKEND=local    in-process LRU only (default)
+    CACHE_BACKEND=sqlite   + one SQLite file shared by every worker on the host
+    CACHE_BACKEND=redis    + any Redis-protocol server at REDIS_URL, shared by the fleet
+
+Entries are served fresh for `ttl` seconds, then stale for CACHE_STALE_FACTOR
+x ttl while a single background refresh runs. A lease lock in the shared
+tier makes that refresh (and every cold fill) single-flight across workers.
+When the upstream fails, the last good answer keeps being served, flagged
+stale, for up to CACHE_MAX_STALE_SECONDS. Cached values are shared objects -
+treat them as read-only.
+"""
+
+import fnmatch
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional, Any, Callable
+import logging
+
+from .replay import upstream
+from .response_cache import data_age, dumps
+
+try:
+    import orjson
+except ImportError:  # optional fast decoder
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SQLITE_PATH = os.path.join(tempfile.gettempdir(), "euro_live_cache.sqlite3")
+KEY_PREFIX = "euro_live:v1:"
+
+LOCAL_ENTRIES = int(os.getenv("CACHE_LOCAL_ENTRIES", 512))
+STALE_FACTOR = float(os.getenv("CACHE_STALE_FACTOR", 0.5))
+# Oldest answer still served (flagged stale) while the upstream is failing
+MAX_STALE_SECONDS = float(os.getenv("CACHE_MAX_STALE_SECONDS", 3600))
+# Longest a fill may hold the lock, matches the upstream connect + read budget
+LOCK_SECONDS = float(os.getenv("CACHE_LOCK_SECONDS", 15))
+# Waiters poll the shared tier, backing off from the first to the last interval
+WAIT_POLL_SECONDS = (0.005, 0.1)
+
+
+def _loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class Entry:
+    """A cached value and when it was fetched (wall clock, comparable across hosts)"""
+
+    __slots__ = ("value", "created")
+
+    def __init__(self, value: Any, created: float):
+        self.value = value
+        self.created = created
+
+    def encode(self) -> bytes:
+        return dumps({"t": self.created, "v": self.value})
+
+    @classmethod
+    def decode(cls, data: bytes) -> "Entry":
+        envelope = _loads(data)
+        return cls(envelope["v"], envelope["t"])
+
+
+# ==================== TIERS ====================
+
+class LRUTier:
+    """Bounded in-process tier, least recently used entries go first"""
+
+    def __init__(self, max_entries: int = LOCAL_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: Entry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteTier:
+    """Shared by every process on one host through a WAL-mode SQLite file"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("CACHE_SQLITE_PATH", DEFAULT_SQLITE_PATH)
+        self._lock = threading.Lock()
+        self._writes = 0
+        # Autocommit, lock acquisition opens its own IMMEDIATE transaction
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=5)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB, expires REAL);
+            CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, token TEXT, expires REAL);
+        """)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM entries WHERE key = ? AND expires > ?",
+                                    (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO entries (key, value, expires) VALUES (?, ?, ?)",
+                              (key, value, now + ttl))
+            self._writes += 1
+            if self._writes % 200 == 0:
+                self.conn.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+
+    def acquire(self, key: str, token: str, lease: float) -> bool:
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("DELETE FROM locks WHERE key = ? AND expires <= ?", (key, now))
+                cursor = self.conn.execute("INSERT OR IGNORE INTO locks (key, token, expires) VALUES (?, ?, ?)",
+                                           (key, token, now + lease))
+                self.conn.execute("COMMIT")
+            except sqlite3.Error:
+                self.conn.execute("ROLLBACK")
+                raise
+        return cursor.rowcount == 1
+
+    def release(self, key: str, token: str) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM locks WHERE key = ? AND token = ?", (key, token))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM entries")
+
+
+class RedisTier:
+    """Shared by the fleet through GET / SET PX NX / DEL on a Redis-protocol server"""
+
+    name = "redis"
+
+    def __init__(self, client, prefix: str = KEY_PREFIX):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisTier":
+        import redis  # optional, only needed for CACHE_BACKEND=redis
+        return cls(redis.Redis.from_url(url, socket_timeout=1.0, socket_connect_timeout=1.0))
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.client.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+
+    def acquire(self, key: str, token: str, lease: float) -> bool:
+        return bool(self.client.set(f"{self.prefix}lock:{key}", token, nx=True, px=int(lease * 1000)))
+
+    def release(self, key: str, token: str) -> None:
+        lock_key = f"{self.prefix}lock:{key}"
+        current = self.client.get(lock_key)
+        if current is not None and (current.decode() if isinstance(current, bytes) else current) == token:
+            self.client.delete(lock_key)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+    def clear(self) -> None:
+        for key in list(self.client.scan_iter(match=f"{self.prefix}*")):
+            self.client.delete(key)
+
+
+class LocalRedis:
+    """
+    In-process stand-in for the Redis commands RedisTier uses, for
+    benchmarks and local runs without a server.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, name: str) -> Optional[tuple]:
+        item = self._data.get(name)
+        if item is not None and item[1] is not None and item[1] <= time.time():
+            del self._data[name]
+            return None
+        return item
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._live(name)
+            return item[0] if item else None
+
+    def set(self, name: str, value: Any, px: int = None, nx: bool = False) -> bool:
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        with self._lock:
+            if nx and self._live(name) is not None:
+                return False
+            self._data[name] = (value, time.time() + px / 1000 if px else None)
+            return True
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    def scan_iter(self, match: str = "*"):
+        with self._lock:
+            names = [name for name in self._data if fnmatch.fnmatchcase(name, match)]
+        return iter(names)
+
+
+# ==================== TIERED CACHE ====================
+
+class TieredCache:
+    """
+    LRU in front of an optional shared tier, with stale-while-revalidate,
+    stale-if-error and single-flight fills
+    """
+
+    def __init__(self, shared=None, local: LRUTier = None, stale_factor: float = STALE_FACTOR,
+                 max_stale: float = MAX_STALE_SECONDS, lock_seconds: float = LOCK_SECONDS):
+        self.local = local or LRUTier()
+        self.shared = shared
+        self.stale_factor = stale_factor
+        self.max_stale = max_stale
+        self.lock_seconds = lock_seconds
+        self._fill_locks: Dict[str, list] = {}  # key -> [lock, callers holding or waiting]
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.stale_hits = 0
+        self.stale_if_error = 0
+        self.misses = 0
+        self.waits = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    @classmethod
+    def from_env(cls) -> "TieredCache":
+        backend = os.getenv("CACHE_BACKEND", "local").lower()
+        try:
+            if backend == "sqlite":
+                return cls(SQLiteTier())
+            if backend == "redis":
+                return cls(RedisTier.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0")))
+        except (ImportError, OSError, sqlite3.Error) as e:
+            logger.error(f"CACHE_BACKEND={backend} unavailable, using the in-process cache only: {e}")
+        return cls()
+
+    @property
+    def backend(self) -> str:
+        return self.shared.name if self.shared is not None else "local"
+
+    def get(self, key: str, ttl: float, build: Callable[[], Any], stale: float = None,
+            cache_if: Callable[[Any], bool] = None) -> Any:
+        """
+        Cached value for `key`, else build() once for the whole fleet.
+        Past `ttl` the last answer is served while one background refresh
+        runs; past ttl + stale it is refetched, and still served if that
+        fails. `cache_if` keeps error answers (a 200 with an error body)
+        out of the cache and counts them as failures.
+        """
+        ttl = upstream.scale(ttl)
+        stale = ttl * self.stale_factor if stale is None else upstream.scale(stale)
+        entry = self._lookup(key, ttl)
+        if entry is not None:
+            age = time.time() - entry.created
+            if age < ttl:
+                self.hits += 1
+                data_age.note(age)
+                return entry.value
+            if age < ttl + stale:
+                self.stale_hits += 1
+                data_age.note(age, stale=True)
+                self._revalidate_in_background(key, ttl, stale, build, cache_if)
+                return entry.value
+            if age >= self.max_stale:
+                entry = None
+        return self._fill(key, ttl, stale, build, cache_if, fallback=entry)
+
+    def peek(self, key: str, ttl: float) -> Optional[Any]:
+        """Fresh cached value or None - never builds, for callers with their own fill"""
+        ttl = upstream.scale(ttl)
+        entry = self._lookup(key, ttl)
+        if entry is not None and time.time() - entry.created < ttl:
+            self.hits += 1
+            return entry.value
+        self.misses += 1
+        return None
+
+    def put(self, key: str, value: Any, ttl: float) -> None:
+        """Store a value built outside get() (a call that finished in the background)"""
+        ttl = upstream.scale(ttl)
+        self._store(key, value, ttl, ttl * self.stale_factor)
+
+    def _lookup(self, key: str, ttl: float) -> Optional[Entry]:
+        entry = self.local.get(key)
+        if entry is not None and time.time() - entry.created < ttl:
+            return entry
+        # Not fresh here - another worker may already have refreshed it
+        shared = self._read_shared(key)
+        if shared is not None and (entry is None or shared.created > entry.created):
+            self.local.set(key, shared)
+            if time.time() - shared.created < ttl:
+                self.shared_hits += 1
+            return shared
+        return entry
+
+    def _read_shared(self, key: str) -> Optional[Entry]:
+        if self.shared is None:
+            return None
+        try:
+            data = self.shared.get(key)
+            return Entry.decode(data) if data is not None else None
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Shared cache read failed: {e}")
+            return None
+
+    def _store(self, key: str, value: Any, ttl: float, stale: float) -> None:
+        entry = Entry(value, time.time())
+        self.local.set(key, entry)
+        if self.shared is not None:
+            try:
+                # Kept past its stale window as the outage fallback
+                self.shared.set(key, entry.encode(), max(ttl + stale, self.max_stale))
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Shared cache write failed: {e}")
+
+    def _acquire(self, key: str, token: str) -> bool:
+        if self.shared is None:
+            return True
+        try:
+            return self.shared.acquire(key, token, self.lock_seconds)
+        except Exception as e:
+            # A broken shared tier must not stop this worker from serving
+            self.errors += 1
+            logger.error(f"Shared cache lock failed: {e}")
+            return True
+
+    def _release(self, key: str, token: str) -> None:
+        if self.shared is None:
+            return
+        try:
+            self.shared.release(key, token)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Shared cache unlock failed: {e}")
+
+    def claim(self, key: str, seconds: float) -> bool:
+        """
+        True for exactly one worker per key within `seconds` - for side
+        effects every worker would otherwise repeat (a push per detected
+        event). Without a shared tier this process is the only one.
+        """
+        if self.shared is None:
+            return True
+        try:
+            return self.shared.acquire(f"claim:{key}", uuid.uuid4().hex, seconds)
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Shared cache claim failed: {e}")
+            return True
+
+    def _serve_fallback(self, entry: Entry) -> Any:
+        self.stale_if_error += 1
+        data_age.note(time.time() - entry.created, stale=True)
+        return entry.value
+
+    def _fill(self, key: str, ttl: float, stale: float, build: Callable[[], Any],
+              cache_if: Callable[[Any], bool], fallback: Entry = None) -> Any:
+        with self._lock:
+            slot = self._fill_locks.get(key)
+            if slot is None:
+                slot = self._fill_locks[key] = [threading.Lock(), 0]
+            slot[1] += 1
+        try:
+            # One fill per key in this process ...
+            with slot[0]:
+                return self._fill_once(key, ttl, stale, build, cache_if, fallback)
+        finally:
+            # The lock only lives while someone fills or waits for this key
+            with self._lock:
+                slot[1] -= 1
+                if not slot[1]:
+                    del self._fill_locks[key]
+
+    def _fill_once(self, key: str, ttl: float, stale: float, build: Callable[[], Any],
+                   cache_if: Callable[[Any], bool], fallback: Entry = None) -> Any:
+        entry = self._lookup(key, ttl)
+        if entry is not None:
+            age = time.time() - entry.created
+            if age < ttl + stale:
+                self.hits += 1
+                data_age.note(age, stale=age >= ttl)
+                return entry.value
+
+        # ... and one across the fleet, the others wait for its result
+        token = uuid.uuid4().hex
+        owner = self._acquire(key, token)
+        if not owner and fallback is not None:
+            # Another worker is refetching, the last answer will do meanwhile
+            return self._serve_fallback(fallback)
+        if not owner:
+            self.waits += 1
+            deadline = time.time() + self.lock_seconds
+            poll, max_poll = WAIT_POLL_SECONDS
+            while time.time() < deadline:
+                time.sleep(poll)
+                poll = min(poll * 2, max_poll)
+                entry = self._read_shared(key)
+                if entry is not None:
+                    self.local.set(key, entry)
+                    data_age.note(time.time() - entry.created)
+                    return entry.value
+                owner = self._acquire(key, token)
+                if owner:
+                    break
+
+        self.misses += 1
+        try:
+            try:
+                value = build()
+            except Exception as e:
+                if fallback is None:
+                    raise
+                logger.error(f"Refreshing {key} failed, serving the last good answer: {e}")
+                return self._serve_fallback(fallback)
+            if cache_if is None or cache_if(value):
+                self._store(key, value, ttl, stale)
+                data_age.note(0.0)
+                return value
+            if fallback is not None:
+                return self._serve_fallback(fallback)
+            return value
+        finally:
+            if owner:
+                self._release(key, token)
+
+    def _revalidate_in_background(self, key: str, ttl: float, stale: float, build: Callable[[], Any],
+                                  cache_if: Callable[[Any], bool]) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            token = uuid.uuid4().hex
+            try:
+                # Another worker holding the lock is already refreshing it
+                if not self._acquire(key, token):
+                    return
+                try:
+                    self.refreshes += 1
+                    value = build()
+                    if cache_if is None or cache_if(value):
+                        self._store(key, value, ttl, stale)
+                finally:
+                    self._release(key, token)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Background refresh of {key} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="cache-refresh", daemon=True).start()
+
+    def invalidate(self, key: str = None) -> None:
+        if key is None:
+            self.local.clear()
+        else:
+            self.local.delete(key)
+        if self.shared is not None:
+            try:
+                if key is None:
+                    self.shared.clear()
+                else:
+                    self.shared.delete(key)
+            except Exception as e:
+                logger.error(f"Shared cache invalidation failed: {e}")
+
+    def stats(self) -> Dict:
+        total = self.hits + self.stale_hits + self.misses
+        return {
+            "backend": self.backend,
+            "entries": len(self.local),
+            "hits": self.hits + self.stale_hits,
+            "shared_hits": self.shared_hits,
+            "stale_hits": self.stale_hits,
+            "stale_if_error": self.stale_if_error,
+            "misses": self.misses,
+            "waits": self.waits,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "hit_ratio": round((self.hits + self.stale_hits) / total, 3) if total else 0.0,
+        }
+
+
+upstream_cache = TieredCache.from_env()
@@ -0,0 +1,16 @@
+"""
+COMPETITIONS - European competitions shown on the dashboard
+"""
+
+EUROPEAN_COMPETITIONS = {
+    2: {"name": "Premier League", "country": "England", "flag": "🏴󠁧󠁢󠁥󠁮󠁧󠁿"},
+    3: {"name": "LaLiga", "country": "Spain", "flag": "🇪🇸"},
+    1: {"name": "Bundesliga", "country": "Germany", "flag": "🇩🇪"},
+    4: {"name": "Serie A", "country": "Italy", "flag": "🇮🇹"},
+    5: {"name": "Ligue 1", "country": "France", "flag": "🇫🇷"},
+    75: {"name": "Scottish Premiership", "country": "Scotland", "flag": "🏴󠁧󠁢󠁳󠁣󠁴󠁿"},
+    40: {"name": "Danish Superliga", "country": "Denmark", "flag": "🇩🇰"},
+    244: {"name": "UEFA Champions League", "country": "Europe", "flag": "🇪🇺"},
+    245: {"name": "UEFA Europa League", "country": "Europe", "flag": "🇪🇺"},
+    446: {"name": "UEFA Conference League", "country": "Europe", "flag": "🇪🇺"},
+}
@@ -0,0 +1,205 @@
+"""
+DEADLINE - Latency budgets and hedged requests for slow upstream calls
+Every call gets a budget. If the first attempt is still running at the
+hedge point (a percentile of recent latencies), one more identical attempt
+is started and the first answer wins. When the budget runs out the caller
+gets its local fallback at once; the attempts keep running in the
+background and the first answer is cached for the next request.
+
+    calls = DeadlineExecutor("gemini", upstream_cache)
+    text, source = calls.run("summary", key, call, fallback)   # source: ai | cache | fallback
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Callable, Tuple
+import logging
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+AI_BUDGET_SECONDS = float(os.getenv("AI_BUDGET_MS", 2500)) / 1000
+# Hedge once the first attempt is slower than this share of recent calls
+AI_HEDGE_PERCENTILE = float(os.getenv("AI_HEDGE_PERCENTILE", 0.9))
+AI_HEDGE_MIN_SECONDS = float(os.getenv("AI_HEDGE_MIN_MS", 300)) / 1000
+AI_CACHE_TTL = int(os.getenv("AI_CACHE_TTL", 3600))
+# Attempts outlive the caller's budget (their answer is cached), but not by more than this factor
+AI_ATTEMPT_TIMEOUT_FACTOR = float(os.getenv("AI_ATTEMPT_TIMEOUT_FACTOR", 4))
+AI_WORKERS = int(os.getenv("AI_WORKERS", 8))
+
+# Latencies needed before the percentile is trusted (until then: half the budget)
+MIN_SAMPLES = 20
+
+ai_calls = registry.counter("ai_calls_total", "Budgeted calls by operation and outcome", ("operation", "outcome"))
+ai_hedges = registry.counter("ai_hedged_attempts_total", "Extra attempts started at the hedge point",
+                             ("operation",))
+
+
+class LatencyWindow:
+    """Durations of the most recent successful attempts"""
+
+    def __init__(self, size: int = 200):
+        self.samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        with self._lock:
+            if len(self.samples) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(int(p * len(ordered)), len(ordered) - 1)]
+
+
+class Flight:
+    """One logical call: up to two attempts, the first success wins"""
+
+    def __init__(self, key: str, call: Callable[[], Any]):
+        self.key = key
+        self.call = call
+        self.started = time.monotonic()
+        self.attempts = 0
+        self.failures = 0
+        self.value: Any = None
+        self.ok = False
+        self.hedge_won = False
+        self.cached = False
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_cache(cls, key: str, value: Any) -> "Flight":
+        flight = cls(key, None)
+        flight.value, flight.ok, flight.cached = value, True, True
+        flight.done.set()
+        return flight
+
+
+class DeadlineExecutor:
+    def __init__(self, name: str, cache, budget: float = AI_BUDGET_SECONDS,
+                 hedge_percentile: float = AI_HEDGE_PERCENTILE, hedge_min: float = AI_HEDGE_MIN_SECONDS,
+                 cache_ttl: int = AI_CACHE_TTL, workers: int = AI_WORKERS):
+        self.name = name
+        self.cache = cache
+        self.budget = budget
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min = hedge_min
+        self.cache_ttl = cache_ttl
+        self.latency = LatencyWindow()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-call")
+        # Calls still running, joined by identical requests instead of started again
+        self._flights: Dict[str, Flight] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def attempt_timeout(self) -> float:
+        """Request timeout for one attempt, so abandoned attempts don't hold a worker forever"""
+        return self.budget * AI_ATTEMPT_TIMEOUT_FACTOR
+
+    def hedge_delay(self) -> float:
+        observed = self.latency.percentile(self.hedge_percentile)
+        return max(observed if observed is not None else self.budget / 2, self.hedge_min)
+
+    # ==================== CALLS ====================
+
+    def run(self, operation: str, key: str, call: Callable[[], Any], fallback: Callable[[], Any],
+            budget: float = None) -> Tuple[Any, str]:
+        """(value, source) within the budget: the call's answer, a cached one, or fallback()"""
+        flight = self.start(operation, key, call)
+        budget = budget if budget is not None else self.budget
+        return self.finish(operation, flight, fallback, time.monotonic() + budget)
+
+    def run_many(self, operation: str, calls: List[Tuple[str, Callable[[], Any], Callable[[], Any]]],
+                 budget: float = None) -> List[Tuple[Any, str]]:
+        """Several (key, call, fallback) at once, all under one shared budget"""
+        deadline = time.monotonic() + (budget if budget is not None else self.budget)
+        flights = [(self.start(operation, key, call), fallback) for key, call, fallback in calls]
+        return [self.finish(operation, flight, fallback, deadline) for flight, fallback in flights]
+
+    def start(self, operation: str, key: str, call: Callable[[], Any]) -> Flight:
+        """The flight answering `key`: already answered from the cache, joined if running, or new"""
+        cached = self.cache.peek(key, self.cache_ttl)
+        if cached is not None:
+            return Flight.from_cache(key, cached)
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = Flight(key, call)
+                self._launch(flight)
+        return flight
+
+    def finish(self, operation: str, flight: Flight, fallback: Callable[[], Any],
+               deadline: float) -> Tuple[Any, str]:
+        if flight.cached:
+            ai_calls.inc(operation, "cache")
+            return flight.value, "cache"
+        hedge_at = flight.started + self.hedge_delay()
+        if not flight.done.wait(max(0.0, min(hedge_at, deadline) - time.monotonic())):
+            if time.monotonic() < deadline:
+                with flight._lock:
+                    hedge = flight.attempts == 1 and not flight.done.is_set()
+                    if hedge:
+                        self._launch(flight)
+                if hedge:
+                    ai_hedges.inc(operation)
+                flight.done.wait(max(0.0, deadline - time.monotonic()))
+
+        if flight.ok:
+            ai_calls.inc(operation, "hedge" if flight.hedge_won else "ai")
+            return flight.value, "ai"
+        # Out of budget (the answer lands in the cache later) or every attempt failed
+        ai_calls.inc(operation, "error" if flight.done.is_set() else "deadline")
+        return fallback(), "fallback"
+
+    def _launch(self, flight: Flight) -> None:
+        flight.attempts += 1
+        self._pool.submit(self._attempt, flight, flight.attempts > 1)
+
+    def _attempt(self, flight: Flight, hedge: bool) -> None:
+        started = time.monotonic()
+        try:
+            value = flight.call()
+        except Exception as e:
+            logger.error(f"{self.name} call failed: {e}")
+            with flight._lock:
+                flight.failures += 1
+                failed = flight.failures == flight.attempts and not flight.done.is_set()
+                if failed:
+                    flight.done.set()
+            if failed:
+                self._land(flight)
+            return
+
+        self.latency.observe(time.monotonic() - started)
+        with flight._lock:
+            if flight.done.is_set():
+                return
+            flight.value = value
+            flight.ok = True
+            flight.hedge_won = hedge
+            flight.done.set()
+        self.cache.put(flight.key, value, self.cache_ttl)
+        self._land(flight)
+
+    def _land(self, flight: Flight) -> None:
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+
+    def stats(self) -> Dict:
+        p50 = self.latency.percentile(0.5)
+        observed = self.latency.percentile(self.hedge_percentile)
+        return {
+            "budget_ms": round(self.budget * 1000),
+            "hedge_after_ms": round(self.hedge_delay() * 1000),
+            "latency_p50_ms": round(p50 * 1000) if p50 is not None else None,
+            f"latency_p{round(self.hedge_percentile * 100)}_ms": round(observed * 1000) if observed else None,
+            "in_flight": len(self._flights),
+        }
@@ -0,0 +1,328 @@
+"""
+EVENT PIPELINE - Server-side match event detection and WhatsApp message queue
+Diffs successive live snapshots into typed events, merges them per match
+and publishes the formatted messages once for every connected client
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Any
+import logging
+
+from .message_templates import DEFAULT_LANGUAGE, LABELS, engine, match_context
+
+logger = logging.getLogger(__name__)
+
+# ==================== EVENT TYPES ====================
+
+GOAL = "goal"
+RED_CARD = "red_card"
+YELLOW_CARD = "yellow_card"
+HALF_TIME = "halftime"
+FULL_TIME = "fulltime"
+KICK_OFF = "kickoff"
+
+# Higher = more important (same scale as the old browser queue)
+EVENT_PRIORITIES = {
+    GOAL: 10,
+    RED_CARD: 9,
+    FULL_TIME: 8,
+    HALF_TIME: 7,
+    YELLOW_CARD: 6,
+    KICK_OFF: 4,
+}
+
+HALF_TIME_STATUSES = {"HT", "HALF TIME BREAK", "HALF_TIME"}
+FULL_TIME_STATUSES = {"FT", "FINISHED", "FULL_TIME", "AET", "AP"}
+
+FEED_EVENT_TYPES = {
+    "YELLOW_CARD": YELLOW_CARD,
+    "RED_CARD": RED_CARD,
+    "YELLOW_RED_CARD": RED_CARD,
+}
+
+
+def _score(match: Dict) -> tuple:
+    return int(match.get("home_score", 0) or 0), int(match.get("away_score", 0) or 0)
+
+
+def _match_ref(match: Dict) -> Dict:
+    """Compact copy of the match fields a message needs"""
+    home_score, away_score = _score(match)
+    return {
+        "id": match.get("id", match.get("fixture_id")),
+        "home_name": match.get("home_name", "Home"),
+        "away_name": match.get("away_name", "Away"),
+        "home_score": home_score,
+        "away_score": away_score,
+        "minute": match.get("minute", "0"),
+        "status": match.get("status", ""),
+        "competition_name": match.get("competition_name", ""),
+        # Who to notify (push subscriptions are indexed by these)
+        "competition_id": match.get("competition_id"),
+        "home_id": match.get("home_id"),
+        "away_id": match.get("away_id"),
+    }
+
+
+class EventDetector:
+    """Turns two consecutive live snapshots into typed events"""
+
+    def __init__(self):
+        self.matches: Dict[Any, Dict] = {}
+        self.seen_feed_events: Dict[Any, set] = {}
+        self.has_baseline = False
+
+    def diff(self, snapshot: List[Dict], now: float = None) -> List[Dict]:
+        now = now if now is not None else time.time()
+        events = []
+        current_ids = set()
+
+        for match in snapshot:
+            if not isinstance(match, dict):
+                continue
+            match_id = match.get("id", match.get("fixture_id"))
+            if match_id is None:
+                continue
+            current_ids.add(match_id)
+            previous = self.matches.get(match_id)
+            ref = _match_ref(match)
+
+            if previous is None:
+                if self.has_baseline and ref["minute"] not in ("0", "NS", ""):
+                    events.append(self._event(KICK_OFF, ref, now))
+            else:
+                events.extend(self._diff_match(previous, ref, now))
+
+            events.extend(self._diff_feed(match_id, match.get("events"), ref, now))
+            self.matches[match_id] = ref
+
+        # Matches that dropped out of the live feed have finished
+        for match_id in list(self.matches):
+            if match_id not in current_ids:
+                ref = self.matches.pop(match_id)
+                self.seen_feed_events.pop(match_id, None)
+                if ref["status"].upper() not in FULL_TIME_STATUSES:
+                    ref = dict(ref, minute="FT", status="FT")
+                    events.append(self._event(FULL_TIME, ref, now))
+
+        self.has_baseline = True
+        return events
+
+    def _diff_match(self, previous: Dict, ref: Dict, now: float) -> List[Dict]:
+        events = []
+        old_home, old_away = previous["home_score"], previous["away_score"]
+        new_home, new_away = ref["home_score"], ref["away_score"]
+
+        for _ in range(max(new_home - old_home, 0)):
+            events.append(self._event(GOAL, ref, now, team="home"))
+        for _ in range(max(new_away - old_away, 0)):
+            events.append(self._event(GOAL, ref, now, team="away"))
+
+        old_status = previous["status"].upper()
+        new_status = ref["status"].upper()
+        if new_status in HALF_TIME_STATUSES and old_status not in HALF_TIME_STATUSES:
+            events.append(self._event(HALF_TIME, ref, now))
+        if new_status in FULL_TIME_STATUSES and old_status not in FULL_TIME_STATUSES:
+            events.append(self._event(FULL_TIME, ref, now))
+        return events
+
+    def _diff_feed(self, match_id: Any, feed: Optional[List[Dict]], ref: Dict, now: float) -> List[Dict]:
+        """Cards only come from the per-match events feed, when it is attached"""
+        if not isinstance(feed, list):
+            return []
+        # The first feed seen for a match (even an empty one) is history, not news
+        first_look = match_id not in self.seen_feed_events
+        seen = self.seen_feed_events.setdefault(match_id, set())
+        events = []
+        for item in feed:
+            if not isinstance(item, dict):
+                continue
+            key = item.get("id") or (item.get("event"), item.get("time"), str(item.get("player")))
+            if key in seen:
+                continue
+            seen.add(key)
+            event_type = FEED_EVENT_TYPES.get(item.get("event", ""))
+            if event_type and not first_look:
+                player = item.get("player", {})
+                events.append(self._event(
+                    event_type, ref, now,
+                    team="home" if item.get("is_home") else "away",
+                    player=player.get("name") if isinstance(player, dict) else player,
+                    minute=item.get("time"),
+                ))
+        return events
+
+    def _event(self, event_type: str, ref: Dict, now: float, **extra) -> Dict:
+        event = {
+            "type": event_type,
+            "priority": EVENT_PRIORITIES[event_type],
+            "match_id": ref["id"],
+            "match": ref,
+            "timestamp": now,
+        }
+        event.update({k: v for k, v in extra.items() if v is not None})
+        return event
+
+
+class EventQueue:
+    """
+    Pending events in arrival order. They are always drained all at once
+    and group_events orders them, so no ordering is kept here.
+    """
+
+    def __init__(self):
+        self._events: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def push(self, event: Dict) -> None:
+        with self._lock:
+            self._events.append(event)
+
+    def drain(self) -> List[Dict]:
+        """Take everything pending"""
+        with self._lock:
+            events, self._events = self._events, []
+        return events
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+def group_events(events: List[Dict], window: float = 30.0) -> List[List[Dict]]:
+    """
+    Merge events of the same match that fall within `window` seconds of the
+    first event of their group. One sort + one sweep, O(n log n).
+    Groups come back ordered by their highest priority.
+    """
+    ordered = sorted(events, key=lambda e: (str(e["match_id"]), e["timestamp"], -e["priority"]))
+    groups = []
+    current = []
+    for event in ordered:
+        if current and (event["match_id"] != current[0]["match_id"]
+                        or event["timestamp"] - current[0]["timestamp"] >= window):
+            groups.append(current)
+            current = []
+        current.append(event)
+    if current:
+        groups.append(current)
+
+    groups.sort(key=lambda g: -max(e["priority"] for e in g))
+    return groups
+
+
+def format_group_message(group: List[Dict], language: str = DEFAULT_LANGUAGE) -> str:
+    """WhatsApp message for a merged group of events from one match"""
+    match = max(group, key=lambda e: e["timestamp"])["match"]
+    types = {e["type"] for e in group}
+
+    # A lone status change gets its dedicated report, cached per match state
+    for event_type, template in ((FULL_TIME, "full_time"), (HALF_TIME, "half_time"), (KICK_OFF, "kickoff")):
+        if types == {event_type}:
+            return engine.render_match(template, match, language)
+
+    context = match_context(match)
+    labels = LABELS.get(language, LABELS[DEFAULT_LANGUAGE])
+    parts = [engine.render("live_header", context, language=language)]
+
+    for event_type, section, singular, plural in (
+        (GOAL, "section_goals", "goal", "goals"),
+        (RED_CARD, "section_red_cards", "red_card", "red_cards"),
+        (YELLOW_CARD, "section_yellow_cards", "yellow_card", "yellow_cards"),
+    ):
+        items = [e for e in group if e["type"] == event_type]
+        if not items:
+            continue
+        rows = []
+        for item in items:
+            player = item.get("player")
+            if not player and event_type == GOAL:
+                player = context["home_name"] if item.get("team") == "home" else context["away_name"]
+            rows.append({"minute": item.get("minute", match["minute"]), "player": player or "Unknown"})
+        title = labels[plural] if len(items) > 1 else labels[singular]
+        parts.append(engine.render(section, {"title": title}, rows, language=language))
+
+    if FULL_TIME in types:
+        parts.append(f"✅ *{labels['full_time']}*\n\n")
+    elif HALF_TIME in types:
+        parts.append(f"⏸️ *{labels['half_time']}*\n\n")
+
+    parts.append(engine.render("live_footer", context, language=language))
+    return "".join(parts)
+
+
+class EventBroker:
+    """Keeps the latest published messages and wakes waiting subscribers"""
+
+    def __init__(self, history: int = 200):
+        self.messages = deque(maxlen=history)
+        self.last_id = 0
+        self._condition = threading.Condition()
+
+    def publish(self, payload: Dict) -> Dict:
+        with self._condition:
+            self.last_id += 1
+            payload = dict(payload, id=self.last_id)
+            self.messages.append(payload)
+            self._condition.notify_all()
+        return payload
+
+    def since(self, cursor: int = 0) -> List[Dict]:
+        with self._condition:
+            return [m for m in self.messages if m["id"] > cursor]
+
+    def wait(self, cursor: int = 0, timeout: float = 25.0) -> List[Dict]:
+        """Block until something newer than `cursor` is published"""
+        with self._condition:
+            self._condition.wait_for(lambda: self.last_id > cursor, timeout=timeout)
+            return [m for m in self.messages if m["id"] > cursor]
+
+
+class EventPipeline:
+    """Snapshot -> detector -> queue -> grouped messages (by priority) -> broker"""
+
+    def __init__(self, merge_window: float = 30.0, history: int = 200):
+        self.detector = EventDetector()
+        self.queue = EventQueue()
+        self.broker = EventBroker(history)
+        self.merge_window = merge_window
+        self.empty_snapshot_tolerance = 3
+        self.last_ingest = 0.0
+        self._empty_streak = 0
+        self._lock = threading.Lock()
+
+    def ingest(self, snapshot: List[Dict], now: float = None) -> List[Dict]:
+        """Feed a processed live snapshot, returns the messages it produced"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            # A failed upstream call also yields [], don't read it as every match ending
+            if not snapshot and self.detector.matches:
+                self._empty_streak += 1
+                if self._empty_streak < self.empty_snapshot_tolerance:
+                    self.last_ingest = now
+                    return []
+            else:
+                self._empty_streak = 0
+            for event in self.detector.diff(snapshot, now):
+                self.queue.push(event)
+            self.last_ingest = now
+        return self.process()
+
+    def process(self) -> List[Dict]:
+        published = []
+        for group in group_events(self.queue.drain(), self.merge_window):
+            published.append(self.broker.publish({
+                "match_id": group[0]["match_id"],
+                "types": sorted({e["type"] for e in group}),
+                "priority": max(e["priority"] for e in group),
+                "message": format_group_message(group),
+                "match": max(group, key=lambda e: e["timestamp"])["match"],
+                "timestamp": max(e["timestamp"] for e in group),
+            }))
+        if published:
+            logger.info(f"Published {len(published)} event messages")
+        return published
+
+    def snapshot_age(self) -> float:
+        return time.time() - self.last_ingest if self.last_ingest else float("inf")
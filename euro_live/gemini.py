@@ -0,0 +1,320 @@
+"""
+GEMINI AI SERVICE - Google Gemini API Integration
+Fixed version using official Google Generative AI library
+Each call runs under a latency budget (deadline.py): past the budget the
+locally rendered message is returned and the model's answer is cached for
+the next request. Prompts are built from versioned templates with token
+budgets and every call's tokens are accounted (prompts.py).
+"""
+
+import hashlib
+import os
+import threading
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from .breaker import breaker_for
+from .cache import upstream_cache
+from .deadline import DeadlineExecutor
+from .message_templates import engine as templates
+from .prompts import Prompt, article_lines, build as build_prompt, estimate_tokens, ledger
+from .replay import upstream
+from .tracing import tracer
+from .translation_memory import Segment, TranslationMemory, parse_numbered
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gemini-3-flash-preview"  # Using model from official docs
+
+
+def _sdk():
+    """google.generativeai is the slowest import in the app, only load it for a real call"""
+    import google.generativeai as genai
+    return genai
+
+
+class GeminiService:
+    def __init__(self, api_key: str = None, model_name: str = None, memory: TranslationMemory = None):
+        self.api_key = api_key or os.getenv("GEMINI_API_KEY")
+        self.model_name = model_name or os.getenv("GEMINI_MODEL", DEFAULT_MODEL)
+        self.model = None
+        self.is_available_flag = False
+        self._model_lock = threading.Lock()
+        self.breaker = breaker_for("gemini")
+        self.calls = DeadlineExecutor("gemini", upstream_cache)
+        # Known message segments are translated locally, see translate_message
+        self.memory = memory
+        
+        if upstream.replaying:
+            # Recorded responses stand in for the model, no key needed
+            self.is_available_flag = True
+        elif self.api_key:
+            # The client is configured on the first call, see _get_model
+            self.is_available_flag = True
+    
+    def is_available(self) -> bool:
+        """Check if Gemini service is available"""
+        return self.is_available_flag
+    
+    def _get_model(self):
+        """Import and configure the SDK on the first model call, then reuse the model"""
+        if self.model is None:
+            with self._model_lock:
+                if self.model is None:
+                    try:
+                        genai = _sdk()
+                        # Configure the Gemini client
+                        genai.configure(api_key=self.api_key)
+                        self.model = genai.GenerativeModel(self.model_name)
+                        logger.info("✅ Gemini AI initialized successfully")
+                    except Exception as e:
+                        logger.error(f"❌ Gemini initialization failed: {e}")
+                        self.is_available_flag = False
+                        raise
+        return self.model
+    
+    def _generate(self, prompt: str, max_output_tokens: int = None) -> Dict:
+        """Single entry point for model calls (recordable/replayable): {"text", "usage"}"""
+        def fetch():
+            config = {"max_output_tokens": max_output_tokens} if max_output_tokens else None
+            response = self._get_model().generate_content(
+                prompt, generation_config=config, request_options={"timeout": self.calls.attempt_timeout})
+            usage = getattr(response, "usage_metadata", None)
+            return {
+                "text": response.text,
+                "usage": {
+                    "input": getattr(usage, "prompt_token_count", None),
+                    "output": getattr(usage, "candidates_token_count", None),
+                } if usage is not None else None,
+            }
+
+        # Callers fall back to the plain message, an open circuit just gets them there sooner
+        self.breaker.before_call()
+        try:
+            result = upstream.call("gemini", self.model_name, {"prompt": prompt}, fetch)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def _call(self, prompt: Prompt) -> str:
+        """One attempt; every attempt is counted, hedged ones too - they cost the same"""
+        result = self._generate(prompt.text, prompt.max_output_tokens)
+        text = result["text"].strip()
+        usage = result.get("usage") or {}
+        ledger.record(prompt, usage.get("output") or estimate_tokens(text), usage.get("input"),
+                      reported=usage.get("input") is not None)
+        return text
+
+    def _key(self, prompt: Prompt) -> str:
+        digest = hashlib.sha1(prompt.text.encode('utf-8')).hexdigest()
+        return f"gemini:{self.model_name}:{prompt.feature}:v{prompt.version}:{digest}"
+
+    def _complete(self, prompt: Prompt, fallback: Callable[[], Any], budget: float = None) -> str:
+        """Model answer within the budget, else fallback() while the answer is still cached later"""
+        with tracer.span("gemini", feature=prompt.feature, version=prompt.version,
+                         input_tokens=prompt.input_tokens) as span:
+            text, source = self.calls.run(prompt.feature, self._key(prompt), lambda: self._call(prompt),
+                                          fallback, budget)
+            span.set("source", source)
+            if source != "fallback":
+                span.set("output_tokens", estimate_tokens(text))
+        return text
+    
+    # ==================== MESSAGE ENHANCEMENT ====================
+    
+    def enhance_whatsapp_message(self, message: str, tone: str = "exciting", budget: float = None) -> Optional[str]:
+        """Enhance WhatsApp message with better formatting and emojis"""
+        if not self.is_available():
+            return message
+        
+        try:
+            prompt = build_prompt("enhance", message=message, tone=tone)
+            return self._complete(prompt, lambda: message, budget)
+            
+        except Exception as e:
+            logger.error(f"Gemini Enhancement Error: {e}")
+            return message
+
+    # ==================== TRANSLATION ====================
+    
+    def translate_message(self, message: str, target_language: str) -> Optional[str]:
+        """
+        Translate WhatsApp message to another language. Lines the translation
+        memory knows are translated locally, only novel ones go to the model.
+        """
+        segments = self.memory.split(message) if self.memory is not None else None
+        missing = self.memory.missing(target_language, segments) if segments is not None else None
+        if missing == []:
+            return self.memory.render(target_language, segments)
+        if not self.is_available():
+            return message
+        
+        try:
+            language_names = {
+                'es': 'Spanish',
+                'fr': 'French',
+                'de': 'German',
+                'it': 'Italian',
+                'pt': 'Portuguese',
+                'ar': 'Arabic',
+                'zh': 'Chinese',
+                'ja': 'Japanese',
+                'ru': 'Russian',
+                'nl': 'Dutch'
+            }
+            
+            lang_name = language_names.get(target_language, target_language)
+            
+            if segments is not None:
+                translated = self._translate_segments(message, segments, missing, target_language, lang_name)
+                if translated is not None:
+                    return translated
+            
+            prompt = build_prompt("translate", message=message, language=lang_name)
+            return self._complete(prompt, lambda: message)
+            
+        except Exception as e:
+            logger.error(f"Gemini Translation Error: {e}")
+            return message
+    
+    def _translate_segments(self, message: str, segments: List[Segment], missing: List[str],
+                            language: str, lang_name: str) -> Optional[str]:
+        """Novel segments through the model and into the memory; None if the answer didn't cover them"""
+        numbered = "\n".join(f"{i}. {pattern}" for i, pattern in enumerate(missing, 1))
+        prompt = build_prompt("translate_segments", language=lang_name, segments=numbered)
+        answer = self._complete(prompt, lambda: None)
+        if answer is None:
+            # Out of budget: untranslated now, the answer is cached for the next request
+            return message
+        self.memory.learn(language, parse_numbered(answer, missing))
+        return self.memory.render(language, segments)
+    
+    # ==================== MATCH SUMMARIES ====================
+    
+    def generate_match_summary(self, match_data: Dict, budget: float = None) -> Optional[str]:
+        """Generate exciting match summary for WhatsApp"""
+        if not self.is_available():
+            return "Match summary unavailable - AI not configured"
+        
+        try:
+            home = match_data.get('home_team', {})
+            away = match_data.get('away_team', {})
+            home_name = home.get('name', 'Home') if isinstance(home, dict) else 'Home'
+            away_name = away.get('name', 'Away') if isinstance(away, dict) else 'Away'
+            home_score = match_data.get('home_score', 0)
+            away_score = match_data.get('away_score', 0)
+            competition = match_data.get('competition_name', 'Match')
+            minute = match_data.get('minute', '0')
+            
+            # Last 5 goals and cards, one short line each
+            lines = []
+            for event in (match_data.get('events') or [])[-5:]:
+                if isinstance(event, dict):
+                    event_type = event.get('type', '')
+                    if 'GOAL' in event_type:
+                        mark = '⚽'
+                    elif 'CARD' in event_type:
+                        mark = '🟥' if 'RED' in event_type else '🟨'
+                    else:
+                        continue
+                    lines.append(f"{mark} {event.get('minute', '')}' {event.get('player', 'Unknown')}")
+            
+            prompt = build_prompt("match_summary", home=home_name, away=away_name, home_score=home_score,
+                                  away_score=away_score, competition=competition, minute=minute,
+                                  events="\n".join(lines))
+            
+            return self._complete(prompt, lambda: templates.render_match("match_summary", match_data), budget)
+            
+        except Exception as e:
+            logger.error(f"Gemini Match Summary Error: {e}")
+            return templates.render_match("match_summary", match_data)
+    
+    # ==================== NEWS SUMMARIES ====================
+    
+    def summarize_news(self, articles: List[Dict]) -> Optional[str]:
+        """Summarize football news articles into a digest"""
+        if not self.is_available():
+            return "News summary unavailable - AI not configured"
+        if not articles:
+            return "📰 *Football News* - Check back for updates"
+        
+        try:
+            prompt = build_prompt("news_summary", articles=article_lines(articles))
+            
+            return self._complete(prompt, lambda: self._news_digest(articles))
+            
+        except Exception as e:
+            logger.error(f"Gemini News Summary Error: {e}")
+            return "📰 *Football News* - Check back for updates"
+
+    def _news_digest(self, articles: List[Dict]) -> str:
+        """The plain headline digest, rendered locally"""
+        rows = [
+            {"index": i, "title": article.get('title', 'No title'), "source": article.get('source', 'Unknown')}
+            for i, article in enumerate(articles[:5], 1)
+        ]
+        return templates.render("news_digest", {}, rows)
+    
+    # ==================== BATCH ENHANCEMENT ====================
+    
+    def enhance_batch_messages(self, messages: List[str], tone: str = "exciting",
+                               budget: float = None) -> List[str]:
+        """Enhance multiple messages at once, concurrently and under one shared budget"""
+        if not self.is_available() or not messages:
+            return messages
+        
+        try:
+            calls = []
+            for message in messages:
+                prompt = build_prompt("enhance", message=message, tone=tone)
+                calls.append((self._key(prompt),
+                              lambda prompt=prompt: self._call(prompt),
+                              lambda message=message: message))
+            return [text for text, _ in self.calls.run_many("enhance", calls, budget)]
+            
+        except Exception as e:
+            logger.error(f"Gemini Batch Enhancement Error: {e}")
+            return messages
+    
+    # ==================== TEST CONNECTION ====================
+    
+    def test_connection(self, live: bool = False) -> Dict:
+        """
+        Configuration check; live=True also sends a test prompt.
+        /api/status is polled, so by default it must not spend model quota.
+        """
+        if not self.is_available():
+            return {
+                "status": "error",
+                "message": "Gemini API not configured",
+                "available": False
+            }
+        if not live:
+            return {
+                "status": "success",
+                "message": "Configured",
+                "available": True,
+                "model": self.model_name,
+                "calls": self.calls.stats(),
+                "tokens": ledger.stats(),
+                "translation_memory": self.memory.stats() if self.memory is not None else None
+            }
+        
+        try:
+            # Simple test prompt
+            text = self._call(Prompt("test", 1, "Say 'Football API connected' in 5 words", 20))
+            return {
+                "status": "success",
+                "message": text,
+                "available": True,
+                "model": self.model_name
+            }
+        except Exception as e:
+            logger.error(f"Gemini test failed: {e}")
+            return {
+                "status": "error",
+                "message": str(e),
+                "available": False
+            }
@@ -0,0 +1,170 @@
+"""
+LIVE SNAPSHOT - The unfiltered live feed, indexed once per refresh window
+Competition, team and state filters are answered from memory, so a
+competition tab or a followed-teams view costs no extra upstream call.
+Matches are kept in (competition, match id) order and paged by cursor.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Any, Callable, Iterable, Set
+
+from .competitions import EUROPEAN_COMPETITIONS
+from .pagination import Listing, field_paths
+from .replay import upstream
+from .response_cache import STALE_RETRY_SECONDS, data_age
+
+LIVE = "live"
+FINISHED = "finished"
+
+
+def format_match(match: Dict) -> Dict:
+    """API shape of one processed live match"""
+    comp_id = match.get('competition_id')
+    comp_info = EUROPEAN_COMPETITIONS.get(comp_id, {})
+
+    home_score = match.get('home_score', 0)
+    away_score = match.get('away_score', 0)
+    minute = match.get('minute', '0')
+
+    return {
+        "id": match.get('id', match.get('fixture_id')),
+        "competition_id": comp_id,
+        "competition_name": comp_info.get("name", match.get('competition_name', 'Live Match')),
+        "competition_flag": comp_info.get("flag", "⚽"),
+        "home_team": {"id": match.get('home_id'), "name": match.get('home_name', 'Home'), "score": home_score},
+        "away_team": {"id": match.get('away_id'), "name": match.get('away_name', 'Away'), "score": away_score},
+        "minute": minute,
+        "is_live": minute not in ['0', 'NS', 'FT'] and minute != '90',
+        "score_display": f"{home_score} - {away_score}"
+    }
+
+
+# Everything ?fields= can pick from a live match
+MATCH_FIELDS = field_paths(format_match({}))
+
+
+def match_order(view: Dict) -> tuple:
+    """Stable live order: competition, then match id"""
+    return (view["competition_id"] or 0, view["id"] or 0)
+
+
+class Snapshot(Listing):
+    """A listing built from one upstream answer, fresh for one refresh window"""
+
+    def __init__(self, items: List[Dict], key: Callable[[Dict], tuple], fields: Iterable[str] = (),
+                 created: float = None, data_age: float = None, stale: bool = False):
+        super().__init__(items, key, fields)
+        self.created = created if created is not None else time.time()
+        # Age of the upstream answer it was built from, and whether that was a stale fallback
+        self.data_age = data_age
+        self.stale = stale
+
+    def age(self) -> float:
+        return time.time() - self.created
+
+    def fresh(self, ttl: float) -> bool:
+        # Built from a stale fallback: try upstream again soon
+        return self.age() < (min(ttl, STALE_RETRY_SECONDS) if self.stale else ttl)
+
+
+class LiveSnapshot(Snapshot):
+    """Processed and formatted matches side by side, with positional indexes"""
+
+    def __init__(self, matches: List[Dict], created: float = None, data_age: float = None, stale: bool = False):
+        super().__init__([format_match(match) for match in matches], match_order, MATCH_FIELDS,
+                         created=created, data_age=data_age, stale=stale)
+        self.formatted = self.items
+        self.matches = [matches[i] for i in self.order]
+        self.by_id: Dict[Any, int] = {}
+        self.by_competition: Dict[Any, List[int]] = {}
+        self.by_team: Dict[Any, List[int]] = {}
+        self.by_state: Dict[str, List[int]] = {LIVE: [], FINISHED: []}
+
+        for position, view in enumerate(self.formatted):
+            if view["id"] is not None:
+                self.by_id[view["id"]] = position
+            self.by_competition.setdefault(view["competition_id"], []).append(position)
+            for side in ("home_team", "away_team"):
+                team_id = view[side]["id"]
+                if team_id is not None:
+                    self.by_team.setdefault(team_id, []).append(position)
+            self.by_state[LIVE if view["is_live"] else FINISHED].append(position)
+
+    def select(self, competitions: Iterable = None, teams: Iterable = None, state: str = None) -> List[int]:
+        """
+        Positions matching every given filter, in listing order. Within one
+        filter any listed value matches (competitions=2,3 is 2 or 3).
+        """
+        candidates: Optional[Set[int]] = None
+        for index, keys in ((self.by_competition, competitions), (self.by_team, teams),
+                            (self.by_state, (state,) if state else None)):
+            if not keys:
+                continue
+            positions = set()
+            for key in keys:
+                positions.update(index.get(key, ()))
+            candidates = positions if candidates is None else candidates & positions
+            if not candidates:
+                return []
+        if candidates is None:
+            return list(range(len(self.matches)))
+        return sorted(candidates)
+
+    def views(self, positions: Iterable[int]) -> List[Dict]:
+        return [self.formatted[p] for p in positions]
+
+    def processed(self, positions: Iterable[int]) -> List[Dict]:
+        return [self.matches[p] for p in positions]
+
+    def get(self, match_id: Any) -> Optional[Dict]:
+        position = self.by_id.get(match_id)
+        return self.formatted[position] if position is not None else None
+
+    def stats(self) -> Dict:
+        return {
+            "matches": len(self.matches),
+            "competitions": len(self.by_competition),
+            "teams": len(self.by_team),
+            "live": len(self.by_state[LIVE]),
+            "age": round(self.age(), 1),
+        }
+
+
+class SnapshotHolder:
+    """
+    The current snapshot, rebuilt once per window. While one caller rebuilds,
+    everyone else keeps reading the previous snapshot. The data age of what
+    is handed out counts towards the request's X-Data-Age.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[LiveSnapshot] = None
+        self._lock = threading.Lock()
+
+    def get(self, ttl: float, build: Callable[[], Snapshot]) -> Snapshot:
+        snapshot = self._current(upstream.scale(ttl), build)
+        if snapshot.data_age is not None:
+            data_age.note(snapshot.data_age + snapshot.age(), snapshot.stale)
+        return snapshot
+
+    def _current(self, ttl: float, build: Callable[[], Snapshot]) -> Snapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.fresh(ttl):
+            return snapshot
+        # Only the very first build makes callers wait
+        if not self._lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            snapshot = self._snapshot
+            if snapshot is None or not snapshot.fresh(ttl):
+                snapshot = self._snapshot = build()
+            return snapshot
+        finally:
+            self._lock.release()
+
+    def peek(self) -> Optional[Snapshot]:
+        return self._snapshot
+
+    def invalidate(self) -> None:
+        self._snapshot = None
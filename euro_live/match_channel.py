@@ -0,0 +1,357 @@
+"""
+MATCH CHANNEL - Per-client live deltas over WebSocket
+A client subscribes to match ids, competitions or teams and only hears
+about those: compact score/minute/status deltas from each live snapshot and
+new events from the match events feed. Subscriptions are indexed by match,
+competition and team, so an update is routed to the subscribers of that
+match instead of broadcast to everyone and filtered in the browser.
+
+    -> {"op": "subscribe", "matches": [500002], "competitions": [2], "teams": [19]}
+    <- {"t": "sub", "matches": [...], "competitions": [...], "teams": [...]}
+    <- {"t": "snap", "matches": [{"id":..., "comp":..., "home": [id, name], "away": [...],
+                                  "score": [1, 0], "minute": "23", "status": "IN PLAY"}]}
+    <- {"t": "d", "id": 500002, "score": [2, 0], "minute": "24"}     changed fields only
+    <- {"t": "e", "id": 500002, "events": [{"id":..., "type": "GOAL", "min": 24, ...}]}
+    <- {"t": "end", "id": 500002}
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Callable, Iterable, Set, Tuple
+import logging
+
+from .metrics import registry
+from .response_cache import dumps
+
+logger = logging.getLogger(__name__)
+
+# Outgoing messages a socket may fall behind before it is closed
+WS_CLIENT_QUEUE = int(os.getenv("WS_CLIENT_QUEUE", 64))
+# Matches, competitions and teams one socket may follow
+WS_MAX_SUBSCRIPTIONS = int(os.getenv("WS_MAX_SUBSCRIPTIONS", 50))
+# Followed matches whose events feed is polled per refresh window (most followed first)
+WS_EVENT_MATCHES = int(os.getenv("WS_EVENT_MATCHES", 30))
+
+TOPICS = ("matches", "competitions", "teams")
+
+ws_messages = registry.counter("ws_messages_total", "WebSocket messages queued, by type", ("type",))
+
+
+# ==================== MESSAGES ====================
+
+def match_state(match: Dict) -> Dict:
+    """Compact full state of one processed live match"""
+    return {
+        "id": match.get("id", match.get("fixture_id")),
+        "comp": match.get("competition_id"),
+        "home": [match.get("home_id"), match.get("home_name", "Home")],
+        "away": [match.get("away_id"), match.get("away_name", "Away")],
+        "score": [match.get("home_score", 0), match.get("away_score", 0)],
+        "minute": match.get("minute", "0"),
+        "status": match.get("status", ""),
+    }
+
+
+def state_delta(previous: Dict, state: Dict) -> Dict:
+    """Only what changed (score, minute, status), with the match id"""
+    delta = {"t": "d", "id": state["id"]}
+    for field in ("score", "minute", "status"):
+        if state[field] != previous.get(field):
+            delta[field] = state[field]
+    return delta
+
+
+def compact_event(event: Dict) -> Dict:
+    """One entry of the upstream events feed, as sent to subscribers"""
+    player = event.get("player")
+    compact = {
+        "id": event.get("id"),
+        "type": event.get("event", ""),
+        "min": event.get("time"),
+        "team": "home" if event.get("is_home") else "away",
+        "player": player.get("name") if isinstance(player, dict) else player,
+    }
+    info = event.get("info")
+    if isinstance(info, dict) and info.get("name"):
+        compact["other"] = info["name"]
+    return compact
+
+
+def _event_key(event: Dict) -> Any:
+    return event["id"] if event["id"] is not None else (event["type"], event["min"], event["player"])
+
+
+# ==================== SUBSCRIPTIONS ====================
+
+class SocketClient:
+    """One WebSocket: what it follows and the text frames waiting to be sent"""
+
+    def __init__(self, size: int = WS_CLIENT_QUEUE):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+        self.topics: Dict[str, Set[Any]] = {topic: set() for topic in TOPICS}
+        # Why the server closes this socket ("slow", "shutdown"), None while open
+        self.closed: Optional[str] = None
+
+    def offer(self, message: str) -> bool:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.closed = "slow"
+            return False
+        return True
+
+    def close(self, reason: str) -> None:
+        self.closed = reason
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+
+class SubscriptionIndex:
+    """match id / competition id / team id -> subscribed sockets"""
+
+    def __init__(self):
+        self.index: Dict[str, Dict[Any, Set[SocketClient]]] = {topic: {} for topic in TOPICS}
+        self.clients: Set[SocketClient] = set()
+
+    def subscribe(self, client: SocketClient, topics: Dict[str, Iterable[Any]]) -> None:
+        self.clients.add(client)
+        for topic, keys in topics.items():
+            for key in keys:
+                client.topics[topic].add(key)
+                self.index[topic].setdefault(key, set()).add(client)
+
+    def unsubscribe(self, client: SocketClient, topics: Dict[str, Iterable[Any]]) -> None:
+        for topic, keys in topics.items():
+            index = self.index[topic]
+            for key in keys:
+                client.topics[topic].discard(key)
+                subscribers = index.get(key)
+                if subscribers is not None:
+                    subscribers.discard(client)
+                    if not subscribers:
+                        del index[key]
+
+    def remove(self, client: SocketClient) -> None:
+        self.unsubscribe(client, {topic: list(keys) for topic, keys in client.topics.items()})
+        self.clients.discard(client)
+
+    def route(self, state: Dict) -> Set[SocketClient]:
+        """Every socket following this match, its competition or either team"""
+        recipients: Set[SocketClient] = set()
+        for topic, key in (("matches", state["id"]), ("competitions", state["comp"]),
+                           ("teams", state["home"][0]), ("teams", state["away"][0])):
+            subscribers = self.index[topic].get(key)
+            if subscribers:
+                recipients |= subscribers
+        return recipients
+
+    def followed(self, states: Iterable[Dict]) -> List[Tuple[int, Any]]:
+        """(subscriber count, match id) of live matches anyone follows, most followed first"""
+        counts = [(len(self.route(state)), state["id"]) for state in states]
+        return sorted((count for count in counts if count[0]), key=lambda count: -count[0])
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+
+def parse_topics(message: Any) -> Dict[str, List[Any]]:
+    """{"op": ..., "matches": [...], ...} -> topics, ValueError when malformed"""
+    topics = {}
+    for topic in TOPICS:
+        keys = message.get(topic) or []
+        if not isinstance(keys, list) or not all(isinstance(k, int) and not isinstance(k, bool) for k in keys):
+            raise ValueError(f"{topic} must be a list of ids")
+        topics[topic] = keys
+    return topics
+
+
+# ==================== CHANNEL ====================
+
+class MatchChannel:
+    """
+    Single producer for every socket in this process. While anyone is
+    subscribed it checks for a new live snapshot, routes the deltas and
+    polls the events feed of the followed live matches.
+    """
+
+    def __init__(self, snapshot: Callable[[], Any], match_events: Callable[[Any], Dict],
+                 check_seconds: float = 2.0):
+        self.snapshot = snapshot
+        self.match_events = match_events
+        self.check_seconds = check_seconds
+        self.index = SubscriptionIndex()
+        self.states: Dict[Any, Dict] = {}
+        self.feeds: Dict[Any, List[Dict]] = {}
+        self.routed = 0
+        self.dropped = 0
+        self._seen: Dict[Any, Set[Any]] = {}
+        self._last = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="match-channel")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for client in list(self.index.clients):
+            client.close("shutdown")
+        self._executor.shutdown(wait=False)
+
+    # Subscriptions
+    def connect(self) -> SocketClient:
+        self.start()
+        return SocketClient()
+
+    def disconnect(self, client: SocketClient) -> None:
+        self.index.remove(client)
+
+    def handle(self, client: SocketClient, message: Any) -> None:
+        """One message from the client; errors are answered on the socket"""
+        try:
+            if not isinstance(message, dict) or message.get("op") not in ("subscribe", "unsubscribe"):
+                raise ValueError('op must be "subscribe" or "unsubscribe"')
+            topics = parse_topics(message)
+            if message["op"] == "unsubscribe":
+                self.index.unsubscribe(client, topics)
+            else:
+                total = sum(len(client.topics[t] | set(topics[t])) for t in TOPICS)
+                if total > WS_MAX_SUBSCRIPTIONS:
+                    raise ValueError(f"At most {WS_MAX_SUBSCRIPTIONS} subscriptions per connection")
+                self.index.subscribe(client, topics)
+        except ValueError as e:
+            self._send(client, "error", {"t": "error", "error": str(e)})
+            return
+
+        self._send(client, "sub", {"t": "sub", **{t: sorted(client.topics[t]) for t in TOPICS}})
+        if message["op"] == "subscribe":
+            self._wakeup.set()
+            self._send_snapshot(client, topics)
+
+    def _send_snapshot(self, client: SocketClient, topics: Dict[str, List[Any]]) -> None:
+        """Current state (and known events) of the newly followed live matches"""
+        match_ids, competitions, teams = (set(topics[t]) for t in TOPICS)
+        matches = []
+        for state in self.states.values():
+            if (state["id"] in match_ids or state["comp"] in competitions
+                    or state["home"][0] in teams or state["away"][0] in teams):
+                feed = self.feeds.get(state["id"])
+                matches.append(dict(state, events=feed) if feed else state)
+        self._send(client, "snap", {"t": "snap", "matches": matches})
+
+    def _send(self, client: SocketClient, kind: str, payload: Dict) -> None:
+        self._deliver([client], kind, dumps(payload))
+
+    def _deliver(self, clients: Iterable[SocketClient], kind: str, message: bytes) -> None:
+        """One encoded message to each socket; a socket too far behind is closed"""
+        text = message.decode("utf-8")
+        count = 0
+        for client in clients:
+            if client.offer(text):
+                count += 1
+            else:
+                self.index.remove(client)
+                self.dropped += 1
+        self.routed += count
+        ws_messages.inc(kind, amount=count)
+
+    # Producer
+    def publish_snapshot(self, matches: List[Dict]) -> None:
+        """Route the changes since the previous snapshot to the sockets following them"""
+        current = {}
+        for match in matches:
+            state = match_state(match)
+            if state["id"] is None:
+                continue
+            current[state["id"]] = state
+            previous = self.states.get(state["id"])
+            if previous == state:
+                continue
+            recipients = self.index.route(state)
+            if recipients:
+                payload = dict(state, t="m") if previous is None else state_delta(previous, state)
+                self._deliver(recipients, "d", dumps(payload))
+
+        for match_id, state in self.states.items():
+            if match_id not in current:
+                self.feeds.pop(match_id, None)
+                self._seen.pop(match_id, None)
+                self._deliver(self.index.route(state), "end", dumps({"t": "end", "id": match_id}))
+        self.states = current
+
+    def publish_events(self, match_id: Any, events: List[Dict]) -> None:
+        """Entries of a match's events feed not seen before"""
+        seen = self._seen.setdefault(match_id, set())
+        new = []
+        for event in events:
+            if not isinstance(event, dict):
+                continue
+            compact = compact_event(event)
+            key = _event_key(compact)
+            if key not in seen:
+                seen.add(key)
+                new.append(compact)
+        if not new:
+            return
+        self.feeds[match_id] = self.feeds.get(match_id, []) + new
+        state = self.states.get(match_id)
+        if state is not None:
+            self._deliver(self.index.route(state), "e", dumps({"t": "e", "id": match_id, "events": new}))
+
+    def _fetch_events(self, match_ids: List[Any]) -> List[Tuple[Any, List[Dict]]]:
+        def fetch(match_id):
+            try:
+                result = self.match_events(match_id)
+            except Exception as e:
+                logger.error(f"Events feed for match {match_id} failed: {e}")
+                return match_id, []
+            return match_id, result.get("events", []) if result.get("success") else []
+        return list(self._executor.map(fetch, match_ids))
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self.index:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            try:
+                snapshot = await loop.run_in_executor(self._executor, self.snapshot)
+                if snapshot is not None and snapshot is not self._last:
+                    self._last = snapshot
+                    self.publish_snapshot(snapshot.matches)
+                    followed = [match_id for _, match_id in self.index.followed(self.states.values())]
+                    for match_id, events in await loop.run_in_executor(
+                            self._executor, self._fetch_events, followed[:WS_EVENT_MATCHES]):
+                        self.publish_events(match_id, events)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Match channel pass failed: {e}")
+            try:
+                # Sleep until the next check, or until someone subscribes
+                await asyncio.wait_for(self._wakeup.wait(), self.check_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "sockets": len(self.index),
+            "matches": len(self.index.index["matches"]),
+            "competitions": len(self.index.index["competitions"]),
+            "teams": len(self.index.index["teams"]),
+            "messages_queued": self.routed,
+            "slow_disconnects": self.dropped,
+        }
@@ -0,0 +1,284 @@
+"""
+MESSAGE TEMPLATES - Precompiled WhatsApp message templates
+Every message the dashboard produces (goal alerts, HT/FT reports, standings,
+fixtures, news digests) is rendered here. Templates are compiled once per
+language and rendered output is cached by (template, state hash, language),
+so one update fanned out to thousands of subscribers is rendered once.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from string import Formatter
+from typing import Dict, List, Any, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANGUAGE = "en"
+
+# ==================== LABELS ====================
+# Fixed words only - anything dynamic goes through placeholders
+
+LABELS = {
+    "en": {"goal": "GOAL", "goals": "GOALS", "half_time": "HALF TIME", "full_time": "FULL TIME",
+           "live": "LIVE", "score": "Score", "table": "TABLE", "top": "TOP",
+           "fixtures": "TODAY'S FIXTURES", "news": "FOOTBALL NEWS DIGEST",
+           "kickoff": "MATCH STARTED", "kickoff_at": "Kickoff at", "first_half": "First half complete",
+           "result": "Full time result", "red_card": "RED CARD", "red_cards": "RED CARDS",
+           "yellow_card": "YELLOW CARD", "yellow_cards": "YELLOW CARDS", "own_goal": "OWN GOAL by",
+           "missed_penalty": "MISSED PENALTY by", "assist": "assist", "in": "IN", "out": "OUT"},
+    "es": {"goal": "GOL", "goals": "GOLES", "half_time": "DESCANSO", "full_time": "FINAL",
+           "live": "EN VIVO", "score": "Marcador", "table": "CLASIFICACIÓN", "top": "TOP",
+           "fixtures": "PARTIDOS DE HOY", "news": "RESUMEN DE NOTICIAS",
+           "kickoff": "COMIENZA EL PARTIDO", "kickoff_at": "Inicio al", "first_half": "Termina la primera parte",
+           "result": "Resultado final", "red_card": "TARJETA ROJA", "red_cards": "TARJETAS ROJAS",
+           "yellow_card": "TARJETA AMARILLA", "yellow_cards": "TARJETAS AMARILLAS", "own_goal": "GOL EN PROPIA de",
+           "missed_penalty": "PENALTI FALLADO por", "assist": "asistencia", "in": "ENTRA", "out": "SALE"},
+    "fr": {"goal": "BUT", "goals": "BUTS", "half_time": "MI-TEMPS", "full_time": "FIN DU MATCH",
+           "live": "EN DIRECT", "score": "Score", "table": "CLASSEMENT", "top": "TOP",
+           "fixtures": "MATCHS DU JOUR", "news": "RÉSUMÉ FOOT",
+           "kickoff": "COUP D'ENVOI", "kickoff_at": "Coup d'envoi à", "first_half": "Fin de la première période",
+           "result": "Résultat final", "red_card": "CARTON ROUGE", "red_cards": "CARTONS ROUGES",
+           "yellow_card": "CARTON JAUNE", "yellow_cards": "CARTONS JAUNES", "own_goal": "CSC de",
+           "missed_penalty": "PENALTY MANQUÉ par", "assist": "passe", "in": "ENTRÉE", "out": "SORTIE"},
+    "de": {"goal": "TOR", "goals": "TORE", "half_time": "HALBZEIT", "full_time": "ABPFIFF",
+           "live": "LIVE", "score": "Stand", "table": "TABELLE", "top": "TOP",
+           "fixtures": "SPIELE HEUTE", "news": "FUSSBALL-NEWS",
+           "kickoff": "ANPFIFF", "kickoff_at": "Anpfiff bei", "first_half": "Erste Halbzeit beendet",
+           "result": "Endergebnis", "red_card": "ROTE KARTE", "red_cards": "ROTE KARTEN",
+           "yellow_card": "GELBE KARTE", "yellow_cards": "GELBE KARTEN", "own_goal": "EIGENTOR von",
+           "missed_penalty": "ELFMETER VERSCHOSSEN von", "assist": "Vorlage", "in": "REIN", "out": "RAUS"},
+    "it": {"goal": "GOL", "goals": "GOL", "half_time": "INTERVALLO", "full_time": "FINALE",
+           "live": "LIVE", "score": "Risultato", "table": "CLASSIFICA", "top": "TOP",
+           "fixtures": "PARTITE DI OGGI", "news": "NOTIZIE CALCIO",
+           "kickoff": "CALCIO D'INIZIO", "kickoff_at": "Inizio al", "first_half": "Fine primo tempo",
+           "result": "Risultato finale", "red_card": "CARTELLINO ROSSO", "red_cards": "CARTELLINI ROSSI",
+           "yellow_card": "CARTELLINO GIALLO", "yellow_cards": "CARTELLINI GIALLI", "own_goal": "AUTOGOL di",
+           "missed_penalty": "RIGORE SBAGLIATO da", "assist": "assist", "in": "DENTRO", "out": "FUORI"},
+    "pt": {"goal": "GOLO", "goals": "GOLOS", "half_time": "INTERVALO", "full_time": "FIM DE JOGO",
+           "live": "AO VIVO", "score": "Resultado", "table": "CLASSIFICAÇÃO", "top": "TOP",
+           "fixtures": "JOGOS DE HOJE", "news": "RESUMO DE NOTÍCIAS",
+           "kickoff": "COMEÇA O JOGO", "kickoff_at": "Início aos", "first_half": "Fim da primeira parte",
+           "result": "Resultado final", "red_card": "CARTÃO VERMELHO", "red_cards": "CARTÕES VERMELHOS",
+           "yellow_card": "CARTÃO AMARELO", "yellow_cards": "CARTÕES AMARELOS", "own_goal": "AUTOGOLO de",
+           "missed_penalty": "PENÁLTI FALHADO por", "assist": "assistência", "in": "ENTRA", "out": "SAI"},
+}
+
+# ==================== TEMPLATE SOURCES ====================
+# {field} = placeholder, [[label]] = fixed word resolved per language at compile time.
+# List templates render header once, row per item, footer once.
+
+TEMPLATES = {
+    "goal_alert": "⚽ *[[goal]]!*\n\n🏟️ {home_name} {home_score} - {away_score} {away_name}\n⏱️ {minute}'\n\n#Goal #LiveFootball",
+    "half_time": "⏸️ *[[half_time]]*\n\n🏟️ {home_name} {home_score} - {away_score} {away_name}\n\n⏱️ 45' - [[first_half]]\n\n#Halftime #{competition_tag}",
+    "full_time": "✅ *[[full_time]]*\n\n🏟️ {home_name} {home_score} - {away_score} {away_name}\n\n⏱️ [[result]]\n\n#FullTime #{competition_tag}",
+    "kickoff": "🔴 *[[kickoff]]*\n\n🏟️ {home_name} vs {away_name}\n⏱️ [[kickoff_at]] {minute}'\n\n#LiveFootball #Kickoff",
+    "live_score": "🔴 {home_name} {home_score} - {away_score} {away_name} ({minute}')",
+    "match_summary": "⚽ {home_name} {home_score}-{away_score} {away_name}",
+    "live_header": "🔴 *[[live]]: {home_name} vs {away_name}*\n⏱️ {minute}' - {status}\n\n",
+    "live_footer": "📊 *[[score]]:* {home_score} - {away_score}\n#LiveFootball #{competition_tag}",
+    "section_goals": {"header": "⚽ *{title}!*\n", "row": "⚽ {minute}' - {player}\n", "footer": "\n"},
+    "section_red_cards": {"header": "🟥 *{title}!*\n", "row": "🟥 {minute}' - {player}\n", "footer": "\n"},
+    "section_yellow_cards": {"header": "🟨 *{title}*\n", "row": "🟨 {minute}' - {player}\n", "footer": "\n"},
+    "event_goal_assist": "⚽ {minute}' - {player} ([[assist]]: {assist})",
+    "event_own_goal": "🔄 {minute}' - [[own_goal]] {player}",
+    "event_card": "{icon} {minute}' - {player}",
+    "event_substitution": "🔄 {minute}' - [[in]]: {player_in}, [[out]]: {player_out}",
+    "event_missed_penalty": "❌ {minute}' - [[missed_penalty]] {player}",
+    "event_generic": "{icon} {minute}' - {player}",
+    "standings": {
+        "header": "🏆 *{competition} [[table]]* 🏆\n📅 {date}\n\n*[[top]] {count}*\n",
+        "row": "{medal} {name} - *{points} pts*\n",
+        "footer": "",
+    },
+    "fixtures": {
+        "header": "📅 *[[fixtures]]* - {date}\n\n",
+        "row": "{flag} {time} {home_name} vs {away_name}\n",
+        "footer": "\n#Football #Fixtures",
+    },
+    "news_digest": {
+        "header": "📰 *[[news]]*\n\n",
+        "row": "{index}. {title} ({source})\n",
+        "footer": "\n#FootballNews",
+    },
+}
+
+
+class _CompiledText:
+    """A template string pre-split into literal and field parts"""
+
+    __slots__ = ("parts", "fields")
+
+    def __init__(self, source: str, labels: Dict[str, str]):
+        for key, word in labels.items():
+            source = source.replace(f"[[{key}]]", word)
+        self.parts = []
+        fields = []
+        for literal, field, _spec, _conv in Formatter().parse(source):
+            if literal:
+                self.parts.append((True, literal))
+            if field is not None:
+                self.parts.append((False, field))
+                fields.append(field)
+        self.fields = tuple(fields)
+
+    def render(self, context: Dict) -> str:
+        out = []
+        for is_literal, value in self.parts:
+            if is_literal:
+                out.append(value)
+            else:
+                item = context.get(value, "")
+                out.append(item if isinstance(item, str) else str(item))
+        return "".join(out)
+
+
+class CompiledTemplate:
+    """A single or header/row/footer template compiled for one language"""
+
+    def __init__(self, name: str, source: Any, language: str):
+        self.name = name
+        self.language = language
+        labels = dict(LABELS[DEFAULT_LANGUAGE])
+        labels.update(LABELS.get(language, {}))
+        if isinstance(source, dict):
+            self.header = _CompiledText(source.get("header", ""), labels)
+            self.row = _CompiledText(source.get("row", ""), labels)
+            self.footer = _CompiledText(source.get("footer", ""), labels)
+            self.body = None
+        else:
+            self.body = _CompiledText(source, labels)
+
+    def render(self, context: Dict, rows: Iterable[Dict] = ()) -> str:
+        if self.body is not None:
+            return self.body.render(context)
+        out = [self.header.render(context)]
+        out.extend(self.row.render(row) for row in rows)
+        out.append(self.footer.render(context))
+        return "".join(out)
+
+
+def match_state_hash(match: Dict) -> str:
+    """Cheap state key for a match: changes only when something visible changes"""
+    home = match.get("home_team")
+    away = match.get("away_team")
+    return "|".join(str(part) for part in (
+        match.get("id", match.get("fixture_id")),
+        home.get("score") if isinstance(home, dict) else match.get("home_score"),
+        away.get("score") if isinstance(away, dict) else match.get("away_score"),
+        match.get("minute"),
+        match.get("status"),
+    ))
+
+
+def state_hash(*parts: Any) -> str:
+    """Generic state key for arbitrary JSON-able render inputs"""
+    raw = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def match_context(match: Dict) -> Dict:
+    """Flatten either a processed upstream match or a formatted API match"""
+    home = match.get("home_team")
+    away = match.get("away_team")
+    competition = match.get("competition_name") or "Match"
+    return {
+        "home_name": home.get("name", "Home") if isinstance(home, dict) else match.get("home_name", "Home"),
+        "away_name": away.get("name", "Away") if isinstance(away, dict) else match.get("away_name", "Away"),
+        "home_score": home.get("score", match.get("home_score", 0)) if isinstance(home, dict) else match.get("home_score", 0),
+        "away_score": away.get("score", match.get("away_score", 0)) if isinstance(away, dict) else match.get("away_score", 0),
+        "minute": match.get("minute", "0"),
+        "status": match.get("status") or "In Progress",
+        "competition": competition,
+        "competition_tag": competition.replace(" ", ""),
+    }
+
+
+class TemplateEngine:
+    """Compiles templates lazily per language and caches rendered output"""
+
+    def __init__(self, templates: Dict = None, cache_size: int = 4096):
+        self.sources = dict(templates or TEMPLATES)
+        self.cache_size = cache_size
+        self._compiled: Dict[tuple, CompiledTemplate] = {}
+        self._cache: "OrderedDict[tuple, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compiled(self, name: str, language: str = DEFAULT_LANGUAGE) -> CompiledTemplate:
+        language = language if language in LABELS else DEFAULT_LANGUAGE
+        key = (name, language)
+        template = self._compiled.get(key)
+        if template is None:
+            template = CompiledTemplate(name, self.sources[name], language)
+            self._compiled[key] = template
+        return template
+
+    def render(self, name: str, context: Dict, rows: Iterable[Dict] = (),
+               language: str = DEFAULT_LANGUAGE, state: str = None) -> str:
+        """Render a template; pass `state` to cache the result under that key"""
+        if state is None:
+            return self.compiled(name, language).render(context, rows)
+
+        key = (name, state, language)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        rendered = self.compiled(name, language).render(context, rows)
+        with self._lock:
+            self._cache[key] = rendered
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return rendered
+
+    def render_match(self, name: str, match: Dict, language: str = DEFAULT_LANGUAGE) -> str:
+        return self.render(name, match_context(match), language=language,
+                           state=match_state_hash(match))
+
+    def render_matches(self, name: str, matches: List[Dict],
+                       language: str = DEFAULT_LANGUAGE) -> List[Dict]:
+        """Bulk render one template for every match in a single pass"""
+        template = self.compiled(name, language)
+        rendered = []
+        with self._lock:
+            for match in matches:
+                key = (name, match_state_hash(match), language)
+                text = self._cache.get(key)
+                if text is None:
+                    self.misses += 1
+                    text = template.render(match_context(match))
+                    self._cache[key] = text
+                else:
+                    self.hits += 1
+                    self._cache.move_to_end(key)
+                rendered.append({"id": match.get("id", match.get("fixture_id")), "message": text})
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return rendered
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "templates": len(self.sources),
+            "compiled": len(self._compiled),
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+def medal(position: int) -> str:
+    return {1: "🥇", 2: "🥈", 3: "🥉"}.get(position, f"{position}.")
+
+
+# Shared engine used by the app, services and event pipeline
+engine = TemplateEngine()
@@ -0,0 +1,283 @@
+"""
+METRICS - Low-overhead counters and histograms in Prometheus text format
+Writes never take a lock: every thread updates its own shard and shards are
+only summed when /metrics is scraped. Shards of exited threads are folded
+into one base total, so short-lived threads don't accumulate. Histograms
+use fixed bucket bounds chosen up front, so an observation is one bisect
+and two additions.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Any, Callable, Iterable, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Seconds - covers cache hits (sub-ms) through slow Gemini calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Sharded:
+    """Per-thread storage; only the owning thread ever writes to its shard"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: Dict[threading.Thread, Dict] = {}
+        self._base: Dict = {}  # totals of threads that have exited
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = {}
+            with self._shards_lock:  # once per thread
+                self._fold_exited()
+                self._shards[threading.current_thread()] = shard
+            self._local.shard = shard
+        return shard
+
+    def _fold_exited(self) -> None:
+        """Merge shards of finished threads into the base (caller holds the lock)"""
+        for thread in [thread for thread in self._shards if not thread.is_alive()]:
+            self._merge(self._base, self._shards.pop(thread))
+
+    @staticmethod
+    def _merge(into: Dict, shard: Dict) -> Dict:
+        """Add a shard's series into `into`: counter values, or histogram lists element-wise"""
+        for labels, value in shard.items():
+            total = into.get(labels)
+            if total is None:
+                into[labels] = list(value) if isinstance(value, list) else value
+            elif isinstance(total, list):
+                for i, part in enumerate(value):
+                    total[i] += part
+            else:
+                into[labels] = total + value
+        return into
+
+    def _snapshots(self) -> List[Dict]:
+        with self._shards_lock:
+            self._fold_exited()
+            shards = list(self._shards.values())
+            base = self._merge({}, self._base)
+        return [base] + [dict(shard) for shard in shards]
+
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__()
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> Dict[Tuple, float]:
+        totals: Dict[Tuple, float] = {}
+        for shard in self._snapshots():
+            self._merge(totals, shard)
+        return totals
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_label_text(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in sorted(self.values().items())]
+
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__()
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels) -> None:
+        shard = self._shard()
+        series = shard.get(labels)
+        if series is None:
+            # [per-bucket counts..., +Inf count, sum]
+            series = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def time(self, *labels) -> "_Timer":
+        return _Timer(self, labels)
+
+    def values(self) -> Dict[Tuple, List]:
+        totals: Dict[Tuple, List] = {}
+        for shard in self._snapshots():
+            self._merge(totals, shard)
+        return totals
+
+    def render(self) -> List[str]:
+        lines = []
+        bounds = self.buckets + (float("inf"),)
+        for labels, series in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labelnames, labels)} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{_label_text(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: Tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+
+
+class CallbackMetric:
+    """Gauge or counter read from existing state at scrape time (queue depths, cache stats)"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str],
+                 fn: Callable[[], Dict[Tuple, float]], kind: str = "gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.fn = fn
+        self.kind = kind
+
+    def render(self) -> List[str]:
+        try:
+            values = self.fn() or {}
+        except Exception as e:
+            logger.error(f"Metric {self.name} callback failed: {e}")
+            return []
+        return [f"{self.name}{_label_text(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in sorted(values.items())]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, Any] = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.metrics.get(name) or self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.metrics.get(name) or self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(self, name: str, documentation: str, labelnames: Iterable[str],
+                       fn: Callable[[], Dict[Tuple, float]], kind: str = "gauge") -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, labelnames, fn, kind))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# ==================== SHARED METRICS ====================
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests served", ("route", "method", "status"))
+http_latency = registry.histogram(
+    "http_request_duration_seconds", "Time spent serving a request", ("route", "method"))
+http_response_size = registry.histogram(
+    "http_response_size_bytes", "Response body size", ("route",), SIZE_BUCKETS)
+
+upstream_requests = registry.counter(
+    "upstream_requests_total", "Outbound calls by outcome", ("service", "endpoint", "outcome"))
+upstream_latency = registry.histogram(
+    "upstream_request_duration_seconds", "Outbound call latency", ("service", "endpoint"))
+upstream_response_size = registry.histogram(
+    "upstream_response_size_bytes", "Outbound response body size", ("service", "endpoint"), SIZE_BUCKETS)
+upstream_status = registry.counter(
+    "upstream_responses_total", "Outbound HTTP responses by status code", ("service", "endpoint", "status"))
+
+_CACHES: Dict[str, Callable[[], Dict]] = {}
+_QUEUES: Dict[str, Callable[[], float]] = {}
+
+
+def observe_http_response(service: str, endpoint: str, response) -> None:
+    """Record status and size of a requests.Response from inside a fetch"""
+    upstream_status.inc(service, endpoint, response.status_code)
+    upstream_response_size.observe(len(response.content or b""), service, endpoint)
+
+
+def register_cache(name: str, stats: Callable[[], Dict]) -> None:
+    """`stats` returns at least {'hits': n, 'misses': n}"""
+    _CACHES[name] = stats
+
+
+def register_queue(name: str, depth: Callable[[], float]) -> None:
+    _QUEUES[name] = depth
+
+
+def _cache_values(field: str) -> Dict[Tuple, float]:
+    values = {}
+    for name, stats in list(_CACHES.items()):
+        values[(name,)] = stats().get(field, 0)
+    return values
+
+
+def _cache_ratio() -> Dict[Tuple, float]:
+    values = {}
+    for name, stats in list(_CACHES.items()):
+        data = stats()
+        total = data.get("hits", 0) + data.get("misses", 0)
+        values[(name,)] = round(data.get("hits", 0) / total, 4) if total else 0.0
+    return values
+
+
+registry.gauge_callback("cache_hits_total", "Cache hits", ("cache",),
+                        lambda: _cache_values("hits"), kind="counter")
+registry.gauge_callback("cache_misses_total", "Cache misses", ("cache",),
+                        lambda: _cache_values("misses"), kind="counter")
+registry.gauge_callback("cache_hit_ratio", "Cache hits / lookups since start", ("cache",), _cache_ratio)
+registry.gauge_callback("queue_depth", "Items waiting in internal queues", ("queue",),
+                        lambda: {(name,): depth() for name, depth in list(_QUEUES.items())})
@@ -3,36 +3,58 @@ NEWSAPI.ORG SERVICE - Complete Football News Integration
 Your key e8a981afc6ca49399c4088f951a6318e is FULLY WORKING!
 """
 
-import requests
+import os
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict
+
+from .client import UpstreamClient
+from .response_cache import data_age
 
 logger = logging.getLogger(__name__)
 
+NEWS_REFRESH_SECONDS = int(os.getenv("NEWS_REFRESH_SECONDS", 600))
+
+# NewsAPI's free tier allows 100 requests a day, share each answer for a while
+CACHE_TTLS = {
+    '/top-headlines': NEWS_REFRESH_SECONDS,
+    '/everything': NEWS_REFRESH_SECONDS,
+    '/top-headlines/sources': 86400,
+}
+
+# Countries /top-headlines accepts
+NEWS_COUNTRIES = {
+    'ae', 'ar', 'at', 'au', 'be', 'bg', 'br', 'ca', 'ch', 'cn', 'co', 'cu', 'cz', 'de', 'eg', 'fr', 'gb', 'gr',
+    'hk', 'hu', 'id', 'ie', 'il', 'in', 'it', 'jp', 'kr', 'lt', 'lv', 'ma', 'mx', 'my', 'ng', 'nl', 'no', 'nz',
+    'ph', 'pl', 'pt', 'ro', 'rs', 'ru', 'sa', 'se', 'sg', 'si', 'sk', 'th', 'tr', 'tw', 'ua', 'us', 've', 'za',
+}
+
+DEFAULT_IMAGE = 'https://images.unsplash.com/photo-1574629810360-7efbbe195018?w=600'
+
+
 class NewsAPIService:
     def __init__(self, api_key: str):
         self.api_key = api_key
-        self.base_url = "https://newsapi.org/v2"
-        self.session = requests.Session()
+        self.client = UpstreamClient(
+            "newsapi", os.getenv("NEWSAPI_BASE_URL", "https://newsapi.org/v2"), raise_for_status=False,
+            cacheable=lambda data: isinstance(data, dict) and data.get('status') == 'ok')
         
     def _get(self, endpoint: str, params: Dict) -> Dict:
         """Make API request to NewsAPI"""
-        url = f"{self.base_url}{endpoint}"
-        params['apiKey'] = self.api_key
-        
+        params = dict(params, apiKey=self.api_key)
         try:
-            response = self.session.get(url, params=params, timeout=10)
-            data = response.json()
+            data = self.client.get_json(endpoint, params, ttl=CACHE_TTLS.get(endpoint, 0))
             
             if data.get('status') == 'ok':
                 return data
             else:
                 logger.error(f"NewsAPI error: {data.get('message', 'Unknown')}")
+                data_age.failed()
                 return {"articles": [], "totalResults": 0}
                 
         except Exception as e:
             logger.error(f"NewsAPI request failed: {e}")
+            data_age.failed()
             return {"articles": [], "totalResults": 0}
     
     # ==================== TOP HEADLINES ====================
@@ -127,31 +149,36 @@ class NewsAPIService:
     def _format_articles(self, articles: List[Dict]) -> List[Dict]:
         """Format articles for your dashboard"""
         formatted = []
+        now = datetime.now().astimezone()  # once per batch, not per article
         for article in articles:
-            if not article.get('title') or article.get('title') == '[Removed]':
+            title = article.get('title')
+            if not title or title == '[Removed]':
                 continue
+            description = article.get('description')
+            content = article.get('content')
                 
             formatted.append({
                 'id': hash(article.get('url', '')),
-                'title': article.get('title', 'No title'),
-                'description': article.get('description', '')[:200] + '...' if article.get('description') else '',
-                'content': article.get('content', '')[:300] + '...' if article.get('content') else '',
+                'title': title,
+                'description': description[:200] + '...' if description else '',
+                'content': content[:300] + '...' if content else '',
                 'url': article.get('url', '#'),
-                'image': article.get('urlToImage', 'https://images.unsplash.com/photo-1574629810360-7efbbe195018?w=600'),
-                'source': article.get('source', {}).get('name', 'News'),
-                'published_at': self._format_date(article.get('publishedAt')),
-                'author': article.get('author', 'Unknown')
+                'image': article.get('urlToImage') or DEFAULT_IMAGE,
+                'source': (article.get('source') or {}).get('name', 'News'),
+                'published_at': self._format_date(article.get('publishedAt'), now),
+                'author': article.get('author') or 'Unknown'
             })
         return formatted
     
-    def _format_date(self, date_str: str) -> str:
+    def _format_date(self, date_str: str, now: datetime = None) -> str:
         """Format date for display"""
         if not date_str:
             return 'Recent'
         try:
             date = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-            now = datetime.now(date.tzinfo)
-            diff = now - date
+            if date.tzinfo is None:
+                date = date.astimezone()
+            diff = (now or datetime.now().astimezone()) - date
             
             if diff.days == 0:
                 if diff.seconds < 3600:
@@ -166,7 +193,7 @@ class NewsAPIService:
                 return f"{diff.days} days ago"
             else:
                 return date.strftime("%d %b %Y")
-        except:
+        except (ValueError, TypeError):
             return "Recent"
     
     # ==================== DASHBOARD READY ====================
@@ -180,4 +207,13 @@ class NewsAPIService:
             'transfers': self.get_transfer_news(5),
             'top_sources': self.get_sports_sources()[:5],
             'timestamp': datetime.now().isoformat()
-        }
\ No newline at end of file
+        }
+    
+    # ==================== TEST CONNECTION ====================
+    
+    def test_connection(self) -> Dict:
+        """One-article request to check the key"""
+        news = self.get_sports_headlines(page_size=1)
+        if news:
+            return {"available": True, "message": "Connected, found news"}
+        return {"available": False, "message": "No articles returned"}
@@ -0,0 +1,144 @@
+"""
+PAGINATION - Cursor pages and field selection over in-memory listings
+A listing is sorted once by a stable key. A cursor is the key of the last
+item a client has seen, so the next page starts right after it even when
+the listing was rebuilt in between: nothing is repeated or skipped because
+an earlier match appeared or dropped out.
+
+Page metadata travels in headers (Link rel="next", X-Next-Cursor,
+X-Total-Count), so list responses keep their shape for existing clients.
+"""
+
+import base64
+import binascii
+import json
+from bisect import bisect_right
+from typing import Dict, List, Optional, Any, Callable, Iterable, Sequence, Tuple
+from urllib.parse import urlencode
+
+DEFAULT_PAGE_SIZE = 30
+MAX_PAGE_SIZE = 200
+
+
+# ==================== CURSORS ====================
+
+def encode_cursor(key: Tuple) -> str:
+    """Opaque, URL-safe form of a sort key"""
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple:
+    """Sort key of a cursor, ValueError on anything encode_cursor did not produce"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise ValueError("invalid cursor")
+    if not isinstance(key, list) or not all(isinstance(part, (int, float, str)) for part in key):
+        raise ValueError("invalid cursor")
+    return tuple(key)
+
+
+# ==================== FIELD SELECTION ====================
+
+def field_paths(item: Dict, prefix: str = "") -> Tuple[str, ...]:
+    """Every selectable field of an item: top-level names and dotted nested ones"""
+    paths = []
+    for name, value in item.items():
+        paths.append(prefix + name)
+        if isinstance(value, dict):
+            paths.extend(field_paths(value, f"{prefix}{name}."))
+    return tuple(paths)
+
+
+def parse_fields(value: Optional[str], allowed: Iterable[str]) -> Optional[Tuple[str, ...]]:
+    """?fields=id,minute,home_team.score -> paths, None for everything"""
+    if not value:
+        return None
+    fields = tuple(dict.fromkeys(part.strip() for part in value.split(",") if part.strip()))
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    # home_team already includes home_team.score
+    fields = tuple(field for field in fields if not any(field.startswith(f"{other}.") for other in fields))
+    return fields or None
+
+
+def project(item: Dict, fields: Sequence[str]) -> Dict:
+    """Only the selected fields, nested ones keep their nesting"""
+    projected: Dict[str, Any] = {}
+    for field in fields:
+        *parents, name = field.split(".")
+        source, target = item, projected
+        for parent in parents:
+            source = source.get(parent)
+            if not isinstance(source, dict):
+                break
+            target = target.setdefault(parent, {})
+        else:
+            if name in source:
+                target[name] = source[name]
+    return projected
+
+
+# ==================== PAGES ====================
+
+class Page:
+    """One page of a listing and where the next one starts"""
+
+    def __init__(self, items: List[Dict], next_cursor: Optional[str], total: int,
+                 query: Dict[str, Any] = None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+        # Query arguments the next page repeats (filters, limit, fields)
+        self.query = query or {}
+
+    def headers(self) -> Dict[str, str]:
+        """Paging headers; the Link is relative to whichever path was requested"""
+        headers = {"X-Total-Count": str(self.total)}
+        if self.next_cursor:
+            args = {name: value for name, value in self.query.items() if name != "cursor" and value}
+            args["cursor"] = self.next_cursor
+            headers["X-Next-Cursor"] = self.next_cursor
+            headers["Link"] = f'<?{urlencode(args)}>; rel="next"'
+        return headers
+
+
+class Listing:
+    """Items in stable key order, paged by cursor"""
+
+    def __init__(self, items: List[Dict], key: Callable[[Dict], Tuple], fields: Iterable[str] = ()):
+        # Original index of each item, for subclasses that keep parallel lists
+        self.order = sorted(range(len(items)), key=lambda i: key(items[i]))
+        self.items = [items[i] for i in self.order]
+        self.keys = [key(item) for item in self.items]
+        self.fields = frozenset(fields)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def page(self, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+             positions: Sequence[int] = None, fields: Sequence[str] = None,
+             query: Dict[str, Any] = None) -> Page:
+        """
+        Up to `limit` items after the cursor. `positions` narrows the listing
+        to a filtered subset (ascending, as the indexes hand them out).
+        """
+        if positions is None:
+            positions = range(len(self.items))
+        start = 0
+        if cursor:
+            after = decode_cursor(cursor)
+            try:
+                start = bisect_right(positions, after, key=self.keys.__getitem__)
+            except TypeError:
+                # A cursor from a different listing (key parts of another type)
+                raise ValueError("invalid cursor")
+        selected = positions[start:start + limit]
+        items = [self.items[p] for p in selected]
+        if fields:
+            items = [project(item, fields) for item in items]
+        more = start + limit < len(positions)
+        next_cursor = encode_cursor(self.keys[selected[-1]]) if more and selected else None
+        return Page(items, next_cursor, len(positions), query)
@@ -0,0 +1,219 @@
+"""
+PROMPTS - Versioned, compact Gemini prompts and token accounting
+Every prompt comes from a versioned template. Inputs are cleaned (collapsed
+whitespace, NewsAPI "[+1234 chars]" tails) and embedded context (headlines,
+snippets, match events) is truncated to a token budget per field instead of
+a character count. The text being rewritten or translated is never cut; its
+output cap grows with it instead. Each call's input/output tokens are
+recorded per feature and template version as metrics (and per request on
+its trace, see GeminiService._complete), so prompt bloat shows up as a number.
+
+Token counts come from the model's usage metadata when the SDK reports it,
+else from estimate_tokens() - close enough for budgets and trends.
+"""
+
+import math
+import re
+import threading
+from typing import Dict, List, Optional, Any, Tuple
+
+from .metrics import registry
+
+# Words ~4 characters per token, digits ~3, every other non-space character one
+_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_NEWSAPI_TAIL = re.compile(r"\s*(…|\.\.\.)?\s*\[\+\d+ chars\]\s*$")
+
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+ai_tokens = registry.counter("ai_tokens_total", "Model tokens by feature and direction", ("feature", "direction"))
+ai_prompt_tokens = registry.histogram("ai_prompt_tokens", "Input tokens per call by feature and template version",
+                                      ("feature", "version"), TOKEN_BUCKETS)
+
+
+# ==================== TOKENS ====================
+
+def _piece_tokens(piece: str) -> int:
+    if piece.isascii() and piece.isalpha():
+        return math.ceil(len(piece) / 4)
+    if piece.isdigit():
+        return math.ceil(len(piece) / 3)
+    return 1
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate model tokens of a text, no tokenizer call"""
+    return sum(_piece_tokens(piece) for piece in _PIECES.findall(text or ""))
+
+
+def truncate_tokens(text: str, budget: int) -> str:
+    """Text cut at a word boundary to at most `budget` tokens, "…" when cut"""
+    used = 0
+    for match in _PIECES.finditer(text):
+        used += _piece_tokens(match.group())
+        if used > budget:
+            return text[:match.start()].rstrip() + "…"
+    return text
+
+
+def compact(text: Any) -> str:
+    """Whitespace collapsed, NewsAPI truncation markers dropped"""
+    text = _NEWSAPI_TAIL.sub("", "" if text is None else str(text))
+    lines = [_SPACES.sub(" ", line).strip() for line in text.split("\n")]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+# ==================== TEMPLATES ====================
+
+class Prompt:
+    __slots__ = ("feature", "version", "text", "input_tokens", "max_output_tokens")
+
+    def __init__(self, feature: str, version: int, text: str, max_output_tokens: int):
+        self.feature = feature
+        self.version = version
+        self.text = text
+        self.input_tokens = estimate_tokens(text)
+        self.max_output_tokens = max_output_tokens
+
+
+class PromptTemplate:
+    """
+    One feature's prompt. Bump `version` whenever the text changes, so token
+    trends and cached answers are told apart per version.
+    """
+
+    def __init__(self, feature: str, version: int, text: str, budgets: Dict[str, int],
+                 max_output_tokens: int, payload: Tuple[str, ...] = ()):
+        self.feature = feature
+        self.version = version
+        self.text = text.strip()
+        # Token budget of each context field; other fields are inserted as given
+        self.budgets = budgets
+        self.max_output_tokens = max_output_tokens
+        # Fields the answer restates in full (translations, rewrites): never
+        # truncated, the output cap is raised to fit them instead
+        self.payload = payload
+
+    def build(self, **fields) -> Prompt:
+        values = {}
+        max_output_tokens = self.max_output_tokens
+        for name, value in fields.items():
+            value = compact(value)
+            if name in self.budgets:
+                value = truncate_tokens(value, self.budgets[name])
+            if name in self.payload:
+                max_output_tokens = max(max_output_tokens, PAYLOAD_OUTPUT_FACTOR * estimate_tokens(value))
+            values[name] = value
+        return Prompt(self.feature, self.version, self.text.format(**values), max_output_tokens)
+
+
+# Room for a payload's answer: translations into other scripts take more tokens
+PAYLOAD_OUTPUT_FACTOR = 2
+
+
+# One shared register, each rule stated once
+TEMPLATES = {
+    "enhance": PromptTemplate("enhance", 2, """
+Rewrite this football WhatsApp message, tone: {tone}. Keep every fact and score. Add fitting emojis, *bold* the key parts, max 300 characters.
+
+{message}
+
+Rewritten:""", {}, max_output_tokens=120, payload=("message",)),
+
+    "translate": PromptTemplate("translate", 2, """
+Translate this football WhatsApp message to {language}. Keep emojis, *bold*, hashtags and football terms; sound natural.
+
+{message}
+
+Translation:""", {}, max_output_tokens=200, payload=("message",)),
+
+    # Only the segments the translation memory has not seen (translation_memory.py)
+    "translate_segments": PromptTemplate("translate_segments", 1, """
+Translate each numbered line of a football WhatsApp message to {language}. Keep {{0}}-style placeholders, emojis, *bold* and hashtags exactly. Answer with the same numbers, one line each.
+
+{segments}
+
+Translations:""", {}, max_output_tokens=300, payload=("segments",)),
+
+    "match_summary": PromptTemplate("match_summary", 2, """
+Write an exciting WhatsApp summary (max 200 characters) of this match. Start with a status emoji, give the score, mention key moments, *bold* what matters.
+
+{home} {home_score}-{away_score} {away} | {competition} | {minute}'
+{events}
+
+Summary:""", {"home": 12, "away": 12, "competition": 12, "events": 120}, max_output_tokens=90),
+
+    "news_summary": PromptTemplate("news_summary", 2, """
+Turn these football headlines into a WhatsApp digest under 300 characters: start with 📰 *FOOTBALL NEWS DIGEST*, one line with an emoji per story, end with #FootballNews.
+
+{articles}
+
+Digest:""", {"articles": 320}, max_output_tokens=130),
+}
+
+# Headlines are cut to this much; the snippets split the rest of the news budget
+NEWS_ARTICLES = 5
+NEWS_TITLE_TOKENS = 24
+
+
+def build(feature: str, **fields) -> Prompt:
+    return TEMPLATES[feature].build(**fields)
+
+
+def article_lines(articles: List[Dict], budget: int = None) -> str:
+    """Numbered headline + snippet lines, the snippets fitted into what the titles leave"""
+    budget = budget or TEMPLATES["news_summary"].budgets["articles"]
+    articles = [a for a in articles[:NEWS_ARTICLES] if isinstance(a, dict)]
+    titles = [truncate_tokens(compact(a.get("title") or "No title"), NEWS_TITLE_TOKENS) for a in articles]
+    sources = [compact(a.get("source") or "") for a in articles]
+    fixed = sum(estimate_tokens(f"{i}. {t} ({s})") for i, (t, s) in enumerate(zip(titles, sources), 1))
+    per_snippet = max((budget - fixed) // max(len(articles), 1), 0)
+
+    lines = []
+    for i, (article, title, source) in enumerate(zip(articles, titles, sources), 1):
+        line = f"{i}. {title}" + (f" ({source})" if source else "")
+        snippet = compact(article.get("content") or article.get("snippet") or article.get("description") or "")
+        # A snippet that only repeats the headline adds nothing
+        if per_snippet >= 8 and snippet and not snippet.startswith(title.rstrip("…")):
+            line += f": {truncate_tokens(snippet, per_snippet)}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+# ==================== ACCOUNTING ====================
+
+class TokenLedger:
+    """Running token totals per feature, next to the Prometheus counters"""
+
+    def __init__(self):
+        self.features: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, prompt: Prompt, output_tokens: int, input_tokens: Optional[int] = None,
+               reported: bool = False) -> Tuple[int, int]:
+        """Count one call; `input_tokens` from the model's usage metadata when it has them"""
+        input_tokens = input_tokens if input_tokens is not None else prompt.input_tokens
+        version = f"v{prompt.version}"
+        ai_tokens.inc(prompt.feature, "input", amount=input_tokens)
+        ai_tokens.inc(prompt.feature, "output", amount=output_tokens)
+        ai_prompt_tokens.observe(input_tokens, prompt.feature, version)
+        with self._lock:
+            totals = self.features.setdefault(prompt.feature, {
+                "calls": 0, "input_tokens": 0, "output_tokens": 0, "version": version, "reported": 0})
+            totals["calls"] += 1
+            totals["input_tokens"] += input_tokens
+            totals["output_tokens"] += output_tokens
+            totals["version"] = version
+            totals["reported"] += int(reported)
+        return input_tokens, output_tokens
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                feature: dict(totals, avg_input_tokens=round(totals["input_tokens"] / totals["calls"], 1))
+                for feature, totals in self.features.items()
+            }
+
+
+ledger = TokenLedger()
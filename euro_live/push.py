@@ -0,0 +1,411 @@
+"""
+PUSH - Web Push notifications for followed teams and competitions
+Browsers register a push subscription with the teams/competitions they
+follow. Goals, cards and full time detected from the live snapshots are
+pushed to them, so nobody has to keep a tab open and polling for alerts.
+
+    SubscriptionRegistry  SQLite-backed, indexed in memory by team and
+                          competition id: one event finds its recipients
+                          without scanning every subscription
+    PushDispatcher        one background job per event, fanned out over a
+                          sender pool; gone subscriptions (404/410) are pruned
+
+    PUSH_BACKEND=webpush   real Web Push (needs pywebpush and VAPID keys)
+    PUSH_BACKEND=local     in-process stand-in that keeps what it would send
+    PUSH_BACKEND=off       disabled (the default without VAPID_PRIVATE_KEY)
+"""
+
+import hmac
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Callable, Iterable, Set
+import logging
+
+import requests
+
+from .event_pipeline import FULL_TIME, GOAL, RED_CARD, YELLOW_CARD
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PUSH_PATH = os.path.join(tempfile.gettempdir(), "euro_live_push.sqlite3")
+
+VAPID_PUBLIC_KEY = os.getenv("VAPID_PUBLIC_KEY", "")
+VAPID_PRIVATE_KEY = os.getenv("VAPID_PRIVATE_KEY", "")
+VAPID_SUBJECT = os.getenv("VAPID_SUBJECT", "mailto:alerts@example.com")
+PUSH_BACKEND = os.getenv("PUSH_BACKEND", "webpush" if VAPID_PRIVATE_KEY else "off").lower()
+PUSH_WORKERS = int(os.getenv("PUSH_WORKERS", 16))
+# How long a push service keeps an undelivered alert (a goal is old news after that)
+PUSH_TTL_SECONDS = int(os.getenv("PUSH_TTL", 600))
+PUSH_EVENT_TYPES = frozenset(os.getenv("PUSH_EVENTS", f"{GOAL},{RED_CARD},{YELLOW_CARD},{FULL_TIME}").split(","))
+
+# Teams + competitions one subscription may follow
+MAX_FOLLOWS = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS subscriptions (
+    endpoint TEXT PRIMARY KEY,
+    p256dh TEXT NOT NULL,
+    auth TEXT NOT NULL,
+    teams TEXT NOT NULL,
+    competitions TEXT NOT NULL,
+    created INTEGER
+);
+"""
+
+push_sent = registry.counter("push_notifications_total", "Web Push deliveries by outcome", ("outcome",))
+
+
+# ==================== SUBSCRIPTIONS ====================
+
+class PushSubscription:
+    __slots__ = ("endpoint", "p256dh", "auth", "teams", "competitions")
+
+    def __init__(self, endpoint: str, p256dh: str, auth: str,
+                 teams: Iterable[int] = (), competitions: Iterable[int] = ()):
+        self.endpoint = endpoint
+        self.p256dh = p256dh
+        self.auth = auth
+        self.teams = frozenset(teams)
+        self.competitions = frozenset(competitions)
+
+    def info(self) -> Dict:
+        """subscription_info as the browser's PushSubscription.toJSON() has it"""
+        return {"endpoint": self.endpoint, "keys": {"p256dh": self.p256dh, "auth": self.auth}}
+
+
+def parse_subscription(data: Any) -> PushSubscription:
+    """Request body -> PushSubscription, ValueError on anything malformed"""
+    if not isinstance(data, dict) or not isinstance(data.get("subscription"), dict):
+        raise ValueError("Missing subscription")
+    subscription = data["subscription"]
+    keys = subscription.get("keys") or {}
+    endpoint = subscription.get("endpoint")
+    if not isinstance(endpoint, str) or not endpoint.startswith("https://"):
+        raise ValueError("Subscription endpoint must be an https URL")
+    if not isinstance(keys.get("p256dh"), str) or not isinstance(keys.get("auth"), str):
+        raise ValueError("Subscription keys missing")
+
+    def ids(name: str) -> List[int]:
+        values = data.get(name) or []
+        if not isinstance(values, list) or not all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+            raise ValueError(f"{name} must be a list of ids")
+        return values
+
+    teams, competitions = ids("teams"), ids("competitions")
+    if not teams and not competitions:
+        raise ValueError("Follow at least one team or competition")
+    if len(teams) + len(competitions) > MAX_FOLLOWS:
+        raise ValueError(f"At most {MAX_FOLLOWS} teams and competitions per subscription")
+    return PushSubscription(endpoint, keys["p256dh"], keys["auth"], teams, competitions)
+
+
+class SubscriptionRegistry:
+    """
+    Every subscription in memory with team and competition indexes, backed
+    by SQLite so subscriptions survive restarts and are shared by workers
+    on one host (a write by another worker triggers a reload).
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.getenv("PUSH_DB_PATH", DEFAULT_PUSH_PATH)
+        self._lock = threading.Lock()
+        self.subscriptions: Dict[str, PushSubscription] = {}
+        self.by_team: Dict[int, Set[str]] = {}
+        self.by_competition: Dict[int, Set[str]] = {}
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._load()
+
+    def _data_version(self) -> int:
+        # Changes whenever another connection commits to the file
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _load(self) -> None:
+        self.subscriptions.clear()
+        self.by_team.clear()
+        self.by_competition.clear()
+        for endpoint, p256dh, auth, teams, competitions in self.conn.execute(
+                "SELECT endpoint, p256dh, auth, teams, competitions FROM subscriptions"):
+            self._index(PushSubscription(endpoint, p256dh, auth, json.loads(teams), json.loads(competitions)))
+        self._version = self._data_version()
+
+    def _refresh(self) -> None:
+        if self._data_version() != self._version:
+            self._load()
+
+    def _index(self, subscription: PushSubscription) -> None:
+        self.subscriptions[subscription.endpoint] = subscription
+        for team in subscription.teams:
+            self.by_team.setdefault(team, set()).add(subscription.endpoint)
+        for competition in subscription.competitions:
+            self.by_competition.setdefault(competition, set()).add(subscription.endpoint)
+
+    def _unindex(self, endpoint: str) -> Optional[PushSubscription]:
+        subscription = self.subscriptions.pop(endpoint, None)
+        if subscription is not None:
+            for index, keys in ((self.by_team, subscription.teams),
+                                (self.by_competition, subscription.competitions)):
+                for key in keys:
+                    endpoints = index.get(key)
+                    if endpoints is not None:
+                        endpoints.discard(endpoint)
+                        if not endpoints:
+                            del index[key]
+        return subscription
+
+    def subscribe(self, subscription: PushSubscription) -> None:
+        """Add or replace (same endpoint = same browser, new follow list)"""
+        with self._lock:
+            self._refresh()
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO subscriptions VALUES (?, ?, ?, ?, ?, ?)",
+                    (subscription.endpoint, subscription.p256dh, subscription.auth,
+                     json.dumps(sorted(subscription.teams)), json.dumps(sorted(subscription.competitions)),
+                     int(time.time())))
+            self._unindex(subscription.endpoint)
+            self._index(subscription)
+            self._version = self._data_version()
+
+    def unsubscribe(self, endpoints: Iterable[str]) -> int:
+        endpoints = list(endpoints)
+        with self._lock:
+            self._refresh()
+            with self.conn:
+                self.conn.executemany("DELETE FROM subscriptions WHERE endpoint = ?", [(e,) for e in endpoints])
+            removed = sum(self._unindex(endpoint) is not None for endpoint in endpoints)
+            self._version = self._data_version()
+        return removed
+
+    def remove(self, endpoint: str, auth: str) -> bool:
+        """Unsubscribe on behalf of a browser: only with the subscription's own auth secret"""
+        with self._lock:
+            self._refresh()
+            subscription = self.subscriptions.get(endpoint)
+            if subscription is None or not hmac.compare_digest(subscription.auth, auth):
+                return False
+        return self.unsubscribe([endpoint]) > 0
+
+    def recipients(self, teams: Iterable[Any] = (), competitions: Iterable[Any] = ()) -> List[PushSubscription]:
+        """Subscriptions following any of the teams or competitions, each once"""
+        with self._lock:
+            self._refresh()
+            endpoints: Set[str] = set()
+            for index, keys in ((self.by_team, teams), (self.by_competition, competitions)):
+                for key in keys:
+                    if key is not None:
+                        endpoints.update(index.get(key, ()))
+            return [self.subscriptions[endpoint] for endpoint in endpoints]
+
+    def __len__(self) -> int:
+        return len(self.subscriptions)
+
+    def stats(self) -> Dict:
+        return {
+            "subscriptions": len(self.subscriptions),
+            "teams": len(self.by_team),
+            "competitions": len(self.by_competition),
+        }
+
+
+# ==================== PUSH SERVICES ====================
+
+class WebPushService:
+    """Encrypted delivery to the browser vendors' push services (pywebpush)"""
+
+    name = "webpush"
+
+    def __init__(self, private_key: str, subject: str, ttl: int = PUSH_TTL_SECONDS, workers: int = PUSH_WORKERS):
+        if not private_key:
+            raise ValueError("VAPID_PRIVATE_KEY is not set")
+        from pywebpush import WebPushException, webpush  # optional dependency
+        self._webpush = webpush
+        self._error = WebPushException
+        self.private_key = private_key
+        self.claims = {"sub": subject}
+        self.ttl = ttl
+        # One keep-alive pool for the whole fan-out (most subscribers share a few push services)
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+
+    def send(self, subscription: PushSubscription, payload: bytes, urgency: str = "normal") -> int:
+        try:
+            response = self._webpush(subscription.info(), data=payload, vapid_private_key=self.private_key,
+                                     vapid_claims=dict(self.claims), ttl=self.ttl, timeout=10,
+                                     headers={"Urgency": urgency}, requests_session=self.session)
+            return getattr(response, "status_code", 201)
+        except self._error as e:
+            return e.response.status_code if e.response is not None else 502
+        except requests.exceptions.RequestException:
+            return 502
+
+
+class LocalPushService:
+    """
+    In-process stand-in for a push service (PUSH_BACKEND=local): keeps the
+    payloads it would have delivered. Endpoints in `gone` answer 410 like an
+    expired browser subscription.
+    """
+
+    name = "local"
+
+    def __init__(self, history: int = 1000):
+        self.delivered = deque(maxlen=history)
+        self.gone: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def send(self, subscription: PushSubscription, payload: bytes, urgency: str = "normal") -> int:
+        if subscription.endpoint in self.gone:
+            return 410
+        with self._lock:
+            self.delivered.append({"endpoint": subscription.endpoint, "urgency": urgency,
+                                   "payload": json.loads(payload)})
+        return 201
+
+    def inbox(self, endpoint: str = None, limit: int = 20) -> List[Dict]:
+        with self._lock:
+            items = [d for d in self.delivered if endpoint is None or d["endpoint"] == endpoint]
+        return items[-limit:]
+
+
+def push_service_from_env():
+    if PUSH_BACKEND == "local":
+        return LocalPushService()
+    if PUSH_BACKEND == "webpush":
+        return WebPushService(VAPID_PRIVATE_KEY, VAPID_SUBJECT)
+    raise ValueError(f"PUSH_BACKEND={PUSH_BACKEND}")
+
+
+# ==================== DISPATCH ====================
+
+def notification(message: Dict) -> Dict:
+    """Notification shown by the service worker for a published event message"""
+    match = message["match"]
+    types = set(message["types"])
+    score = f"{match['home_name']} {match['home_score']} - {match['away_score']} {match['away_name']}"
+    # Same tags as the in-page notifications, so a tab and a push replace each other
+    if GOAL in types:
+        title, tag = f"⚽ GOAL! {score}", f"score-{match['id']}-{match['home_score']}-{match['away_score']}"
+    elif FULL_TIME in types:
+        title, tag = f"✅ FULL TIME: {score}", f"ft-{match['id']}"
+    elif RED_CARD in types:
+        title, tag = f"🟥 RED CARD! {score}", f"card-{match['id']}-{match['minute']}"
+    else:
+        title, tag = f"🟨 CARD! {score}", f"card-{match['id']}-{match['minute']}"
+    body = f"{match.get('competition_name') or 'Live'} · {match['minute']}'"
+    return {"title": title, "body": body, "tag": tag, "url": "/", "match_id": match["id"],
+            "types": sorted(types)}
+
+
+def event_key(message: Dict) -> str:
+    """Same for every worker that detected the event from the same upstream answer"""
+    match = message["match"]
+    return (f"push:{match['id']}:{'+'.join(sorted(message['types']))}:"
+            f"{match['home_score']}-{match['away_score']}:{match['minute']}:{match['status']}")
+
+
+class PushDispatcher:
+    """Published event messages -> recipients by team/competition -> push service"""
+
+    def __init__(self, subscriptions: SubscriptionRegistry, service, claim: Callable[[str, float], bool] = None,
+                 workers: int = PUSH_WORKERS, event_types: Iterable[str] = PUSH_EVENT_TYPES):
+        self.subscriptions = subscriptions
+        self.service = service
+        # Fleet-wide "first worker to see this event", see TieredCache.claim
+        self.claim = claim
+        self.event_types = frozenset(event_types)
+        # Events go out in order on one thread, each fanned out over the sender pool
+        self._jobs = ThreadPoolExecutor(max_workers=1, thread_name_prefix="push-dispatch")
+        self._senders = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="push-send")
+        self._lock = threading.Lock()
+        # Event keys already dispatched by this process (the claim covers other workers)
+        self._recent: Dict[str, float] = {}
+        self.pending = 0
+        self.events = 0
+        self.sent = 0
+        self.failed = 0
+        self.pruned = 0
+
+    def dispatch(self, messages: List[Dict]) -> int:
+        """Queue the pushable messages, returns how many were queued"""
+        queued = 0
+        for message in messages:
+            if not self.event_types & set(message.get("types", ())):
+                continue
+            key = event_key(message)
+            if not self._first(key):
+                continue
+            if self.claim is not None and not self.claim(key, PUSH_TTL_SECONDS):
+                continue
+            with self._lock:
+                self.pending += 1
+            queued += 1
+            self._jobs.submit(self._run, message)
+        return queued
+
+    def _first(self, key: str) -> bool:
+        now = time.time()
+        with self._lock:
+            if len(self._recent) > 1000:
+                self._recent = {k: t for k, t in self._recent.items() if now - t < PUSH_TTL_SECONDS}
+            if now - self._recent.get(key, 0) < PUSH_TTL_SECONDS:
+                return False
+            self._recent[key] = now
+            return True
+
+    def _run(self, message: Dict) -> None:
+        try:
+            self.deliver(message)
+        except Exception as e:
+            logger.error(f"Push dispatch failed: {e}")
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def deliver(self, message: Dict) -> Dict:
+        """Push one message to everyone following either team or the competition"""
+        match = message["match"]
+        recipients = self.subscriptions.recipients((match.get("home_id"), match.get("away_id")),
+                                                   (match.get("competition_id"),))
+        self.events += 1
+        if not recipients:
+            return {"recipients": 0, "sent": 0, "failed": 0, "pruned": 0}
+
+        payload = json.dumps(notification(message), ensure_ascii=False).encode("utf-8")
+        urgency = "high" if message.get("priority", 0) >= 9 else "normal"
+        statuses = list(self._senders.map(lambda s: self.service.send(s, payload, urgency), recipients))
+
+        gone = [s.endpoint for s, status in zip(recipients, statuses) if status in (404, 410)]
+        sent = sum(1 for status in statuses if 200 <= status < 300)
+        failed = len(statuses) - sent - len(gone)
+        if gone:
+            self.subscriptions.unsubscribe(gone)
+        self.sent += sent
+        self.failed += failed
+        self.pruned += len(gone)
+        push_sent.inc("sent", amount=sent)
+        push_sent.inc("failed", amount=failed)
+        push_sent.inc("gone", amount=len(gone))
+        return {"recipients": len(recipients), "sent": sent, "failed": failed, "pruned": len(gone)}
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.service.name,
+            "events": self.events,
+            "pending": self.pending,
+            "sent": self.sent,
+            "failed": self.failed,
+            "pruned": self.pruned,
+            **self.subscriptions.stats(),
+        }
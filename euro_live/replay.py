@@ -0,0 +1,276 @@
+"""
+UPSTREAM RECORD / REPLAY
+Sits under euro_live.client.UpstreamClient (LiveScore, NewsAPI) and GeminiService._generate.
+
+    UPSTREAM_MODE=live     normal behaviour (default)
+    UPSTREAM_MODE=record   call upstream and append every response to REPLAY_DIR
+    UPSTREAM_MODE=replay   answer from a recording, no network, no quota
+
+Replays follow a virtual clock running REPLAY_SPEED times faster than real
+time (1-100x), so the same recording always yields the same sequence of
+responses. REPLAY_START skips that many seconds into the recording. Cache
+TTLs are upstream time: while replaying they shrink by the same factor
+(UpstreamTap.scale), so a 10 s refresh window still spans 10 s of match.
+
+    python -m euro_live.replay info  recordings/cl-night.jsonl
+    python -m euro_live.replay serve recordings/cl-night.jsonl --speed 20 --port 8099
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_right
+from typing import Dict, List, Optional, Any, Callable
+import logging
+
+import requests
+
+from .metrics import upstream_latency, upstream_requests
+from .tracing import KIND_CLIENT, tracer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPLAY_DIR = "recordings"
+
+# Never written to disk
+SECRET_PARAMS = {"key", "secret", "apiKey", "api_key"}
+
+
+class ReplayMiss(requests.exceptions.ConnectionError):
+    """The recording has nothing for this request - handled like an outage"""
+
+
+def request_key(service: str, endpoint: str, params: Dict = None) -> str:
+    """Stable key for a request, independent of credentials and param order"""
+    clean = {k: v for k, v in (params or {}).items() if k not in SECRET_PARAMS}
+    if "prompt" in clean:
+        clean["prompt"] = hashlib.sha1(str(clean["prompt"]).encode("utf-8")).hexdigest()
+    return f"{service} {endpoint} {json.dumps(clean, sort_keys=True, default=str)}"
+
+
+class Recorder:
+    """Appends upstream responses with timestamps to a JSONL file"""
+
+    def __init__(self, directory: str, session: str = None):
+        os.makedirs(directory, exist_ok=True)
+        session = session or time.strftime("%Y%m%d-%H%M%S")
+        self.path = os.path.join(directory, f"{session}.jsonl")
+        self._lock = threading.Lock()
+        logger.info(f"Recording upstream responses to {self.path}")
+
+    def write(self, service: str, endpoint: str, params: Dict, response: Any, elapsed: float) -> None:
+        entry = {
+            "t": time.time(),
+            "service": service,
+            "endpoint": endpoint,
+            "key": request_key(service, endpoint, params),
+            "elapsed": round(elapsed, 4),
+            "response": response,
+        }
+        line = json.dumps(entry, ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class ReplayClock:
+    """Virtual recording time: starts on first use, runs `speed` times real time"""
+
+    def __init__(self, origin: float, speed: float = 1.0, start_offset: float = 0.0):
+        self.origin = origin
+        self.speed = max(speed, 0.01)
+        self.start_offset = start_offset
+        self._started: Optional[float] = None
+        self._manual: Optional[float] = None
+
+    def now(self) -> float:
+        if self._manual is not None:
+            return self._manual
+        if self._started is None:
+            self._started = time.time()
+        return self.origin + self.start_offset + (time.time() - self._started) * self.speed
+
+    def set(self, offset: float) -> None:
+        """Freeze the clock at `offset` seconds into the recording (benchmarks, debugging)"""
+        self._manual = self.origin + offset
+
+    def advance(self, seconds: float) -> None:
+        self.set((self._manual if self._manual is not None else self.now()) - self.origin + seconds)
+
+
+class Replayer:
+    """Serves recorded responses for the current virtual time"""
+
+    def __init__(self, paths: List[str], speed: float = 1.0, start_offset: float = 0.0):
+        self.by_key: Dict[str, List[tuple]] = {}
+        self.by_endpoint: Dict[str, List[tuple]] = {}
+        origin = None
+        count = 0
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    t = entry["t"]
+                    origin = t if origin is None else min(origin, t)
+                    item = (t, count, entry["response"])
+                    self.by_key.setdefault(entry["key"], []).append(item)
+                    self.by_endpoint.setdefault(f"{entry['service']} {entry['endpoint']}", []).append(item)
+                    count += 1
+        for series in list(self.by_key.values()) + list(self.by_endpoint.values()):
+            series.sort()
+        self.count = count
+        self.clock = ReplayClock(origin or time.time(), speed, start_offset)
+        self.end = max((s[-1][0] for s in self.by_key.values()), default=self.clock.origin)
+        logger.info(f"Replaying {count} recorded responses at {speed}x")
+
+    def lookup(self, service: str, endpoint: str, params: Dict = None) -> Any:
+        """Latest response recorded at or before the virtual now"""
+        series = self.by_key.get(request_key(service, endpoint, params))
+        if series is None:
+            # Same endpoint with different params (e.g. another Gemini prompt)
+            series = self.by_endpoint.get(f"{service} {endpoint}")
+        if not series:
+            raise ReplayMiss(f"No recording for {service} {endpoint}")
+        index = bisect_right(series, (self.clock.now(), float("inf"))) - 1
+        return series[max(index, 0)][2]
+
+    def keys(self) -> List[str]:
+        return sorted(self.by_key)
+
+
+class UpstreamTap:
+    """The single choke point every outbound service call goes through"""
+
+    def __init__(self, mode: str = "live", recorder: Recorder = None, replayer: Replayer = None):
+        self.mode = mode
+        self.recorder = recorder
+        self.replayer = replayer
+
+    @classmethod
+    def from_env(cls) -> "UpstreamTap":
+        mode = os.getenv("UPSTREAM_MODE", "live").lower()
+        directory = os.getenv("REPLAY_DIR", DEFAULT_REPLAY_DIR)
+        try:
+            if mode == "record":
+                return cls(mode, recorder=Recorder(directory, os.getenv("REPLAY_SESSION")))
+            if mode == "replay":
+                source = os.getenv("REPLAY_FILE") or directory
+                paths = [source] if os.path.isfile(source) else sorted(
+                    os.path.join(source, name) for name in os.listdir(source) if name.endswith(".jsonl"))
+                return cls(mode, replayer=Replayer(
+                    paths,
+                    speed=float(os.getenv("REPLAY_SPEED", 1)),
+                    start_offset=float(os.getenv("REPLAY_START", 0)),
+                ))
+        except (OSError, ValueError) as e:
+            logger.error(f"UPSTREAM_MODE={mode} unavailable, falling back to live: {e}")
+        return cls("live")
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def scale(self, seconds: float) -> float:
+        """Real seconds that span `seconds` of upstream time (shorter in a sped-up replay)"""
+        if self.mode == "replay":
+            return seconds / self.replayer.clock.speed
+        return seconds
+
+    def now(self) -> float:
+        """Upstream time: the recording's clock when replaying, else wall time"""
+        if self.mode == "replay":
+            return self.replayer.clock.now()
+        return time.time()
+
+    def call(self, service: str, endpoint: str, params: Dict, fetch: Callable[[], Any]) -> Any:
+        """Run `fetch` (returning decoded JSON) live, recorded or replayed"""
+        started = time.perf_counter()
+        try:
+            with tracer.span(f"{service} {endpoint}", KIND_CLIENT, mode=self.mode):
+                if self.mode == "replay":
+                    response = self.replayer.lookup(service, endpoint, params)
+                else:
+                    response = fetch()
+        except Exception as e:
+            upstream_requests.inc(service, endpoint, type(e).__name__)
+            raise
+        finally:
+            upstream_latency.observe(time.perf_counter() - started, service, endpoint)
+        upstream_requests.inc(service, endpoint, "ok")
+
+        if self.mode == "record":
+            try:
+                self.recorder.write(service, endpoint, params, response, time.perf_counter() - started)
+            except (OSError, TypeError) as e:
+                logger.error(f"Recording failed: {e}")
+        return response
+
+
+upstream = UpstreamTap.from_env()
+
+
+# ==================== STAND-IN HTTP SERVER ====================
+
+def serve(replayer: Replayer, port: int = 8099) -> None:
+    """
+    Answer upstream-shaped URLs from a recording, so an unmodified deployment
+    can point LIVESCORE_BASE_URL / NEWSAPI_BASE_URL at http://127.0.0.1:<port>/<service>
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import urlsplit, parse_qsl
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            service, _, endpoint = url.path.lstrip("/").partition("/")
+            params = dict(parse_qsl(url.query))
+            try:
+                body = json.dumps(replayer.lookup(service, "/" + endpoint, params)).encode("utf-8")
+                self.send_response(200)
+            except ReplayMiss as e:
+                body = json.dumps({"success": False, "status": "error", "error": str(e)}).encode("utf-8")
+                self.send_response(404)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    print(f"Replaying {replayer.count} responses at {replayer.clock.speed}x on http://127.0.0.1:{port}")
+    server.serve_forever()
+
+
+def main(argv: List[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or serve upstream recordings")
+    parser.add_argument("command", choices=["info", "serve"])
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--start", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args(argv)
+
+    replayer = Replayer(args.paths, speed=args.speed, start_offset=args.start)
+    if args.command == "info":
+        duration = replayer.end - replayer.clock.origin
+        print(f"{replayer.count} responses, {len(replayer.by_key)} distinct requests, "
+              f"{duration / 60:.1f} min recorded ({duration / args.speed / 60:.1f} min at {args.speed}x)")
+        for key in replayer.keys():
+            print(f"  {len(replayer.by_key[key]):5d}  {key}")
+        return 0
+    serve(replayer, args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,318 @@
+"""
+RESPONSE CACHE - Serialize once, serve bytes
+Payloads that are identical for every viewer within a refresh window (live
+scores, today's fixtures) are encoded once per window and served as cached
+bytes with ETag, Cache-Control and Vary headers. gzip/brotli variants are
+compressed on first demand and then reused for the rest of the window.
+
+Responses also say how old the upstream data behind them is (X-Data-Age)
+and whether it is a stale answer kept through an outage (X-Data-Stale: 1).
+Stale responses, and empty ones built after an upstream failure, are
+rebuilt after STALE_RETRY_SECONDS and never cached downstream.
+
+orjson and brotli are optional: without them the stdlib json encoder and
+gzip-only compression are used.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Optional, Any, Callable, Tuple
+import logging
+
+from flask import Response
+
+from .pagination import Page
+from .replay import upstream
+from .tracing import tracer
+
+try:
+    import orjson
+except ImportError:  # optional fast encoder
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional, gzip still works
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Smaller bodies are not worth the CPU or the extra header bytes
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Payloads built from stale data are retried this soon instead of a full window
+STALE_RETRY_SECONDS = 2
+# Prepared responses kept per process, least recently used go first
+RESPONSE_CACHE_ENTRIES = int(os.getenv("RESPONSE_CACHE_ENTRIES", 256))
+
+
+def _default(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    """Compact UTF-8 JSON, orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_default, ensure_ascii=False,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def embed_json(parts: Dict[str, bytes]) -> str:
+    """
+    A JSON object assembled from already-encoded values, safe inside an HTML
+    <script> element ("</script>" and "<!--" cannot end or break it)
+    """
+    body = b"{" + b",".join(dumps(name) + b":" + value for name, value in parts.items()) + b"}"
+    return body.decode("utf-8").replace("<", "\\u003c")
+
+
+def available_encodings() -> Tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+# ==================== DATA AGE ====================
+
+class DataAge:
+    """Age of the oldest cached upstream answer used by the current request"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def reset(self) -> None:
+        self._local.age = None
+        self._local.stale = False
+
+    def note(self, age: float, stale: bool = False) -> None:
+        current = getattr(self._local, "age", None)
+        self._local.age = age if current is None else max(current, age)
+        self._local.stale = getattr(self._local, "stale", False) or stale
+
+    def failed(self) -> None:
+        """The upstream failed with nothing cached: the empty fallback counts as stale"""
+        self.note(0, stale=True)
+
+    def current(self) -> Tuple[Optional[float], bool]:
+        return getattr(self._local, "age", None), getattr(self._local, "stale", False)
+
+    @contextmanager
+    def capture(self):
+        """Collect what a nested build used, then fold it into the request"""
+        outer = self.current()
+        self.reset()
+        result = {}
+        try:
+            yield result
+        finally:
+            result["age"], result["stale"] = self.current()
+            self.reset()
+            if outer[0] is not None:
+                self.note(*outer)
+            if result["age"] is not None:
+                self.note(result["age"], result["stale"])
+
+    def headers(self, age: Optional[float] = None, stale: bool = None) -> Dict[str, str]:
+        if age is None and stale is None:
+            age, stale = self.current()
+        if age is None:
+            return {}
+        headers = {"X-Data-Age": str(int(age))}
+        if stale:
+            headers["X-Data-Stale"] = "1"
+        return headers
+
+
+data_age = DataAge()
+
+
+# ==================== PREPARED RESPONSES ====================
+
+class PreparedResponse:
+    """One encoded payload (or ready-made body) plus its compressed variants"""
+
+    def __init__(self, payload: Any, max_age: float = 0, data_age: float = None, stale: bool = False,
+                 body: bytes = None, mimetype: str = "application/json", cache_control: str = None,
+                 headers: Dict[str, str] = None):
+        self.payload = payload
+        self.body = body if body is not None else dumps(payload)
+        self.etag = hashlib.blake2b(self.body, digest_size=12).hexdigest()
+        self.mimetype = mimetype
+        # Fixed Cache-Control (hashed assets), otherwise max-age is what is left of the window
+        self.cache_control = cache_control
+        # Sent as they are (paging Link and counts)
+        self.headers = headers or {}
+        self.created = time.time()
+        self.max_age = min(max_age, STALE_RETRY_SECONDS) if stale else max_age
+        self.data_age = data_age
+        self.stale = stale
+        self._variants: Dict[str, bytes] = {"identity": self.body}
+        self._lock = threading.Lock()
+
+    def variant(self, encoding: str) -> bytes:
+        body = self._variants.get(encoding)
+        if body is None:
+            with self._lock:
+                body = self._variants.get(encoding)
+                if body is None:
+                    with tracer.span("compress", encoding=encoding, bytes=len(self.body)):
+                        body = self._compress(encoding)
+                    self._variants[encoding] = body
+        return body
+
+    def _compress(self, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(self.body, quality=BROTLI_QUALITY)
+        if encoding == "gzip":
+            return gzip.compress(self.body, compresslevel=GZIP_LEVEL, mtime=0)
+        return self.body
+
+    def choose_encoding(self, accept_encodings) -> str:
+        """Best variant the client accepts (werkzeug request.accept_encodings)"""
+        if len(self.body) < MIN_COMPRESS_BYTES:
+            return "identity"
+        for encoding in available_encodings():
+            if accept_encodings[encoding] > 0:
+                return encoding
+        return "identity"
+
+    def remaining(self) -> int:
+        """Whole seconds left of the window"""
+        return max(0, int(self.created + self.max_age - time.time()))
+
+    def _cache_control(self) -> str:
+        # Shared caches must not keep an outage answer for everyone
+        return "no-cache" if self.stale else f"public, max-age={self.remaining()}"
+
+    def to_response(self, request) -> Response:
+        headers = {
+            "ETag": f'"{self.etag}"',
+            "Vary": "Accept-Encoding",
+            "Cache-Control": self.cache_control or self._cache_control(),
+            **self.headers,
+        }
+        if self.data_age is not None:
+            headers.update(data_age.headers(self.data_age + time.time() - self.created, self.stale))
+        if self.etag in request.if_none_match:
+            return Response(status=304, headers=headers)
+
+        encoding = self.choose_encoding(request.accept_encodings)
+        body = self.variant(encoding)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(body, mimetype=self.mimetype, headers=headers)
+
+
+class ResponseCache:
+    """Prepared responses keyed by route + arguments, rebuilt once per window"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Any, PreparedResponse]" = OrderedDict()
+        # Only for keys being built right now
+        self._build_locks: Dict[Any, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Any, ttl: float, build: Callable[[], Any],
+            mimetype: str = "application/json") -> PreparedResponse:
+        """
+        Cached response for `key`, or build(), encode and store it.
+        For other mimetypes build() returns the finished text (rendered HTML).
+        A Page is stored as its items, with its paging headers.
+        """
+        entry = self._fresh(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        # One rebuild per key; concurrent viewers wait for it instead of all fetching
+        try:
+            with build_lock:
+                entry = self._fresh(key)
+                if entry is not None:
+                    self.hits += 1
+                    return entry
+                self.misses += 1
+                entry = self._build(key, ttl, build, mimetype)
+        finally:
+            with self._lock:
+                if self._build_locks.get(key) is build_lock:
+                    del self._build_locks[key]
+        return entry
+
+    def _build(self, key: Any, ttl: float, build: Callable[[], Any], mimetype: str) -> PreparedResponse:
+        max_age = upstream.scale(ttl)
+        with data_age.capture() as used:
+            payload = build()
+        headers = None
+        if isinstance(payload, Page):
+            payload, headers = payload.items, payload.headers()
+        with tracer.span("serialize", cached=True) as span:
+            if mimetype == "application/json":
+                entry = PreparedResponse(payload, max_age=max_age, data_age=used["age"], stale=used["stale"],
+                                         headers=headers)
+            else:
+                entry = PreparedResponse(None, max_age=max_age, data_age=used["age"], stale=used["stale"],
+                                         body=payload.encode("utf-8"), mimetype=mimetype)
+            span.set("bytes", len(entry.body))
+        self.put(key, entry)
+        return entry
+
+    def peek(self, key: Any) -> Optional[PreparedResponse]:
+        """Fresh entry or None - never builds, for callers that prepare their own"""
+        entry = self._fresh(key)
+        if entry is not None:
+            self.hits += 1
+        return entry
+
+    def put(self, key: Any, entry: PreparedResponse) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _fresh(self, key: Any) -> Optional[PreparedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None and time.time() - entry.created < entry.max_age:
+            return entry
+        return None
+
+    def invalidate(self, key: Any = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            "encoder": "orjson" if orjson is not None else "json",
+            "encodings": list(available_encodings()),
+        }
+
+
+responses = ResponseCache()
@@ -0,0 +1,177 @@
+"""
+SERVICES - Process-wide provider instances and live-state consumers
+Providers are built on first use instead of at import, so a cold start only
+pays for what the first request needs.
+"""
+
+import atexit
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+from .cache import upstream_cache
+from .event_pipeline import EventPipeline
+from .gemini import GeminiService
+from .live_snapshot import LiveSnapshot, SnapshotHolder
+from .livescore import LIVE_REFRESH_SECONDS, LiveScoreAPI
+from .message_templates import engine as templates
+from .metrics import register_cache, register_queue
+from .news import NewsAPIService
+from .push import PUSH_BACKEND, PushDispatcher, SubscriptionRegistry, push_service_from_env
+from .replay import upstream
+from .response_cache import data_age, responses
+from .snapshot_history import SnapshotHistory
+from .team_registry import TeamRegistry
+from .tracing import tracer
+from .translation_memory import TranslationMemory
+
+logger = logging.getLogger(__name__)
+
+
+class LazyService:
+    """
+    Builds a service on first use. Falsy when not configured or when
+    construction failed, like the plain `None` it replaces.
+    """
+
+    def __init__(self, name: str, factory, enabled: bool = True):
+        self._name = name
+        self._factory = factory
+        self._enabled = enabled
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._instance is None and self._enabled:
+            with self._lock:
+                if self._instance is None and self._enabled:
+                    try:
+                        self._instance = self._factory()
+                    except Exception as e:
+                        logger.error(f"{self._name} unavailable: {e}")
+                        self._enabled = False
+        return self._instance
+
+    @property
+    def built(self) -> bool:
+        return self._instance is not None
+
+    def __bool__(self) -> bool:
+        return self.get() is not None
+
+    def __getattr__(self, name):
+        instance = self.get()
+        if instance is None:
+            raise AttributeError(f"{self._name} is not configured")
+        return getattr(instance, name)
+
+
+# ==================== PROVIDERS ====================
+
+team_registry = TeamRegistry()
+atexit.register(team_registry.save)
+
+LIVESCORE_API_KEY = os.getenv("LIVESCORE_API_KEY")
+LIVESCORE_API_SECRET = os.getenv("LIVESCORE_API_SECRET")
+livescore = LazyService(
+    "LiveScore API", lambda: LiveScoreAPI(LIVESCORE_API_KEY, LIVESCORE_API_SECRET, team_registry),
+    enabled=bool(LIVESCORE_API_KEY and LIVESCORE_API_SECRET))
+
+# Segment translations reused across messages (SQLite), disable with TRANSLATION_MEMORY=0
+translation_memory = LazyService("Translation memory",
+                                 lambda: TranslationMemory(known_names=team_registry.is_team_name),
+                                 enabled=os.getenv("TRANSLATION_MEMORY", "1") != "0")
+
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+gemini = LazyService("Gemini", lambda: GeminiService(GEMINI_API_KEY, memory=translation_memory.get()))
+
+NEWS_API_KEY = os.getenv("NEWS_API_KEY")
+newsapi = LazyService("NewsAPI", lambda: NewsAPIService(NEWS_API_KEY), enabled=bool(NEWS_API_KEY))
+
+# ==================== LIVE STATE ====================
+
+# Server-side event detection, shared by every connected client
+event_pipeline = EventPipeline(merge_window=30.0)
+
+# Compact per-match state history (SQLite), disable with SNAPSHOT_HISTORY=0
+history = LazyService("Snapshot history", SnapshotHistory, enabled=os.getenv("SNAPSHOT_HISTORY", "1") != "0")
+
+
+# Web Push to followed teams/competitions, see push.py for PUSH_BACKEND
+push_subscriptions = LazyService("Push subscriptions", SubscriptionRegistry, enabled=PUSH_BACKEND != "off")
+push = LazyService(
+    "Web Push", lambda: PushDispatcher(push_subscriptions.get(), push_service_from_env(), upstream_cache.claim),
+    enabled=PUSH_BACKEND != "off")
+
+
+# Cards are only in the per-match events feed: polled for up to this many live matches (0 = no card events)
+CARD_EVENT_MATCHES = int(os.getenv("CARD_EVENT_MATCHES", 30))
+_event_feeds = ThreadPoolExecutor(max_workers=8, thread_name_prefix="events-feed")
+
+
+def attach_match_events(matches: list) -> list:
+    """Copies of the live matches with their events feed under "events", for card detection"""
+    if not CARD_EVENT_MATCHES or not matches or not livescore:
+        return matches
+
+    def fetch(match):
+        match_id = match.get("id", match.get("fixture_id")) if isinstance(match, dict) else None
+        if match_id is None:
+            return match
+        try:
+            result = livescore.get_match_events(match_id)
+        except Exception as e:
+            logger.error(f"Events feed for match {match_id} failed: {e}")
+            return match
+        return dict(match, events=result["events"]) if result.get("success") else match
+
+    polled = list(_event_feeds.map(fetch, matches[:CARD_EVENT_MATCHES]))
+    return polled + matches[CARD_EVENT_MATCHES:]
+
+
+def ingest_live_snapshot(matches: list):
+    """Hand a full (unfiltered) live snapshot to every consumer"""
+    with tracer.span("attach_match_events", matches=len(matches)):
+        detected = attach_match_events(matches)
+    published = event_pipeline.ingest(detected)
+    if published and push:
+        try:
+            push.dispatch(published)
+        except Exception as e:
+            logger.error(f"Push dispatch failed: {e}")
+    if history:
+        try:
+            # Stamped with recording time in a replay, so it can be queried by it
+            history.record(matches, ts=upstream.now())
+        except Exception as e:
+            logger.error(f"Snapshot history write failed: {e}")
+
+
+# The unfiltered feed, indexed - every live view is answered from it
+live_snapshots = SnapshotHolder()
+
+
+def build_live_snapshot() -> LiveSnapshot:
+    with data_age.capture() as used:
+        matches = livescore.get_live_scores()
+    with tracer.span("ingest_snapshot"):
+        ingest_live_snapshot(matches)
+    with tracer.span("index_snapshot", matches=len(matches)):
+        return LiveSnapshot(matches, data_age=used["age"], stale=used["stale"])
+
+
+def current_live_snapshot() -> LiveSnapshot:
+    """The live snapshot for this refresh window; one upstream call per window"""
+    return live_snapshots.get(LIVE_REFRESH_SECONDS, build_live_snapshot)
+
+
+# Read at scrape time only
+register_cache("message_templates", templates.stats)
+register_cache("responses", responses.stats)
+register_cache("upstream", upstream_cache.stats)
+register_cache("translation_memory",
+               lambda: translation_memory.get().stats() if translation_memory.built else {"hits": 0, "misses": 0})
+register_queue("event_queue", lambda: len(event_pipeline.queue))
+register_queue("event_broker_backlog", lambda: len(event_pipeline.broker.messages))
+register_queue("push_pending", lambda: push.get().pending if push.built else 0)
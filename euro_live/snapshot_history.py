@@ -0,0 +1,277 @@
+"""
+SNAPSHOT HISTORY - Append-only SQLite time series of live match states
+Every live snapshot is stored as per-match deltas (minute, score, status)
+with periodic keyframes, so a matchday can be replayed, missed alerts
+debugged and momentum charts drawn without keeping whole payloads.
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_PATH = os.path.join(tempfile.gettempdir(), "euro_live_history.sqlite3")
+
+FINISHED_STATUS = "FINISHED"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    match_id INTEGER PRIMARY KEY,
+    home_name TEXT,
+    away_name TEXT,
+    competition_id INTEGER,
+    first_seen INTEGER,
+    last_seen INTEGER
+);
+CREATE TABLE IF NOT EXISTS statuses (
+    code INTEGER PRIMARY KEY,
+    status TEXT UNIQUE
+);
+-- keyframe = 1 rows carry every field, delta rows carry NULL for unchanged fields
+CREATE TABLE IF NOT EXISTS states (
+    match_id INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    keyframe INTEGER NOT NULL,
+    minute TEXT,
+    home_score INTEGER,
+    away_score INTEGER,
+    status INTEGER,
+    PRIMARY KEY (match_id, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS states_ts ON states (ts);
+"""
+
+
+class SnapshotHistory:
+    """Compact per-match state history with timeline and point-in-time queries"""
+
+    def __init__(self, path: str = None, keyframe_every: int = 20,
+                 full_retention_days: int = None, max_retention_days: int = None):
+        self.path = path or os.getenv("SNAPSHOT_DB_PATH", DEFAULT_HISTORY_PATH)
+        self.keyframe_every = keyframe_every
+        # Minute-only deltas are thinned out after full_retention_days,
+        # everything goes after max_retention_days
+        self.full_retention_days = full_retention_days or int(os.getenv("HISTORY_FULL_DAYS", 14))
+        self.max_retention_days = max_retention_days or int(os.getenv("HISTORY_MAX_DAYS", 400))
+        self._lock = threading.Lock()
+        self._last: Dict[int, Dict] = {}       # last recorded state per live match
+        self._since_keyframe: Dict[int, int] = {}
+        # (ts, keyframe, state before it) of the last row written per match,
+        # a later state in the same second is folded into that row
+        self._last_row: Dict[int, tuple] = {}
+        self._status_codes: Dict[str, int] = {}
+        self._status_names: Dict[int, str] = {}
+        self._last_prune = 0.0
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        for code, status in self.conn.execute("SELECT code, status FROM statuses"):
+            self._status_codes[status] = code
+            self._status_names[code] = status
+
+    # ==================== WRITING ====================
+
+    def record(self, snapshot: List[Dict], ts: float = None) -> int:
+        """Append the changes in a processed live snapshot, returns rows written"""
+        ts = int(ts if ts is not None else time.time())
+        rows = []
+        seen = set()
+
+        with self._lock:
+            for match in snapshot:
+                match_id = self._match_id(match)
+                if match_id is None:
+                    continue
+                seen.add(match_id)
+                state = {
+                    "minute": str(match.get("minute", "0")),
+                    "home_score": int(match.get("home_score", 0) or 0),
+                    "away_score": int(match.get("away_score", 0) or 0),
+                    "status": self._status_code(match.get("status", "")),
+                }
+                if match_id not in self._last:
+                    self._upsert_match(match_id, match, ts)
+                row = self._state_row(match_id, ts, state)
+                if row:
+                    rows.append(row)
+
+            # Matches that left a non-empty live feed have finished
+            if snapshot:
+                for match_id in [m for m in self._last if m not in seen]:
+                    final = dict(self._last[match_id], status=self._status_code(FINISHED_STATUS))
+                    row = self._state_row(match_id, ts, final)
+                    if row:
+                        rows.append(row)
+                    self._last.pop(match_id, None)
+                    self._since_keyframe.pop(match_id, None)
+                    self._last_row.pop(match_id, None)
+
+            if rows:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO states VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            if seen:
+                self.conn.executemany(
+                    "UPDATE matches SET last_seen = ? WHERE match_id = ?",
+                    [(ts, match_id) for match_id in seen])
+            self.conn.commit()
+
+        if time.time() - self._last_prune > 3600:
+            self.prune()
+        return len(rows)
+
+    def _state_row(self, match_id: int, ts: int, state: Dict) -> Optional[tuple]:
+        """Row to write for a new state, or None when nothing changed"""
+        previous = self._last.get(match_id)
+        if previous == state:
+            return None
+        self._last[match_id] = state
+
+        last_row = self._last_row.get(match_id)
+        if last_row and last_row[0] == ts:
+            # Same second as the last row: rewrite that row (it is replaced
+            # on insert), keeping its keyframe flag and the state it follows
+            _, keyframe, previous = last_row
+        else:
+            count = self._since_keyframe.get(match_id, self.keyframe_every)
+            keyframe = previous is None or count >= self.keyframe_every
+            self._since_keyframe[match_id] = 1 if keyframe else count + 1
+            self._last_row[match_id] = (ts, keyframe, previous)
+
+        if keyframe:
+            return (match_id, ts, 1, state["minute"], state["home_score"],
+                    state["away_score"], state["status"])
+
+        changed = {k: (v if previous.get(k) != v else None) for k, v in state.items()}
+        return (match_id, ts, 0, changed["minute"], changed["home_score"],
+                changed["away_score"], changed["status"])
+
+    def _upsert_match(self, match_id: int, match: Dict, ts: int) -> None:
+        self.conn.execute(
+            "INSERT OR IGNORE INTO matches VALUES (?, ?, ?, ?, ?, ?)",
+            (match_id, match.get("home_name"), match.get("away_name"),
+             match.get("competition_id"), ts, ts))
+
+    def _status_code(self, status: str) -> int:
+        status = (status or "").upper()
+        code = self._status_codes.get(status)
+        if code is None:
+            # Another worker may have inserted it first, so always read it back
+            self.conn.execute("INSERT OR IGNORE INTO statuses (status) VALUES (?)", (status,))
+            code = self.conn.execute(
+                "SELECT code FROM statuses WHERE status = ?", (status,)).fetchone()[0]
+            self._status_codes[status] = code
+            self._status_names[code] = status
+        return code
+
+    @staticmethod
+    def _match_id(match: Dict) -> Optional[int]:
+        if not isinstance(match, dict):
+            return None
+        match_id = match.get("id", match.get("fixture_id"))
+        try:
+            return int(match_id)
+        except (TypeError, ValueError):
+            return None
+
+    # ==================== QUERIES ====================
+
+    def timeline(self, match_id: int, since: float = None, until: float = None) -> List[Dict]:
+        """Every recorded state of a match between since/until, fully reconstructed"""
+        start = (self._keyframe_before(match_id, since) or 0) if since else 0
+        return [self._present(ts, state)
+                for ts, state in self._replay(match_id, start, until)
+                if not since or ts >= since]
+
+    def state_at(self, match_id: int, at: float) -> Optional[Dict]:
+        """State of a match as it was at unix time `at`"""
+        start = self._keyframe_before(match_id, at)
+        if start is None:
+            return None
+        last = None
+        for ts, state in self._replay(match_id, start, at):
+            last = (ts, state)
+        return self._present(*last) if last else None
+
+    def _replay(self, match_id: int, start: int, until: Optional[float]):
+        """Fold keyframes and deltas from `start` into successive full states"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT ts, keyframe, minute, home_score, away_score, status FROM states "
+                "WHERE match_id = ? AND ts >= ? AND ts <= ? ORDER BY ts",
+                (match_id, start, int(until) if until else 2 ** 62)).fetchall()
+
+        state: Dict[str, Any] = {}
+        for ts, keyframe, minute, home_score, away_score, status in rows:
+            if keyframe:
+                state = {}
+            for key, value in (("minute", minute), ("home_score", home_score),
+                               ("away_score", away_score), ("status", status)):
+                if value is not None:
+                    state[key] = value
+            yield ts, dict(state)
+
+    def match_info(self, match_id: int) -> Optional[Dict]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT match_id, home_name, away_name, competition_id, first_seen, last_seen "
+                "FROM matches WHERE match_id = ?", (match_id,)).fetchone()
+        if not row:
+            return None
+        keys = ("id", "home_name", "away_name", "competition_id", "first_seen", "last_seen")
+        return dict(zip(keys, row))
+
+    def _keyframe_before(self, match_id: int, at: Optional[float]) -> Optional[int]:
+        """Timestamp of the newest keyframe at or before `at` (0 when unbounded)"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT MAX(ts) FROM states WHERE match_id = ? AND keyframe = 1 AND ts <= ?",
+                (match_id, int(at) if at else 2 ** 62)).fetchone()
+        return row[0] if row and row[0] is not None else None
+
+    def _present(self, ts: int, state: Dict) -> Dict:
+        return {
+            "ts": ts,
+            "minute": state.get("minute"),
+            "home_score": state.get("home_score"),
+            "away_score": state.get("away_score"),
+            "status": self._status_names.get(state.get("status"), ""),
+        }
+
+    # ==================== RETENTION ====================
+
+    def prune(self, now: float = None) -> Dict:
+        """Thin out old minute-only deltas, drop anything past max retention"""
+        now = now if now is not None else time.time()
+        thin_before = int(now - self.full_retention_days * 86400)
+        drop_before = int(now - self.max_retention_days * 86400)
+        with self._lock:
+            thinned = self.conn.execute(
+                "DELETE FROM states WHERE ts < ? AND keyframe = 0 AND home_score IS NULL "
+                "AND away_score IS NULL AND status IS NULL", (thin_before,)).rowcount
+            dropped = self.conn.execute("DELETE FROM states WHERE ts < ?", (drop_before,)).rowcount
+            self.conn.execute("DELETE FROM matches WHERE last_seen < ?", (drop_before,))
+            self.conn.commit()
+            self._last_prune = now
+        if thinned or dropped:
+            logger.info(f"Snapshot history pruned {thinned} thinned, {dropped} expired rows")
+        return {"thinned": thinned, "dropped": dropped}
+
+    def vacuum(self) -> None:
+        with self._lock:
+            self.conn.execute("VACUUM")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            states, keyframes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(keyframe), 0) FROM states").fetchone()
+            matches = self.conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return {"matches": matches, "states": states, "keyframes": keyframes,
+                "tracking": len(self._last), "bytes": size}
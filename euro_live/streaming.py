@@ -0,0 +1,236 @@
+"""
+STREAMING - Event messages to many open connections from one broadcaster
+One task per process watches the event pipeline and encodes the messages
+of each pass once; every connected client gets the same bytes through its
+own bounded queue. A client that falls a full queue behind, or whose socket
+stops taking writes, is disconnected instead of buffered without limit -
+EventSource reconnects with Last-Event-ID and catches up from the broker
+history.
+"""
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Callable, Set, Tuple
+import logging
+
+from .metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Broadcast passes a client may fall behind before it is dropped
+STREAM_CLIENT_QUEUE = int(os.getenv("STREAM_CLIENT_QUEUE", 32))
+STREAM_KEEPALIVE_SECONDS = float(os.getenv("STREAM_KEEPALIVE", 15))
+# A write the client's socket has not accepted after this ends the stream
+STREAM_SEND_TIMEOUT = float(os.getenv("STREAM_SEND_TIMEOUT", 10))
+
+RETRY_FRAME = b"retry: 5000\n\n"
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+stream_disconnects = registry.counter(
+    "stream_disconnects_total", "Event stream connections closed, by reason", ("reason",))
+
+
+def event_frame(message: Dict) -> bytes:
+    """Server-Sent Events frame of one published event message"""
+    return f"id: {message['id']}\nevent: match-event\ndata: {json.dumps(message)}\n\n".encode("utf-8")
+
+
+class StreamClient:
+    """One open connection: chunks waiting to be written, newest id queued"""
+
+    __slots__ = ("queue", "last_id", "closed")
+
+    def __init__(self, cursor: int = 0, size: int = STREAM_CLIENT_QUEUE):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+        self.last_id = cursor
+        # Why the server ends this stream ("slow", "shutdown"), None while open
+        self.closed: Optional[str] = None
+
+    def offer(self, last_id: int, chunk: bytes) -> bool:
+        """Queue a chunk without waiting, False once the client is too far behind"""
+        try:
+            self.queue.put_nowait(chunk)
+        except asyncio.QueueFull:
+            # The writer is stuck in a send; it sees this when the send returns
+            self.closed = "slow"
+            return False
+        self.last_id = last_id
+        return True
+
+    def close(self, reason: str) -> None:
+        self.closed = reason
+        try:
+            self.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass
+
+
+class Broadcaster:
+    """
+    Single producer for every stream in this process. It only polls while
+    someone is connected: each pass makes sure this refresh window's live
+    snapshot was ingested, then waits (on a thread of its own) for the
+    broker to publish and fans the encoded frames out.
+    """
+
+    def __init__(self, broker, refresh: Callable[[], None], wait_seconds: float = 10.0):
+        self.broker = broker
+        self.refresh = refresh
+        self.wait_seconds = wait_seconds
+        self.clients: Set[StreamClient] = set()
+        self.sent = 0
+        self.dropped = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # Blocking broker waits stay off the pool that serves WSGI requests
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="broadcaster")
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for client in list(self.clients):
+            client.close("shutdown")
+        self._executor.shutdown(wait=False)
+
+    def subscribe(self, cursor: int = 0) -> Tuple[StreamClient, List[bytes]]:
+        """A new client and the frames it missed since `cursor` (from the broker history)"""
+        self.start()
+        client = StreamClient(cursor)
+        backlog = []
+        for message in self.broker.since(cursor):
+            backlog.append(event_frame(message))
+            client.last_id = message["id"]
+        self.clients.add(client)
+        self._wakeup.set()
+        return client, backlog
+
+    def unsubscribe(self, client: StreamClient) -> None:
+        self.clients.discard(client)
+
+    def fan_out(self, messages: List[Dict]) -> None:
+        """One pass worth of messages, encoded once and queued as one chunk per client"""
+        frames = [(message["id"], event_frame(message)) for message in messages]
+        first_id, last_id = frames[0][0], frames[-1][0]
+        chunk = b"".join(frame for _, frame in frames)
+        for client in list(self.clients):
+            if client.last_id >= last_id:
+                continue
+            if client.last_id >= first_id:
+                # Joined mid-pass: part of this already came with its backlog
+                own = b"".join(frame for message_id, frame in frames if message_id > client.last_id)
+            else:
+                own = chunk
+            if client.offer(last_id, own):
+                self.sent += 1
+            else:
+                self.clients.discard(client)
+                self.dropped += 1
+                stream_disconnects.inc("slow")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        cursor = self.broker.last_id
+        while True:
+            if not self.clients:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            try:
+                await loop.run_in_executor(self._executor, self.refresh)
+                messages = await loop.run_in_executor(self._executor, self.broker.wait, cursor, self.wait_seconds)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Broadcaster pass failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            if messages:
+                cursor = messages[-1]["id"]
+                self.fan_out(messages)
+
+    def stats(self) -> Dict:
+        return {
+            "clients": len(self.clients),
+            "running": self._task is not None and not self._task.done(),
+            "chunks_queued": self.sent,
+            "slow_disconnects": self.dropped,
+        }
+
+
+async def serve_events(broadcaster: Broadcaster, cursor: int, max_duration: float,
+                       send: Callable, receive: Callable) -> str:
+    """
+    Write one client's event stream until max_duration, a disconnect or it
+    falls behind. Returns why it ended.
+    """
+    client, backlog = broadcaster.subscribe(cursor)
+    disconnected = asyncio.ensure_future(_disconnected(receive))
+    deadline = time.monotonic() + max_duration
+    reason = "duration"
+
+    async def write(body: bytes) -> None:
+        await asyncio.wait_for(send({"type": "http.response.body", "body": body, "more_body": True}),
+                               STREAM_SEND_TIMEOUT)
+
+    try:
+        await write(RETRY_FRAME + b"".join(backlog))
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or client.closed:
+                break
+            getter = asyncio.ensure_future(client.queue.get())
+            done, _ = await asyncio.wait((getter, disconnected), return_when=asyncio.FIRST_COMPLETED,
+                                         timeout=min(remaining, STREAM_KEEPALIVE_SECONDS))
+            if disconnected in done:
+                getter.cancel()
+                reason = "client"
+                break
+            if getter not in done:
+                getter.cancel()
+                await write(KEEPALIVE_FRAME)
+                continue
+            chunk = getter.result()
+            if chunk is None or client.closed:
+                break
+            # Write everything already queued in one go
+            chunks = [chunk]
+            while not client.queue.empty():
+                chunk = client.queue.get_nowait()
+                if chunk is None:
+                    break
+                chunks.append(chunk)
+            await write(b"".join(chunks))
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+    except asyncio.TimeoutError:
+        # Returning mid-response makes the server drop the connection
+        if client.closed is None:
+            client.closed = "slow"
+            stream_disconnects.inc("slow")
+    except OSError:
+        reason = "client"
+    finally:
+        broadcaster.unsubscribe(client)
+        disconnected.cancel()
+    reason = client.closed or reason
+    if reason != "slow":  # counted by the broadcaster
+        stream_disconnects.inc(reason)
+    return reason
+
+
+async def _disconnected(receive: Callable) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
@@ -0,0 +1,264 @@
+"""
+TRACING - Sampled span traces of single requests
+Shows where the time went inside one slow request: upstream wait, body read,
+JSON decode, match extraction, formatting, serialization. A sampled request
+records a tree of spans; slow ones are kept in a ring buffer for
+/api/debug/traces and every sampled trace can be exported as OTLP/JSON lines.
+
+    TRACE_SAMPLE_RATE=0.1     fraction of requests traced (0 disables)
+    TRACE_SLOW_MS=250         traces at least this slow go to the ring buffer
+    TRACE_BUFFER=100          ring buffer size
+    TRACE_EXPORT_PATH=...     append OTLP/JSON to this file (optional)
+"""
+
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "euro-live"
+
+# OTLP span kinds
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "kind", "started", "ended", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: Optional[str], kind: int, attributes: Dict):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        self.started = time.perf_counter()
+        self.ended: Optional[float] = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.ended or time.perf_counter()) - self.started) * 1000
+
+
+class _NullSpan:
+    """Handed out when the current request is not sampled"""
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    def __init__(self, name: str, attributes: Dict):
+        self.trace_id = os.urandom(16).hex()
+        self.started_ns = time.time_ns()
+        self.root = Span(name, None, KIND_SERVER, attributes)
+        self.spans: List[Span] = [self.root]
+        self.stack: List[Span] = [self.root]
+
+    @property
+    def duration_ms(self) -> float:
+        return self.root.duration_ms
+
+    def _unix_ns(self, perf: float) -> int:
+        return self.started_ns + int((perf - self.root.started) * 1e9)
+
+    def to_dict(self) -> Dict:
+        """Readable form for /api/debug/traces (offsets relative to the root span)"""
+        root = self.root
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name,
+            "started": self.started_ns / 1e9,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": root.attributes,
+            "spans": [{
+                "name": span.name,
+                "span_id": span.span_id,
+                "parent_id": span.parent_id,
+                "offset_ms": round((span.started - root.started) * 1000, 3),
+                "duration_ms": round(span.duration_ms, 3),
+                "attributes": span.attributes,
+                **({"error": span.error} if span.error else {}),
+            } for span in self.spans],
+        }
+
+    def to_otlp(self) -> Dict:
+        """One OTLP/JSON ExportTraceServiceRequest"""
+        spans = []
+        for span in self.spans:
+            item = {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": span.kind,
+                "startTimeUnixNano": str(self._unix_ns(span.started)),
+                "endTimeUnixNano": str(self._unix_ns(span.ended or span.started)),
+                "attributes": [_otlp_attribute(k, v) for k, v in span.attributes.items()],
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+            if span.parent_id:
+                item["parentSpanId"] = span.parent_id
+            spans.append(item)
+        return {"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+            "scopeSpans": [{"scope": {"name": "euro_live.tracing"}, "spans": spans}],
+        }]}
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class _SpanContext:
+    __slots__ = ("tracer", "trace", "span")
+
+    def __init__(self, tracer: "Tracer", trace: Trace, span: Span):
+        self.tracer = tracer
+        self.trace = trace
+        self.span = span
+
+    def __enter__(self) -> Span:
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.ended = time.perf_counter()
+        if exc is not None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        if self.trace.stack and self.trace.stack[-1] is self.span:
+            self.trace.stack.pop()
+        return False
+
+
+class FileExporter:
+    """Appends OTLP/JSON lines from a background thread, off the request path"""
+
+    def __init__(self, path: str, max_pending: int = 1000):
+        self.path = path
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, trace: Trace) -> None:
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            pass  # never block a request on the exporter
+
+    def _run(self) -> None:
+        while True:
+            trace = self._queue.get()
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(trace.to_otlp(), default=str) + "\n")
+            except (OSError, TypeError) as e:
+                logger.error(f"Trace export failed: {e}")
+
+
+class Tracer:
+    """One trace per request thread; spans nest via a per-thread stack"""
+
+    def __init__(self, sample_rate: float = 0.1, slow_ms: float = 250.0,
+                 buffer_size: int = 100, exporter: FileExporter = None):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.exporter = exporter
+        self.recent: deque = deque(maxlen=buffer_size)
+        self.sampled = 0
+        self.kept = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        path = os.getenv("TRACE_EXPORT_PATH")
+        return cls(
+            sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", 0.1)),
+            slow_ms=float(os.getenv("TRACE_SLOW_MS", 250)),
+            buffer_size=int(os.getenv("TRACE_BUFFER", 100)),
+            exporter=FileExporter(path) if path else None,
+        )
+
+    @property
+    def current(self) -> Optional[Trace]:
+        return getattr(self._local, "trace", None)
+
+    def start(self, name: str, force: bool = False, **attributes) -> Optional[Trace]:
+        """Begin a request trace if this request is sampled"""
+        if not force and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            self._local.trace = None
+            return None
+        trace = self._local.trace = Trace(name, attributes)
+        return trace
+
+    def finish(self, **attributes) -> Optional[Trace]:
+        trace = self.current
+        if trace is None:
+            return None
+        self._local.trace = None
+        trace.root.ended = time.perf_counter()
+        trace.root.attributes.update(attributes)
+        keep = trace.duration_ms >= self.slow_ms
+        with self._lock:
+            self.sampled += 1
+            if keep:
+                self.kept += 1
+                self.recent.append(trace)
+        if self.exporter:
+            self.exporter.export(trace)
+        return trace
+
+    def span(self, name: str, kind: int = KIND_INTERNAL, **attributes):
+        """`with tracer.span("parse", matches=n) as span:` - free when not sampled"""
+        trace = self.current
+        if trace is None:
+            return NULL_SPAN
+        span = Span(name, trace.stack[-1].span_id, kind, attributes)
+        trace.spans.append(span)
+        trace.stack.append(span)
+        return _SpanContext(self, trace, span)
+
+    def traces(self, min_ms: float = 0, limit: int = 20) -> List[Dict]:
+        """Newest kept traces first"""
+        with self._lock:
+            recent = list(self.recent)
+        return [t.to_dict() for t in reversed(recent) if t.duration_ms >= min_ms][:limit]
+
+    def stats(self) -> Dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "slow_ms": self.slow_ms,
+            "sampled": self.sampled,
+            "kept": self.kept,
+            "buffered": len(self.recent),
+            "exporting_to": self.exporter.path if self.exporter else None,
+        }
+
+
+tracer = Tracer.from_env()
@@ -0,0 +1,278 @@
+"""
+TRANSLATION MEMORY - Reusable translations of message segments
+Alerts are formulaic: "⚽ 67' - Morata scored!" differs from the next goal
+only in its minute and name. Each line of a message is split into a pattern
+with numbered slots ("⚽ {0}' - {1} scored!") and the slot values (numbers,
+names, hashtags), which are never translated. Pattern translations are
+kept per language, so a message made of known patterns is translated
+locally and only novel patterns go to the model, then into the memory.
+
+The patterns of our own templates are seeded from their compiled labels
+(message_templates.py), learned ones live in SQLite and are shared by the
+workers on one host.
+"""
+
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Callable, Iterable
+import logging
+
+from .message_templates import LABELS, TEMPLATES, CompiledTemplate, DEFAULT_LANGUAGE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEMORY_PATH = os.path.join(tempfile.gettempdir(), "euro_live_translations.sqlite3")
+# Patterns kept in memory per language; past this they are only read from SQLite
+MEMORY_MAX_PATTERNS = int(os.getenv("TRANSLATION_MEMORY_MAX", 20000))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    language TEXT NOT NULL,
+    pattern TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    created INTEGER,
+    PRIMARY KEY (language, pattern)
+) WITHOUT ROWID;
+"""
+
+# Hashtags, numbers (scores, minutes, "90+3", "15:00", dates) and words
+_TOKENS = re.compile(r"(?P<tag>#\w+)|(?P<number>\d+(?:[-/.:,]\d+)*(?:\+\d+)?)|(?P<word>[^\W\d_](?:[\w'’.-]*\w)?)")
+_SLOT = re.compile(r"\{(\d+)\}")
+_LETTER = re.compile(r"[^\W\d_]")
+_NUMBERED = re.compile(r"^\s*(\d+)[.)]\s*(.*)$")
+# Only emojis, markup and spaces since the start of the line or of a sentence
+_SENTENCE_START = re.compile(r"(?:^|[.!?]\s)[^\w]*$")
+
+# Capitalised words that are message text, not names. Labels of our own
+# templates plus the usual football and sentence-start words.
+COMMON_WORDS = {word.lower() for text in LABELS[DEFAULT_LANGUAGE].values() for word in text.split()} | {
+    "a", "added", "after", "all", "an", "and", "are", "at", "back", "before", "big", "bench", "booked",
+    "breaking", "card", "check", "confirmed", "corner", "draw", "equaliser", "equalizer", "extra", "final",
+    "first", "follow", "for", "free", "ft", "full", "get", "half", "halftime", "fulltime", "he", "here", "ht", "huge",
+    "injury", "it", "kick", "kick-off", "latest", "lead", "lineup", "lineups", "match", "minute", "minutes",
+    "new", "next", "no", "not", "of", "offside", "official", "on", "omg", "penalty", "player", "points", "pts",
+    "red", "result", "save", "scored", "second", "shot", "starting", "stay", "substitution", "the", "they",
+    "this", "time", "today", "transfer", "update", "var", "vs", "watch", "we", "what", "who", "win", "winner",
+    "wins", "won", "wow", "yellow", "you",
+}
+
+
+def _is_name(word: str) -> bool:
+    """Capitalised words and short club prefixes (FC, AC, PSV) outside the common words"""
+    if word.lower() in COMMON_WORDS or not word[0].isupper():
+        return False
+    return not word.isupper() or len(word) <= 4
+
+
+class Segment:
+    """One line of a message: its pattern and the values of its slots"""
+
+    __slots__ = ("pattern", "slots", "translatable")
+
+    def __init__(self, pattern: str, slots: List[str]):
+        self.pattern = pattern
+        self.slots = slots
+        # Lines of only slots, emojis and punctuation read the same in every language
+        self.translatable = bool(_LETTER.search(_SLOT.sub("", pattern)))
+
+    def render(self, translation: str) -> str:
+        return _SLOT.sub(lambda m: self.slots[int(m.group(1))], translation)
+
+
+def split_line(line: str, known_names: Callable[[str], bool] = None) -> Optional[Segment]:
+    """
+    The line's pattern and slot values, None if it cannot be templated: it
+    has braces, or a sentence opens with a capitalised word that is not a
+    known name ("Great goal by Spain" is no "{0} goal by {1}").
+    """
+    if "{" in line or "}" in line:
+        return None
+    parts: List[str] = []
+    slots: List[str] = []
+    opening: List[int] = []
+    position = 0
+    # Where the last name slot starts and ends, so "Manchester United" stays one slot
+    name_start, name_end = 0, -1
+    for match in _TOKENS.finditer(line):
+        kind, value = match.lastgroup, match.group()
+        if kind == "word" and not _is_name(value):
+            continue
+        if kind == "word" and name_end >= 0 and line[name_end:match.start()] == " ":
+            slots[-1] = line[name_start:match.end()]
+            name_end = position = match.end()
+            continue
+        if kind == "word" and _SENTENCE_START.search(line, 0, match.start()):
+            opening.append(len(slots))
+        parts.append(line[position:match.start()])
+        parts.append(f"{{{len(slots)}}}")
+        slots.append(value)
+        name_start = match.start()
+        position = match.end()
+        name_end = position if kind == "word" else -1
+    parts.append(line[position:])
+    if any(known_names is None or not known_names(slots[i]) for i in opening):
+        return None
+    return Segment("".join(parts), slots)
+
+
+def split_message(message: str, known_names: Callable[[str], bool] = None) -> Optional[List[Segment]]:
+    segments = []
+    for line in message.split("\n"):
+        segment = split_line(line, known_names)
+        if segment is None:
+            return None
+        segments.append(segment)
+    return segments
+
+
+def parse_numbered(answer: str, patterns: List[str]) -> Dict[str, str]:
+    """{pattern: translation} from a "1. ...", "2. ..." answer to a numbered list of patterns"""
+    translations = {}
+    for line in answer.split("\n"):
+        match = _NUMBERED.match(line)
+        if match and 1 <= int(match.group(1)) <= len(patterns):
+            translations[patterns[int(match.group(1)) - 1]] = match.group(2).strip()
+    return translations
+
+
+def valid_translation(pattern: str, translation: str) -> bool:
+    """A translation must keep exactly the pattern's slots and add no braces"""
+    if sorted(_SLOT.findall(pattern)) != sorted(_SLOT.findall(translation)):
+        return False
+    return "{" not in _SLOT.sub("", translation) and "}" not in _SLOT.sub("", translation)
+
+
+# ==================== SEEDS ====================
+
+def template_seeds(language: str) -> Dict[str, str]:
+    """
+    Pattern translations of our own templates, from their compiled labels:
+    both languages are rendered with distinct numbers in every field and
+    paired line by line.
+    """
+    seeds = {}
+    for name, source in TEMPLATES.items():
+        parts = ("header", "row", "footer") if isinstance(source, dict) else (None,)
+        english = CompiledTemplate(name, source, DEFAULT_LANGUAGE)
+        translated = CompiledTemplate(name, source, language)
+        for part in parts:
+            english_text = getattr(english, part) if part else english.body
+            translated_text = getattr(translated, part) if part else translated.body
+            context = {field: str(101 + i) for i, field in enumerate(dict.fromkeys(english_text.fields))}
+            english_lines = english_text.render(context).split("\n")
+            translated_lines = translated_text.render(context).split("\n")
+            if len(english_lines) != len(translated_lines):
+                continue
+            for source_line, target_line in zip(english_lines, translated_lines):
+                segment = split_line(source_line)
+                if segment is None or not segment.translatable or segment.pattern == target_line:
+                    continue
+                for i, value in enumerate(segment.slots):
+                    target_line = target_line.replace(value, f"{{{i}}}")
+                if valid_translation(segment.pattern, target_line):
+                    seeds[segment.pattern] = target_line
+    return seeds
+
+
+# ==================== MEMORY ====================
+
+class TranslationMemory:
+    """Pattern translations per language: seeds and learned patterns in memory, learned ones in SQLite"""
+
+    def __init__(self, path: str = None, max_patterns: int = MEMORY_MAX_PATTERNS,
+                 known_names: Callable[[str], bool] = None):
+        self.path = path or os.getenv("TRANSLATION_MEMORY_PATH", DEFAULT_MEMORY_PATH)
+        self.max_patterns = max_patterns
+        # Names that may open a sentence as a slot (team names), see split_line
+        self.known_names = known_names
+        self.languages: Dict[str, Dict[str, str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.learned = 0
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def _language(self, language: str) -> Dict[str, str]:
+        patterns = self.languages.get(language)
+        if patterns is None:
+            patterns = template_seeds(language) if language in LABELS else {}
+            for pattern, translation in self.conn.execute(
+                    "SELECT pattern, translation FROM segments WHERE language = ? LIMIT ?",
+                    (language, self.max_patterns)):
+                patterns[pattern] = translation
+            self.languages[language] = patterns
+        return patterns
+
+    def split(self, message: str) -> Optional[List[Segment]]:
+        """The message's segments, None when it is left to the whole-message prompt"""
+        return split_message(message, self.known_names)
+
+    def missing(self, language: str, segments: Iterable[Segment]) -> List[str]:
+        """Patterns of these segments the memory has no translation for, each once"""
+        wanted = list(dict.fromkeys(s.pattern for s in segments if s.translatable))
+        with self._lock:
+            patterns = self._language(language)
+            missing = [p for p in wanted if p not in patterns]
+            if missing:
+                # Learned by another worker since this one loaded the language
+                marks = ",".join("?" * len(missing))
+                for pattern, translation in self.conn.execute(
+                        f"SELECT pattern, translation FROM segments WHERE language = ? AND pattern IN ({marks})",
+                        (language, *missing)):
+                    patterns[pattern] = translation
+                missing = [p for p in missing if p not in patterns]
+            self.hits += len(wanted) - len(missing)
+            self.misses += len(missing)
+        return missing
+
+    def render(self, language: str, segments: List[Segment]) -> Optional[str]:
+        """The translated message, None while a pattern is missing"""
+        with self._lock:
+            patterns = self._language(language)
+            lines = []
+            for segment in segments:
+                if not segment.translatable:
+                    lines.append(segment.render(segment.pattern))
+                    continue
+                translation = patterns.get(segment.pattern)
+                if translation is None:
+                    return None
+                lines.append(segment.render(translation))
+        return "\n".join(lines)
+
+    def learn(self, language: str, translations: Dict[str, str]) -> int:
+        """Store model translations of patterns; ones that lost or invented slots are dropped"""
+        valid = {p: t for p, t in translations.items() if t.strip() and valid_translation(p, t)}
+        if len(valid) < len(translations):
+            logger.warning(f"Translation memory dropped {len(translations) - len(valid)} malformed segments")
+        if not valid:
+            return 0
+        with self._lock:
+            patterns = self._language(language)
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO segments VALUES (?, ?, ?, ?)",
+                    [(language, p, t, int(time.time())) for p, t in valid.items()])
+            for pattern, translation in valid.items():
+                if pattern in patterns or len(patterns) < self.max_patterns:
+                    patterns[pattern] = translation
+            self.learned += len(valid)
+        return len(valid)
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "languages": {language: len(patterns) for language, patterns in self.languages.items()},
+            "hits": self.hits,
+            "misses": self.misses,
+            "learned": self.learned,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
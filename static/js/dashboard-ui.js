@@ -0,0 +1,41 @@
+/**
+ * DASHBOARD UI
+ * Tab switching and league chips. First file in the bundle, see euro_live/assets.py.
+ */
+
+// Live scores, fixtures and headlines the page was rendered with (see build_dashboard in app.py)
+window.dashboardState = (() => {
+    const el = document.getElementById('dashboard-state');
+    try {
+        return el ? JSON.parse(el.textContent) : {};
+    } catch (e) {
+        return {};
+    }
+})();
+
+// Tab switching
+document.querySelectorAll('.tab-btn').forEach(btn => {
+    btn.addEventListener('click', (e) => {
+        document.querySelectorAll('.tab-btn').forEach(b => b.classList.remove('active'));
+        btn.classList.add('active');
+        const tabId = btn.dataset.tab + '-tab';
+        document.querySelectorAll('.tab-content').forEach(t => t.style.display = 'none');
+        const active = document.getElementById(tabId);
+        if(active) active.style.display = 'block';
+    });
+});
+
+// League chip toggle
+document.querySelectorAll('.league-chip').forEach(chip => {
+    chip.addEventListener('click', function() {
+        const parent = this.parentElement;
+        parent.querySelectorAll('.league-chip').forEach(c => c.classList.remove('active'));
+        this.classList.add('active');
+    });
+});
+
+// Filter by competition helper
+window.filterByCompetition = function(comp) {
+    console.log('Filtering by:', comp);
+    // This will be handled by your actual app.js
+};
@@ -1,6 +1,9 @@
 /**
  * ENHANCED LIVE MATCH TRACKER
- * Automatically detects score changes and queues events
+ * Keeps the UI in sync and fires desktop notifications.
+ * WhatsApp event messages are produced server-side (see event-queue.js).
+ * Only the leading tab polls; every tab applies what it publishes
+ * (tab-coordinator.js).
  */
 
 class LiveMatchTracker {
@@ -9,7 +12,6 @@ class LiveMatchTracker {
         this.lastEventIds = new Map();
         this.updateInterval = 10000; // Check every 10 seconds
         this.isTracking = false;
-        this.eventQueue = eventQueue;
         this.notifier = notifier;
         this.onMatchUpdate = null; // Callback for UI updates
     }
@@ -17,16 +19,39 @@ class LiveMatchTracker {
     startTracking() {
         if (this.isTracking) return;
         this.isTracking = true;
-        this.trackMatches();
-        setInterval(() => this.trackMatches(), this.updateInterval);
+
+        // The page already carries the current snapshot, start from it instead of refetching
+        const seeded = window.dashboardState?.live;
+        const seededAt = Array.isArray(seeded) ? Date.now() : 0;
+        if (seededAt) {
+            seeded.forEach(match => this.matches.set(match.id, match));
+            if (this.onMatchUpdate) {
+                this.onMatchUpdate(seeded);
+            }
+        }
+
+        tabs.subscribe('live', (matches) => this.applyMatches(matches));
+        tabs.lead(() => {
+            // A tab taking over from a closed leader polls right away
+            if (Date.now() - seededAt > this.updateInterval) this.trackMatches();
+            const timer = setInterval(() => this.trackMatches(), this.updateInterval);
+            return () => clearInterval(timer);
+        });
         console.log('🔴 Live match tracking started');
     }
 
+    // Leading tab only
     async trackMatches() {
         try {
             const response = await fetch('/api/livescores');
-            const currentMatches = await response.json();
+            tabs.publish('live', await response.json());
+        } catch (error) {
+            console.error('Error tracking matches:', error);
+        }
+    }
 
+    applyMatches(currentMatches) {
+        try {
             // Check each match for changes
             currentMatches.forEach(current => {
                 const previous = this.matches.get(current.id);
@@ -51,7 +76,7 @@ class LiveMatchTracker {
             }
 
         } catch (error) {
-            console.error('Error tracking matches:', error);
+            console.error('Error applying matches:', error);
         }
     }
 
@@ -82,95 +107,28 @@ class LiveMatchTracker {
         }
     }
 
-    handleGoal(oldMatch, newMatch) {
-        const homeScore = newMatch.home_team?.score || 0;
-        const awayScore = newMatch.away_team?.score || 0;
-        const homeName = newMatch.home_team?.name || 'Home';
-        const awayName = newMatch.away_team?.name || 'Away';
-        const minute = newMatch.minute || '0';
-
-        // Create goal message
-        let message = `⚽ *GOAL!*\n\n`;
-        message += `🏟️ ${homeName} ${homeScore} - ${awayScore} ${awayName}\n`;
-        message += `⏱️ ${minute}'\n\n`;
-        
-        // Try to get scorer from events (would need separate API call)
-        // For now, generic goal message
-        message += `#Goal #LiveFootball`;
-
-        // Queue the event
-        eventQueue.addEvent(message, {
-            id: newMatch.id,
-            homeTeam: homeName,
-            awayTeam: awayName,
-            homeScore: homeScore,
-            awayScore: awayScore,
-            minute: minute,
-            competition: newMatch.competition_name
-        });
+    // Notification shape of an API match
+    summary(match) {
+        return {
+            id: match.id,
+            homeTeam: match.home_team?.name || 'Home',
+            awayTeam: match.away_team?.name || 'Away',
+            homeScore: match.home_team?.score || 0,
+            awayScore: match.away_team?.score || 0,
+            minute: match.minute
+        };
+    }
 
-        // Send push notification
-        notifier.showScoreChange(oldMatch, newMatch);
+    handleGoal(oldMatch, newMatch) {
+        notifier.showScoreChange(this.summary(oldMatch), this.summary(newMatch));
     }
 
     handleHalftime(match) {
-        const homeName = match.home_team?.name || 'Home';
-        const awayName = match.away_team?.name || 'Away';
-        const homeScore = match.home_team?.score || 0;
-        const awayScore = match.away_team?.score || 0;
-
-        const message = `⏸️ *HALF TIME*\n\n` +
-                       `🏟️ ${homeName} ${homeScore} - ${awayScore} ${awayName}\n\n` +
-                       `⏱️ 45' - First half complete\n\n` +
-                       `#Halftime #Football`;
-
-        eventQueue.addEvent(message, {
-            id: match.id,
-            homeTeam: homeName,
-            awayTeam: awayName,
-            homeScore: homeScore,
-            awayScore: awayScore,
-            minute: '45',
-            competition: match.competition_name
-        });
-
-        notifier.showHalftime({
-            id: match.id,
-            homeTeam: homeName,
-            awayTeam: awayName,
-            homeScore: homeScore,
-            awayScore: awayScore
-        });
+        notifier.showHalftime(this.summary(match));
     }
 
     handleFulltime(match) {
-        const homeName = match.home_team?.name || 'Home';
-        const awayName = match.away_team?.name || 'Away';
-        const homeScore = match.home_team?.score || 0;
-        const awayScore = match.away_team?.score || 0;
-
-        const message = `✅ *FULL TIME*\n\n` +
-                       `🏟️ ${homeName} ${homeScore} - ${awayScore} ${awayName}\n\n` +
-                       `⏱️ Full time result\n\n` +
-                       `#FullTime #Result`;
-
-        eventQueue.addEvent(message, {
-            id: match.id,
-            homeTeam: homeName,
-            awayTeam: awayName,
-            homeScore: homeScore,
-            awayScore: awayScore,
-            minute: '90',
-            competition: match.competition_name
-        });
-
-        notifier.showFulltime({
-            id: match.id,
-            homeTeam: homeName,
-            awayTeam: awayName,
-            homeScore: homeScore,
-            awayScore: awayScore
-        });
+        notifier.showFulltime(this.summary(match));
     }
 
     handleMinuteChange(match) {
@@ -179,26 +137,7 @@ class LiveMatchTracker {
     }
 
     handleNewMatch(match) {
-        const homeName = match.home_team?.name || 'Home';
-        const awayName = match.away_team?.name || 'Away';
-        const minute = match.minute || '0';
-
-        if (minute !== '0' && minute !== 'NS') {
-            const message = `🔴 *MATCH STARTED*\n\n` +
-                           `🏟️ ${homeName} vs ${awayName}\n` +
-                           `⏱️ Kickoff at ${minute}'\n\n` +
-                           `#LiveFootball #Kickoff`;
-
-            eventQueue.addEvent(message, {
-                id: match.id,
-                homeTeam: homeName,
-                awayTeam: awayName,
-                homeScore: 0,
-                awayScore: 0,
-                minute: minute,
-                competition: match.competition_name
-            });
-        }
+        // Kickoff messages are published by the server event pipeline
     }
 
     checkFinishedMatches(currentMatches) {
@@ -215,33 +154,7 @@ class LiveMatchTracker {
     }
 
     handleMatchEnded(match) {
-        const homeName = match.home_team?.name || 'Home';
-        const awayName = match.away_team?.name || 'Away';
-        const homeScore = match.home_team?.score || 0;
-        const awayScore = match.away_team?.score || 0;
-
-        const message = `✅ *MATCH COMPLETED*\n\n` +
-                       `🏟️ ${homeName} ${homeScore} - ${awayScore} ${awayName}\n\n` +
-                       `⏱️ Full time result\n\n` +
-                       `#FinalScore #Football`;
-
-        eventQueue.addEvent(message, {
-            id: match.id,
-            homeTeam: homeName,
-            awayTeam: awayName,
-            homeScore: homeScore,
-            awayScore: awayScore,
-            minute: 'FT',
-            competition: match.competition_name
-        });
-
-        notifier.showFulltime({
-            id: match.id,
-            homeTeam: homeName,
-            awayTeam: awayName,
-            homeScore: homeScore,
-            awayScore: awayScore
-        });
+        notifier.showFulltime(this.summary(match));
     }
 
     getMatch(matchId) {
@@ -1,6 +1,11 @@
 /**
  * PUSH NOTIFICATION SERVICE
- * Shows desktop notifications when scores change
+ * Shows desktop notifications when scores change. Each one is claimed by its
+ * tag first, so with several tabs open it is shown once (tab-coordinator.js).
+ *
+ * followTeams() also subscribes this browser to Web Push: the server then
+ * sends goals, cards and full time for those teams even with no tab open
+ * (service worker in /sw.js, same tags, so a push and a tab alert collapse).
  */
 
 class NotificationService {
@@ -27,6 +32,7 @@ class NotificationService {
 
     show(title, options = {}) {
         if (!this.permission) return;
+        if (!tabs.claim(options.tag)) return;
 
         const defaultOptions = {
             icon: '/favicon.ico',
@@ -110,12 +116,69 @@ class NotificationService {
             
             return this.show(title, {
                 body,
-                tag: `score-${newMatch.id}-${Date.now()}`,
+                tag: `score-${newMatch.id}-${newMatch.homeScore}-${newMatch.awayScore}`,
                 renotify: true
             });
         }
     }
 
+    // Web Push for followed teams/competitions (replaces the previous follow list)
+    async followTeams(teamIds = [], competitionIds = []) {
+        if (!('serviceWorker' in navigator) || !('PushManager' in window)) {
+            console.log('This browser does not support push notifications');
+            return false;
+        }
+        await this.init();
+        if (!this.permission) return false;
+
+        try {
+            const keyResponse = await fetch('/api/push/key');
+            if (!keyResponse.ok) return false;
+            const { publicKey } = await keyResponse.json();
+
+            const registration = await navigator.serviceWorker.register('/sw.js', { scope: '/' });
+            const subscription = await registration.pushManager.getSubscription()
+                || await registration.pushManager.subscribe({
+                    userVisibleOnly: true,
+                    applicationServerKey: this.urlBase64ToUint8Array(publicKey)
+                });
+
+            const response = await fetch('/api/push/subscribe', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    subscription: subscription.toJSON(),
+                    teams: teamIds,
+                    competitions: competitionIds
+                })
+            });
+            return response.ok;
+        } catch (error) {
+            console.error('Push subscription error:', error);
+            return false;
+        }
+    }
+
+    async unfollowAll() {
+        if (!('serviceWorker' in navigator)) return;
+        const registration = await navigator.serviceWorker.getRegistration('/');
+        const subscription = registration && await registration.pushManager.getSubscription();
+        if (!subscription) return;
+
+        await fetch('/api/push/unsubscribe', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ subscription: subscription.toJSON() })
+        });
+        await subscription.unsubscribe();
+    }
+
+    urlBase64ToUint8Array(base64String) {
+        const padding = '='.repeat((4 - base64String.length % 4) % 4);
+        const base64 = (base64String + padding).replace(/-/g, '+').replace(/_/g, '/');
+        return Uint8Array.from(atob(base64), c => c.charCodeAt(0));
+    }
+
     getHistory() {
         return this.notifications;
     }
@@ -0,0 +1,160 @@
+/**
+ * TAB COORDINATOR
+ * One open tab (the leader) polls and holds the event stream; every tab gets
+ * the updates over a BroadcastChannel. Leadership uses the Web Locks API when
+ * available (released automatically when the tab closes), otherwise a
+ * heartbeat election on the channel. Without BroadcastChannel each tab leads
+ * itself, as before.
+ *
+ * Desktop notifications are claimed by key: only the leader shows them and
+ * keys already shown (by any tab) are skipped, so five tabs alert once.
+ */
+
+class TabCoordinator {
+    constructor(name = 'euro-live') {
+        this.name = name;
+        this.id = `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 8)}`;
+        this.isLeader = false;
+        this.subscribers = new Map();   // topic -> callbacks
+        this.leaders = [];              // { start, stop } run while this tab leads
+        this.claimed = new Map();       // notification key -> expiry
+        this.claimTtl = 10 * 60 * 1000;
+        this.heartbeatInterval = 2000;
+        this.lastHeartbeat = 0;
+
+        this.channel = 'BroadcastChannel' in window ? new BroadcastChannel(name) : null;
+        if (this.channel) {
+            this.channel.onmessage = (e) => this.onMessage(e.data);
+        }
+        this.elect();
+    }
+
+    // Leader election
+    elect() {
+        if (!this.channel) {
+            this.becomeLeader();
+            return;
+        }
+        if (navigator.locks) {
+            // Held until the tab goes away, then the next waiting tab gets it
+            navigator.locks.request(`${this.name}-leader`, () => {
+                this.becomeLeader();
+                return new Promise(() => {});
+            });
+            return;
+        }
+
+        this.watchdog = setInterval(() => this.checkLeader(), this.heartbeatInterval);
+        window.addEventListener('pagehide', () => {
+            if (this.isLeader) this.post({ type: 'resign', from: this.id });
+        });
+        // Give a running leader a moment to answer before claiming
+        this.lastHeartbeat = Date.now() - this.heartbeatInterval * 3;
+        this.post({ type: 'hello', from: this.id });
+        setTimeout(() => this.checkLeader(), 300);
+    }
+
+    checkLeader() {
+        if (this.isLeader) {
+            this.post({ type: 'heartbeat', from: this.id });
+        } else if (Date.now() - this.lastHeartbeat > this.heartbeatInterval * 3) {
+            this.becomeLeader();
+            this.post({ type: 'heartbeat', from: this.id });
+        }
+    }
+
+    becomeLeader() {
+        if (this.isLeader) return;
+        this.isLeader = true;
+        console.log('👑 This tab now polls for all open tabs');
+        this.leaders.forEach(leader => { leader.stop = leader.start(); });
+    }
+
+    resign() {
+        if (!this.isLeader) return;
+        this.isLeader = false;
+        this.leaders.forEach(leader => {
+            if (typeof leader.stop === 'function') leader.stop();
+            leader.stop = null;
+        });
+    }
+
+    // Run start() while this tab leads; it returns a function that stops it again
+    lead(start) {
+        const leader = { start, stop: null };
+        this.leaders.push(leader);
+        if (this.isLeader) {
+            leader.stop = start();
+        }
+    }
+
+    // Messages
+    post(message) {
+        if (this.channel) {
+            this.channel.postMessage(message);
+        }
+    }
+
+    onMessage(message) {
+        if (!message) return;
+        switch (message.type) {
+            case 'heartbeat':
+                this.lastHeartbeat = Date.now();
+                // Two tabs claimed at once: the smaller id keeps leading
+                if (this.isLeader && message.from < this.id) this.resign();
+                break;
+            case 'hello':
+                if (this.isLeader) this.post({ type: 'heartbeat', from: this.id });
+                break;
+            case 'resign':
+                this.lastHeartbeat = 0;
+                this.checkLeader();
+                break;
+            case 'claim':
+                this.claimed.set(message.key, Date.now() + this.claimTtl);
+                break;
+            case 'publish':
+                this.deliver(message.topic, message.data);
+                break;
+        }
+    }
+
+    // Updates from the leader, delivered to this tab too
+    publish(topic, data) {
+        this.deliver(topic, data);
+        this.post({ type: 'publish', topic, data });
+    }
+
+    subscribe(topic, callback) {
+        if (!this.subscribers.has(topic)) {
+            this.subscribers.set(topic, []);
+        }
+        this.subscribers.get(topic).push(callback);
+    }
+
+    deliver(topic, data) {
+        (this.subscribers.get(topic) || []).forEach(callback => {
+            try {
+                callback(data);
+            } catch (error) {
+                console.error(`Error handling ${topic}:`, error);
+            }
+        });
+    }
+
+    // True once per key across all tabs (only the leader shows notifications)
+    claim(key) {
+        if (!this.isLeader) return false;
+        const now = Date.now();
+        this.claimed.forEach((expires, k) => { if (expires < now) this.claimed.delete(k); });
+        if (key && this.claimed.has(key)) return false;
+        if (key) {
+            this.claimed.set(key, now + this.claimTtl);
+            this.post({ type: 'claim', key });
+        }
+        return true;
+    }
+}
+
+// Initialize globally
+const tabs = new TabCoordinator();
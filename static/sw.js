@@ -0,0 +1,41 @@
+/**
+ * SERVICE WORKER
+ * Shows Web Push notifications for followed teams (sent by euro_live/push.py)
+ * and brings the dashboard to the front when one is clicked.
+ */
+
+self.addEventListener('install', () => self.skipWaiting());
+self.addEventListener('activate', (event) => event.waitUntil(self.clients.claim()));
+
+self.addEventListener('push', (event) => {
+    if (!event.data) return;
+
+    let data;
+    try {
+        data = event.data.json();
+    } catch (error) {
+        data = { title: 'Euro Live', body: event.data.text() };
+    }
+
+    event.waitUntil(self.registration.showNotification(data.title, {
+        body: data.body,
+        tag: data.tag,
+        icon: '/favicon.ico',
+        badge: '/favicon.ico',
+        vibrate: [200, 100, 200],
+        renotify: Boolean(data.tag),
+        data: { url: data.url || '/', matchId: data.match_id }
+    }));
+});
+
+self.addEventListener('notificationclick', (event) => {
+    event.notification.close();
+    const url = (event.notification.data && event.notification.data.url) || '/';
+
+    event.waitUntil(
+        self.clients.matchAll({ type: 'window', includeUncontrolled: true }).then(windows => {
+            const open = windows.find(client => new URL(client.url).pathname === url);
+            return open ? open.focus() : self.clients.openWindow(url);
+        })
+    );
+});
@@ -0,0 +1,21 @@
+"""
+Test settings, applied before the app is imported: no credentials (so no
+upstream is ever called), in-process caches and throwaway state files.
+"""
+
+import os
+import tempfile
+
+WORKDIR = tempfile.mkdtemp(prefix="euro-live-tests-")
+
+# Set empty rather than unset, so load_dotenv() cannot fill them in from .env
+for name in ("LIVESCORE_API_KEY", "LIVESCORE_API_SECRET", "NEWS_API_KEY", "GEMINI_API_KEY", "VAPID_PRIVATE_KEY"):
+    os.environ[name] = ""
+os.environ["UPSTREAM_MODE"] = "live"
+os.environ["FLASK_DEBUG"] = "0"
+os.environ["CACHE_BACKEND"] = "local"
+os.environ["PUSH_BACKEND"] = "off"
+os.environ["TEAM_REGISTRY_PATH"] = os.path.join(WORKDIR, "teams.json")
+os.environ["SNAPSHOT_DB_PATH"] = os.path.join(WORKDIR, "history.sqlite3")
+os.environ["CACHE_SQLITE_PATH"] = os.path.join(WORKDIR, "cache.sqlite3")
+os.environ["TRANSLATION_MEMORY_PATH"] = os.path.join(WORKDIR, "translations.sqlite3")
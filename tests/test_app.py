@@ -0,0 +1,34 @@
+"""Routes that answer without any upstream configured"""
+
+import pytest
+
+from app import app
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+def test_unknown_page_serves_the_dashboard(client):
+    response = client.get("/some/client-side/route")
+    assert response.status_code == 200
+    assert response.mimetype == "text/html"
+    assert b"<html" in response.data.lower()
+
+
+def test_unknown_api_path_is_a_json_404(client):
+    response = client.get("/api/no-such-endpoint")
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "Not found"}
+
+
+def test_dashboard_is_served_from_the_response_cache(client):
+    first = client.get("/")
+    assert first.status_code == 200
+    assert client.get("/", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+
+def test_team_search_needs_a_query(client):
+    assert client.get("/api/teams/search").status_code == 400
+    assert client.get("/api/teams/search?q=zzzz").get_json()["teams"] == []
@@ -0,0 +1,77 @@
+"""/api/batch: part validation and dispatch through the app"""
+
+import json
+
+import pytest
+
+from app import app
+from euro_live import batch
+
+
+@pytest.mark.parametrize("parts", [None, [], {"path": "/api/live"}, "/api/live",
+                                   ["/api/live"] * (batch.MAX_BATCH_PARTS + 1)])
+def test_parts_must_be_a_bounded_list(parts):
+    with pytest.raises(ValueError):
+        batch.parse_parts(parts)
+
+
+@pytest.mark.parametrize("part", ["/", "/static/js/app.js", "/api/batch", "/api/batch/?part=x", {"id": 1}, 42])
+def test_only_api_resources_can_be_batched(part):
+    with pytest.raises(ValueError):
+        batch.parse_parts([part])
+
+
+def test_parts_are_normalised():
+    parsed = batch.parse_parts(["/api/teams/search?q=ars", {"id": "t", "path": "/api/teams/search?q=x", "etag": "a"}])
+    assert parsed == [
+        {"id": "/api/teams/search?q=ars", "path": "/api/teams/search?q=ars", "etag": None},
+        {"id": "t", "path": "/api/teams/search?q=x", "etag": "a"},
+    ]
+
+
+def test_batch_answers_each_part_with_its_own_status():
+    client = app.test_client()
+    response = client.post("/api/batch", json={"parts": [
+        "/api/teams/search?q=ars", {"id": "missing", "path": "/api/does-not-exist"}, "/api/teams/search"]})
+    assert response.status_code == 200
+    parts = json.loads(response.data)["parts"]
+
+    assert [part["status"] for part in parts] == [200, 404, 400]
+    assert parts[0]["body"]["success"] is True
+    assert parts[1]["id"] == "missing"
+
+
+def test_invalid_batch_is_a_400():
+    response = app.test_client().post("/api/batch", json={"parts": ["/not-api"]})
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_publicly_cacheable_parts_are_reused_until_they_expire():
+    from flask import Flask, request
+
+    from euro_live.response_cache import PreparedResponse
+
+    calls = []
+    small = Flask(__name__)
+
+    @small.route("/api/table")
+    def table():
+        calls.append(1)
+        return PreparedResponse({"rows": len(calls)}, max_age=30).to_response(request)
+
+    @small.route("/api/private")
+    def private():
+        calls.append(1)
+        return {"rows": len(calls)}
+
+    first = json.loads(batch.resolve(small, ["/api/table", "/api/private"]).body)["parts"]
+    again = json.loads(batch.resolve(small, ["/api/table", "/api/private"]).body)["parts"]
+    assert len(calls) == 3
+    assert again[0]["body"] == first[0]["body"] == {"rows": 1}
+    assert again[1]["body"] == {"rows": 3}
+
+    etag = first[0]["headers"]["ETag"]
+    revalidated = json.loads(batch.resolve(small, [{"path": "/api/table", "etag": etag}]).body)["parts"]
+    assert revalidated[0]["status"] == 304
+    assert len(calls) == 3
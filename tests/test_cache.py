@@ -0,0 +1,161 @@
+"""TieredCache: fresh hits, stale-while-revalidate, stale-if-error, single-flight"""
+
+import threading
+import time
+
+import pytest
+
+from euro_live.cache import LocalRedis, RedisTier, TieredCache
+
+
+def age(cache: TieredCache, key: str, seconds: float) -> None:
+    """Make the cached entry `seconds` older"""
+    cache.local.get(key).created -= seconds
+
+
+def wait_for_refresh(cache: TieredCache, key: str) -> None:
+    deadline = time.time() + 5
+    while key in cache._refreshing and time.time() < deadline:
+        time.sleep(0.005)
+
+
+def test_fresh_entry_is_served_without_building():
+    cache = TieredCache()
+    calls = []
+    build = lambda: calls.append(1) or "v1"
+
+    assert cache.get("k", 10, build) == "v1"
+    assert cache.get("k", 10, build) == "v1"
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_entry_is_served_while_one_background_refresh_runs():
+    cache = TieredCache(stale_factor=1.0)
+    cache.get("k", 10, lambda: "old")
+    age(cache, "k", 15)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_build():
+        started.set()
+        release.wait(5)
+        return "new"
+
+    # Past ttl, inside the stale window: the old value at once, refreshed behind
+    assert cache.get("k", 10, slow_build) == "old"
+    assert started.wait(5)
+    assert cache.get("k", 10, slow_build) == "old"
+    release.set()
+    wait_for_refresh(cache, "k")
+
+    assert cache.get("k", 10, slow_build) == "new"
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_expired_entry_survives_a_failing_upstream():
+    cache = TieredCache(stale_factor=0.5, max_stale=3600)
+    cache.get("k", 10, lambda: "good")
+    age(cache, "k", 60)
+
+    def failing():
+        raise ConnectionError("upstream down")
+
+    assert cache.get("k", 10, failing) == "good"
+    assert cache.stats()["stale_if_error"] == 1
+
+
+def test_error_answers_are_not_cached_and_fall_back():
+    cache = TieredCache(stale_factor=0.5)
+    cache.get("k", 10, lambda: {"status": "ok"})
+    age(cache, "k", 60)
+
+    value = cache.get("k", 10, lambda: {"status": "error"}, cache_if=lambda v: v["status"] == "ok")
+    assert value == {"status": "ok"}
+
+
+def test_cold_failure_raises():
+    cache = TieredCache()
+
+    def failing():
+        raise ConnectionError("upstream down")
+
+    with pytest.raises(ConnectionError):
+        cache.get("k", 10, failing)
+
+
+def test_entries_past_max_stale_are_not_served():
+    cache = TieredCache(stale_factor=0.5, max_stale=30)
+    cache.get("k", 10, lambda: "ancient")
+    age(cache, "k", 60)
+
+    def failing():
+        raise ConnectionError("upstream down")
+
+    with pytest.raises(ConnectionError):
+        cache.get("k", 10, failing)
+
+
+def test_concurrent_cold_fills_build_once():
+    cache = TieredCache()
+    calls = []
+
+    def build():
+        calls.append(1)
+        time.sleep(0.05)
+        return "v"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("k", 10, build))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["v"] * 8
+    assert len(calls) == 1
+    assert cache._fill_locks == {}
+
+
+def test_failed_fills_leave_no_lock_behind():
+    cache = TieredCache()
+
+    def failing():
+        raise ConnectionError("upstream down")
+
+    for i in range(100):
+        with pytest.raises(ConnectionError):
+            cache.get(f"team:{i}", 10, failing)
+    assert cache._fill_locks == {}
+
+
+def test_shared_tier_answers_another_worker():
+    shared = RedisTier(LocalRedis())
+    first, second = TieredCache(shared), TieredCache(shared)
+    first.get("k", 10, lambda: {"n": 1})
+
+    assert second.get("k", 10, lambda: {"n": 2}) == {"n": 1}
+    assert second.stats()["shared_hits"] == 1
+
+
+def test_claim_is_granted_once_per_key():
+    cache = TieredCache(RedisTier(LocalRedis()))
+    assert cache.claim("event:1", 60)
+    assert not cache.claim("event:1", 60)
+    assert cache.claim("event:2", 60)
+
+
+def test_ttls_follow_the_replay_clock(monkeypatch):
+    from euro_live.replay import ReplayClock, upstream
+
+    class Replayer:
+        clock = ReplayClock(0, speed=20)
+
+    monkeypatch.setattr(upstream, "mode", "replay")
+    monkeypatch.setattr(upstream, "replayer", Replayer())
+    cache = TieredCache(stale_factor=0)
+    cache.get("k", 10, lambda: "first")
+    # 10 s of upstream time go by in half a real second at 20x
+    age(cache, "k", 0.6)
+
+    assert cache.get("k", 10, lambda: "second") == "second"
+    assert upstream.scale(10) == 0.5
@@ -0,0 +1,48 @@
+"""Latency budgets: answers in time, fallbacks past the budget, answers cached for later"""
+
+import threading
+import time
+
+from euro_live.cache import TieredCache
+from euro_live.deadline import DeadlineExecutor
+
+
+def executor(**options):
+    options.setdefault("hedge_min", 10.0)
+    return DeadlineExecutor("test", TieredCache(), **options)
+
+
+def test_answer_within_the_budget():
+    calls = executor(budget=1.0)
+    assert calls.run("summary", "k", lambda: "ai text", lambda: "template") == ("ai text", "ai")
+    assert calls.run("summary", "k", lambda: "other", lambda: "template") == ("ai text", "cache")
+
+
+def test_late_answer_falls_back_then_lands_in_the_cache():
+    calls = executor(budget=0.05)
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return "ai text"
+
+    assert calls.run("summary", "k", slow, lambda: "template") == ("template", "fallback")
+    release.set()
+    deadline = time.time() + 5
+    while calls._flights and time.time() < deadline:
+        time.sleep(0.005)
+    assert calls.run("summary", "k", slow, lambda: "template") == ("ai text", "cache")
+
+
+def test_zero_budget_is_not_the_default_budget():
+    calls = executor(budget=5.0)
+    started = time.monotonic()
+    value = calls.run("summary", "k", lambda: time.sleep(0.5) or "ai text", lambda: "template", budget=0)
+    assert value == ("template", "fallback")
+    assert time.monotonic() - started < 0.25
+    assert [v for v, _ in calls.run_many("enhance", [("k2", lambda: time.sleep(0.5) or "x", lambda: "t")],
+                                         budget=0)] == ["t"]
+
+
+def test_attempt_timeout_follows_the_budget():
+    assert executor(budget=2.5).attempt_timeout == 10.0
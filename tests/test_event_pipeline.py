@@ -0,0 +1,109 @@
+"""Event detection from consecutive live snapshots"""
+
+from euro_live.event_pipeline import (
+    FULL_TIME, GOAL, HALF_TIME, KICK_OFF, RED_CARD, YELLOW_CARD, EventDetector, EventPipeline, group_events,
+)
+
+
+def match(match_id=1, home=0, away=0, minute="10", status="IN PLAY", events=None):
+    data = {"id": match_id, "home_name": "Spain", "away_name": "Italy", "home_score": home,
+            "away_score": away, "minute": minute, "status": status, "competition_name": "EURO"}
+    if events is not None:
+        data["events"] = events
+    return data
+
+
+def types(events):
+    return [event["type"] for event in events]
+
+
+def test_first_snapshot_is_only_a_baseline():
+    detector = EventDetector()
+    assert detector.diff([match(home=2)]) == []
+
+
+def test_goals_are_detected_per_side():
+    detector = EventDetector()
+    detector.diff([match()])
+    events = detector.diff([match(home=1, away=1)])
+    assert types(events) == [GOAL, GOAL]
+    assert [event["team"] for event in events] == ["home", "away"]
+
+
+def test_status_changes():
+    detector = EventDetector()
+    detector.diff([match()])
+    assert types(detector.diff([match(minute="45", status="HALF TIME BREAK")])) == [HALF_TIME]
+    assert types(detector.diff([match(minute="90", status="FINISHED")])) == [FULL_TIME]
+
+
+def test_kickoff_and_dropped_match():
+    detector = EventDetector()
+    detector.diff([match(1)])
+    assert types(detector.diff([match(1), match(2, minute="1")])) == [KICK_OFF]
+    # Gone from the live feed without a final status: it has finished
+    assert types(detector.diff([match(2, minute="2")])) == [FULL_TIME]
+
+
+def test_cards_from_the_attached_feed():
+    card = {"id": 7, "event": "RED_CARD", "time": "33", "player": {"name": "Rodri"}, "is_home": True}
+    detector = EventDetector()
+    detector.diff([match()])
+    # Cards already in the feed when it is first seen are history, not news
+    assert detector.diff([match(events=[card])]) == []
+    events = detector.diff([match(events=[card, dict(card, id=8, time="40", player={"name": "Morata"})])])
+    assert types(events) == [RED_CARD]
+    assert events[0]["player"] == "Morata"
+    assert events[0]["minute"] == "40"
+
+
+def test_group_events_merges_one_match_within_the_window():
+    detector = EventDetector()
+    detector.diff([match(1), match(2)], now=0)
+    events = detector.diff([match(1, home=1), match(2, away=1)], now=10)
+    events += detector.diff([match(1, home=2), match(2, away=1)], now=20)
+    events += detector.diff([match(1, home=3), match(2, away=1)], now=100)
+
+    groups = group_events(events, window=30)
+    assert sorted(len(group) for group in groups) == [1, 1, 2]
+
+
+def test_pipeline_ignores_a_short_run_of_empty_snapshots():
+    pipeline = EventPipeline()
+    pipeline.ingest([match()], now=0)
+    # An upstream failure also yields [], that is not every match ending
+    assert pipeline.ingest([], now=10) == []
+    published = pipeline.ingest([match(home=1)], now=20)
+
+    assert len(published) == 1
+    assert published[0]["types"] == [GOAL]
+    assert "GOAL" in published[0]["message"]
+    assert pipeline.broker.since(0) == published
+
+
+def test_card_after_an_empty_first_feed():
+    card = {"id": 3, "event": "YELLOW_CARD", "time": "12", "player": {"name": "Barella"}, "is_home": False}
+    detector = EventDetector()
+    detector.diff([match(events=[])])
+    events = detector.diff([match(events=[card])])
+    assert types(events) == [YELLOW_CARD]
+    assert events[0]["team"] == "away"
+
+
+def test_live_matches_get_their_events_feed_attached(monkeypatch):
+    from euro_live import services
+
+    class Feed:
+        def get_match_events(self, match_id):
+            if match_id == 2:
+                raise ConnectionError("upstream down")
+            return {"success": True, "events": [{"id": match_id, "event": "RED_CARD"}]}
+
+    monkeypatch.setattr(services, "livescore", Feed())
+    monkeypatch.setattr(services, "CARD_EVENT_MATCHES", 2)
+    matches = [match(1), match(2), match(3)]
+    attached = services.attach_match_events(matches)
+
+    assert attached[0]["events"] == [{"id": 1, "event": "RED_CARD"}]
+    assert "events" not in attached[1] and "events" not in attached[2]
+    assert "events" not in matches[0]
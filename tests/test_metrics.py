@@ -0,0 +1,52 @@
+"""Sharded counters and histograms"""
+
+import threading
+
+from euro_live.metrics import Counter, Histogram
+
+
+def run_threads(target, count=20):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_counts_from_every_thread_are_summed():
+    counter = Counter("requests_total", "Requests", ["route"])
+    run_threads(lambda: [counter.inc("/api/live") for _ in range(100)])
+    counter.inc("/api/news", amount=2)
+
+    assert counter.values() == {("/api/live",): 2000, ("/api/news",): 2}
+    assert counter.render() == ['requests_total{route="/api/live"} 2000', 'requests_total{route="/api/news"} 2']
+
+
+def test_exited_threads_leave_no_shard_behind():
+    counter = Counter("jobs_total", "Jobs")
+    histogram = Histogram("job_seconds", "Job time", buckets=(0.1, 1.0))
+
+    def job():
+        counter.inc()
+        histogram.observe(0.5)
+
+    for _ in range(5):
+        run_threads(job)
+    counter.inc()
+
+    assert counter.values() == {(): 101}
+    assert histogram.values() == {(): [0, 100, 0, 50.0]}
+    # Only this thread's shard is still live, the rest is in the base totals
+    assert list(counter._shards) == [threading.current_thread()]
+    assert histogram._shards == {}
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value)
+
+    lines = histogram.render()
+    assert lines[:3] == ['latency_seconds_bucket{le="0.1"} 1', 'latency_seconds_bucket{le="1"} 3',
+                         'latency_seconds_bucket{le="+Inf"} 4']
+    assert lines[-1] == "latency_seconds_count 4"
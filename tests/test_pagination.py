@@ -0,0 +1,75 @@
+"""Cursor pages and field selection"""
+
+import pytest
+
+from euro_live.pagination import Listing, decode_cursor, encode_cursor, parse_fields, project
+
+
+def matches(ids):
+    return [{"id": i, "minute": str(i), "home_team": {"name": f"H{i}", "score": i % 3}} for i in ids]
+
+
+def walk(listing: Listing, limit: int):
+    cursor, seen = None, []
+    while True:
+        page = listing.page(cursor, limit)
+        seen.extend(item["id"] for item in page.items)
+        if not page.next_cursor:
+            return seen
+        cursor = page.next_cursor
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor((3, "2024-06-14", 1.5))) == (3, "2024-06-14", 1.5)
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", encode_cursor(()) + "x", "eyJhIjoxfQ"])
+def test_foreign_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_pages_cover_the_listing_once():
+    listing = Listing(matches(range(25)), key=lambda m: (m["id"],))
+    assert walk(listing, 7) == list(range(25))
+
+
+def test_cursor_survives_a_rebuilt_listing():
+    first = Listing(matches(range(0, 20, 2)), key=lambda m: (m["id"],))
+    page = first.page(None, 3)
+    assert [m["id"] for m in page.items] == [0, 2, 4]
+
+    # A match sorting before the cursor appears, another drops out
+    rebuilt = Listing(matches([1] + list(range(0, 20, 2))[1:]), key=lambda m: (m["id"],))
+    assert [m["id"] for m in rebuilt.page(page.next_cursor, 3).items] == [6, 8, 10]
+
+
+def test_page_headers_link_to_the_next_page():
+    listing = Listing(matches(range(5)), key=lambda m: (m["id"],))
+    page = listing.page(None, 2, query={"limit": "2", "competitions": "2"})
+    headers = page.headers()
+
+    assert headers["X-Total-Count"] == "5"
+    assert headers["X-Next-Cursor"] == page.next_cursor
+    assert headers["Link"].startswith("<?limit=2&competitions=2&cursor=")
+    assert "X-Next-Cursor" not in listing.page(None, 10).headers()
+
+
+def test_positions_narrow_the_listing():
+    listing = Listing(matches(range(10)), key=lambda m: (m["id"],))
+    page = listing.page(None, 2, positions=[1, 3, 5])
+    assert [m["id"] for m in page.items] == [1, 3]
+    assert page.total == 3
+    assert [m["id"] for m in listing.page(page.next_cursor, 2, positions=[1, 3, 5]).items] == [5]
+
+
+def test_field_selection():
+    allowed = ("id", "minute", "home_team", "home_team.name", "home_team.score")
+    assert parse_fields("id,home_team.score", allowed) == ("id", "home_team.score")
+    assert parse_fields("home_team,home_team.score", allowed) == ("home_team",)
+    assert parse_fields("", allowed) is None
+    with pytest.raises(ValueError):
+        parse_fields("id,password", allowed)
+
+    item = matches([4])[0]
+    assert project(item, ("id", "home_team.score")) == {"id": 4, "home_team": {"score": 1}}
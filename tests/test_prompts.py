@@ -0,0 +1,42 @@
+"""Prompt templates: context is cut to its budget, the message being transformed never is"""
+
+from euro_live.gemini import GeminiService
+from euro_live.prompts import TEMPLATES, build, estimate_tokens
+
+
+def digest(lines=120):
+    return "\n".join(f"Line{i}: ⚽ *Team {i}* vs Team {i + 1} 20:00" for i in range(lines))
+
+
+def test_long_message_is_not_truncated():
+    message = digest()
+    for feature, fields in (("translate", {"language": "Spanish"}), ("enhance", {"tone": "exciting"})):
+        prompt = TEMPLATES[feature].build(message=message, **fields)
+        assert "Line119" in prompt.text
+        assert prompt.max_output_tokens >= estimate_tokens(message)
+
+
+def test_short_message_keeps_the_template_cap():
+    assert build("translate", message="Goal!", language="Spanish").max_output_tokens == 200
+
+
+def test_context_fields_keep_their_budget():
+    prompt = build("match_summary", home="Spain", away="Italy", home_score=1, away_score=0,
+                   competition="Euro", minute=90, events=" ".join(["Goal by Morata"] * 200))
+    assert prompt.text.count("Morata") < 200
+
+
+def test_long_message_survives_a_translation_round_trip(monkeypatch):
+    gemini = GeminiService(api_key="test")
+    seen = {}
+
+    def generate(prompt, max_output_tokens=None):
+        # Echo the message back, as a model "translation" of the whole text
+        seen["max_output_tokens"] = max_output_tokens
+        body = prompt.split("\n\n", 1)[1].rsplit("\n\n", 1)[0]
+        return {"text": body, "usage": None}
+
+    monkeypatch.setattr(gemini, "_generate", generate)
+    message = digest()
+    assert gemini.translate_message(message, "es") == message
+    assert seen["max_output_tokens"] >= estimate_tokens(message)
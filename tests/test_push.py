@@ -0,0 +1,46 @@
+"""Push subscriptions: follow indexes and owner-only removal"""
+
+import pytest
+
+from app import app
+from euro_live.push import PushSubscription, SubscriptionRegistry, parse_subscription
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return SubscriptionRegistry(str(tmp_path / "push.sqlite3"))
+
+
+def subscription(endpoint="https://push.example/1", auth="secret", teams=(19,), competitions=()):
+    return PushSubscription(endpoint, "p256dh", auth, list(teams), list(competitions))
+
+
+def test_recipients_are_found_by_team_and_competition(registry):
+    registry.subscribe(subscription("https://push.example/1", teams=[19]))
+    registry.subscribe(subscription("https://push.example/2", teams=[], competitions=[2]))
+
+    found = registry.recipients(teams=[19, 7], competitions=[2])
+    assert sorted(s.endpoint for s in found) == ["https://push.example/1", "https://push.example/2"]
+    assert registry.recipients(teams=[7]) == []
+
+
+def test_only_the_subscription_owner_can_remove_it(registry):
+    registry.subscribe(subscription(auth="secret"))
+
+    assert not registry.remove("https://push.example/1", "guessed")
+    assert len(registry) == 1
+    assert registry.remove("https://push.example/1", "secret")
+    assert len(registry) == 0
+    assert not registry.remove("https://push.example/1", "secret")
+
+
+def test_subscription_payload_is_validated():
+    with pytest.raises(ValueError):
+        parse_subscription({"subscription": {"endpoint": "https://push.example/1"}, "teams": [19]})
+    parsed = parse_subscription({"subscription": {"endpoint": "https://push.example/1",
+                                                  "keys": {"p256dh": "k", "auth": "a"}}, "teams": [19]})
+    assert parsed.teams == {19}
+
+
+def test_push_debug_route_is_hidden_outside_debug_mode():
+    assert app.test_client().get("/api/debug/push").status_code == 404
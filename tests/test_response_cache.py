@@ -0,0 +1,93 @@
+"""Prepared responses: one build per window, bounded by entries, outages not kept"""
+
+import threading
+import time
+
+import pytest
+import requests
+from flask import Flask, request
+
+from euro_live.livescore import LiveScoreAPI
+from euro_live.news import NewsAPIService
+from euro_live.response_cache import STALE_RETRY_SECONDS, ResponseCache
+
+
+def test_one_build_per_window():
+    cache = ResponseCache()
+    calls = []
+    build = lambda: calls.append(1) or {"n": len(calls)}
+
+    first = cache.get(("live",), 10, build)
+    assert cache.get(("live",), 10, build) is first
+    assert first.payload == {"n": 1} and len(calls) == 1
+
+
+def test_concurrent_misses_build_once_and_leave_no_lock():
+    cache = ResponseCache()
+    calls = []
+
+    def build():
+        calls.append(1)
+        time.sleep(0.05)
+        return {"ok": True}
+
+    threads = [threading.Thread(target=cache.get, args=(("news", "us", 15), 10, build)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert cache._build_locks == {}
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResponseCache(max_entries=3)
+    for key in ("a", "b", "c"):
+        cache.get((key,), 10, lambda: {})
+    cache.get(("a",), 10, lambda: {})
+    cache.get(("d",), 10, lambda: {})
+
+    assert list(cache._entries) == [("c",), ("a",), ("d",)]
+    assert cache.stats()["entries"] == 3
+
+
+def test_failed_build_caches_nothing():
+    cache = ResponseCache()
+
+    def failing():
+        raise ConnectionError("upstream down")
+
+    with pytest.raises(ConnectionError):
+        cache.get(("live",), 10, failing)
+    assert cache._entries == {} and cache._build_locks == {}
+
+
+def test_upstream_failure_is_retried_soon_and_not_cached_downstream(monkeypatch):
+    news = NewsAPIService("key")
+
+    def down(*args, **kwargs):
+        raise ConnectionError("upstream down")
+
+    monkeypatch.setattr(news.client, "get_json", down)
+    cache = ResponseCache()
+    entry = cache.get(("sports_news", "us", 15), 900, lambda: {"news": news.get_sports_headlines()})
+
+    assert entry.payload == {"news": []}
+    assert entry.stale and entry.max_age <= STALE_RETRY_SECONDS
+    with Flask(__name__).test_request_context("/api/news/sports"):
+        response = entry.to_response(request)
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert response.headers["X-Data-Stale"] == "1"
+
+
+def test_live_scores_failure_is_marked_stale(monkeypatch):
+    livescore = LiveScoreAPI("key", "secret")
+
+    def down(*args, **kwargs):
+        raise requests.exceptions.ConnectionError("upstream down")
+
+    monkeypatch.setattr(livescore.client, "get_json", down)
+    entry = ResponseCache().get(("livescores", None), 30, lambda: livescore.get_live_scores())
+
+    assert entry.payload == [] and entry.stale
@@ -0,0 +1,55 @@
+"""Snapshot history: states recorded within the same second fold into one row"""
+
+import time
+
+from euro_live.snapshot_history import SnapshotHistory
+
+# Recent enough that retention keeps it
+T = int(time.time())
+
+
+def live(minute, home=0, away=0):
+    return {"id": 1, "home_name": "Spain", "away_name": "Italy", "minute": minute,
+            "home_score": home, "away_score": away, "status": "IN PLAY"}
+
+
+def test_same_second_keeps_the_keyframe(tmp_path):
+    history = SnapshotHistory(str(tmp_path / "history.sqlite3"))
+    history.record([live("10")], ts=T)
+    history.record([live("11")], ts=T + 0.5)
+
+    rows = history.conn.execute("SELECT ts, keyframe, minute, away_score FROM states").fetchall()
+    assert rows == [(T, 1, "11", 0)]
+    assert history.state_at(1, T + 1) == {"ts": T, "minute": "11", "home_score": 0,
+                                          "away_score": 0, "status": "IN PLAY"}
+
+
+def test_same_second_delta_is_against_the_state_before_it(tmp_path):
+    history = SnapshotHistory(str(tmp_path / "history.sqlite3"))
+    history.record([live("10")], ts=T)
+    history.record([live("11", home=1)], ts=T + 60)
+    history.record([live("11", home=1, away=1)], ts=T + 60.4)
+    history.record([live("12", home=1, away=1)], ts=T + 120)
+
+    timeline = history.timeline(1)
+    assert [(s["ts"], s["minute"], s["home_score"], s["away_score"]) for s in timeline] == [
+        (T, "10", 0, 0), (T + 60, "11", 1, 1), (T + 120, "12", 1, 1)]
+    assert all(s["status"] == "IN PLAY" for s in timeline)
+
+
+def test_replayed_snapshots_are_stamped_with_recording_time(tmp_path, monkeypatch):
+    from euro_live import services
+    from euro_live.replay import ReplayClock, upstream
+
+    class Replayer:
+        clock = ReplayClock(T - 3600, speed=20)
+
+    Replayer.clock.set(120)
+    monkeypatch.setattr(upstream, "mode", "replay")
+    monkeypatch.setattr(upstream, "replayer", Replayer())
+    monkeypatch.setattr(services, "attach_match_events", lambda matches: matches)
+    history = SnapshotHistory(str(tmp_path / "history.sqlite3"))
+    monkeypatch.setattr(services, "history", history)
+
+    services.ingest_live_snapshot([live("10")])
+    assert history.state_at(1, T - 3600 + 120)["minute"] == "10"
@@ -0,0 +1,101 @@
+"""Team search: prefix and typo-tolerant lookups over the local registry"""
+
+import itertools
+from difflib import SequenceMatcher
+
+import pytest
+
+from euro_live.team_registry import TeamRegistry, _trigrams, normalize_name
+
+CLUBS = ["Real Madrid", "Barcelona", "Atlético Madrid", "Manchester United", "Manchester City",
+         "Bayern München", "Borussia Dortmund", "Borussia Mönchengladbach", "Paris Saint-Germain",
+         "Juventus", "Inter", "AC Milan", "Arsenal", "Chelsea", "Liverpool", "Ajax", "PSV", "Benfica",
+         "Porto", "Sporting CP", "Celtic", "Rangers", "Galatasaray", "Fenerbahçe", "RB Leipzig"]
+SUFFIXES = ["", " B", " U19", " U21", " Women", " II", " Reserves", " Academy"]
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = TeamRegistry(str(tmp_path / "teams.json"))
+    names = (club + suffix for suffix, club in itertools.product(SUFFIXES, CLUBS))
+    for team_id, name in enumerate(names, start=1):
+        registry.add_team(team_id, name)
+    return registry
+
+
+def reference_search(registry: TeamRegistry, query: str, limit: int = 10):
+    """The plain ranking: every prefix match, then the best 50 trigram overlaps scored in full"""
+    needle = normalize_name(query)
+    results, seen = [], set()
+    for team_id, team in registry.teams.items():
+        name = normalize_name(team["name"])
+        if any(token.startswith(needle) for token in [name] + name.split()):
+            seen.add(team_id)
+            results.append(team_id)
+    results.sort(key=lambda tid: (len(registry.teams[tid]["name"]), registry.teams[tid]["name"]))
+    if len(results) < limit and len(needle) >= 3:
+        candidates = {}
+        for gram in _trigrams(needle):
+            for team_id in registry._trigrams.get(gram, ()):
+                if team_id not in seen:
+                    candidates[team_id] = candidates.get(team_id, 0) + 1
+        scored = []
+        for team_id, shared in sorted(candidates.items(), key=lambda c: -c[1])[:50]:
+            name = normalize_name(registry.teams[team_id]["name"])
+            ratio = max(SequenceMatcher(None, needle, word).ratio() for word in [name] + name.split())
+            if ratio >= 0.6:
+                scored.append((-ratio, -shared, team_id))
+        scored.sort(key=lambda s: (s[0], s[1]))
+        results.extend(team_id for _, _, team_id in scored)
+    return [registry.teams[team_id]["name"] for team_id in results[:limit]]
+
+
+def names(results):
+    return [team["name"] for team in results]
+
+
+def test_prefix_on_any_word_shortest_first(registry):
+    assert names(registry.search("manch", limit=3)) == ["Manchester City", "Manchester City B", "Manchester United"]
+    assert "Atlético Madrid" in names(registry.search("madrid"))
+    assert names(registry.search("atleti", limit=1)) == ["Atlético Madrid"]
+
+
+def test_typos_are_tolerated(registry):
+    assert names(registry.search("barcelnoa"))[0] == "Barcelona"
+    assert "Liverpool" in names(registry.search("liverpol"))
+
+
+@pytest.mark.parametrize("query", ["barcelnoa", "liverpol", "dortmnud", "juvnetus", "galatasray", "munchen",
+                                   "glasgow", "mílan", "sportng", "reserve", "acadmy", "leipzg", "chelsae",
+                                   "real madird", "paris saint germian", "borusia monchen", "ac milna"])
+@pytest.mark.parametrize("limit", [1, 5, 10])
+def test_fast_ranking_matches_the_plain_ranking(registry, query, limit):
+    assert names(registry.search(query, limit)) == reference_search(registry, query, limit)
+
+
+def test_rename_drops_the_old_name_from_the_index(tmp_path):
+    registry = TeamRegistry(str(tmp_path / "teams.json"))
+    registry.add_team(2, "Borussia Dortmund")
+    registry.add_team(2, "Dortmund")
+
+    assert registry.search("borussia") == []
+    assert registry.search("borusia") == []
+    assert names(registry.search("dortm")) == ["Dortmund"]
+
+
+def test_ids_from_different_endpoints_are_one_team(tmp_path):
+    registry = TeamRegistry(str(tmp_path / "teams.json"))
+    registry.add_team("19", "Arsenal", competition="Premier League")
+    registry.add_team(19, "Arsenal", competition="Champions League")
+
+    assert len(registry) == 1
+    assert registry.search("arsenal")[0]["competitions"] == ["Premier League", "Champions League"]
+
+
+def test_saved_registry_is_searchable_after_a_restart(tmp_path):
+    path = str(tmp_path / "teams.json")
+    registry = TeamRegistry(path)
+    registry.add_team(5, "Galatasaray", country="Turkey")
+    registry.save()
+
+    assert names(TeamRegistry(path).search("gala")) == ["Galatasaray"]
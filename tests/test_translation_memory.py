@@ -0,0 +1,100 @@
+"""Translation memory: segments, learning and local rendering"""
+
+import pytest
+
+from euro_live.message_templates import LABELS
+from euro_live.team_registry import TeamRegistry
+from euro_live.translation_memory import (
+    TranslationMemory, parse_numbered, split_line, split_message, template_seeds, valid_translation,
+)
+
+
+@pytest.fixture
+def memory(tmp_path):
+    return TranslationMemory(str(tmp_path / "memory.sqlite3"))
+
+
+def test_message_is_split_into_patterns_and_values():
+    segments = split_message("⚽ 67' - Morata scored!\n#EURO2024")
+    assert [s.pattern for s in segments] == ["⚽ {0}' - {1} scored!", "{0}"]
+    assert segments[0].slots == ["67", "Morata"]
+    assert segments[0].translatable and not segments[1].translatable
+
+
+def test_learned_pattern_translates_the_next_message_locally(memory):
+    first = split_message("⚽ 67' - Morata scored!")
+    assert memory.missing("es", first) == ["⚽ {0}' - {1} scored!"]
+    assert memory.learn("es", {"⚽ {0}' - {1} scored!": "⚽ {0}' - ¡Gol de {1}!"}) == 1
+
+    second = split_message("⚽ 81' - Olmo scored!")
+    assert memory.missing("es", second) == []
+    assert memory.render("es", second) == "⚽ 81' - ¡Gol de Olmo!"
+
+
+def test_learned_patterns_outlive_the_process(tmp_path):
+    path = str(tmp_path / "shared.sqlite3")
+    TranslationMemory(path).learn("de", {"{0}' {1} scored!": "{0}' {1} hat getroffen!"})
+    assert TranslationMemory(path).render("de", split_message("88' Kane scored!")) == "88' Kane hat getroffen!"
+
+
+def test_translations_that_lose_slots_are_not_learned(memory):
+    assert not valid_translation("{0} scored in {1}'", "{0} scored")
+    assert memory.learn("fr", {"{0}' {1} scored!": "Il a marqué!"}) == 0
+    assert memory.render("fr", split_message("88' Kane scored!")) is None
+
+
+def test_numbered_answers_map_back_to_patterns():
+    answer = "1. ¡Gol de {0}!\n2) Descanso\n7. out of range"
+    assert parse_numbered(answer, ["{0} scored!", "Half time"]) == {"{0} scored!": "¡Gol de {0}!", "Half time": "Descanso"}
+
+
+def test_lines_with_braces_are_left_to_the_model():
+    assert split_message("Final {score}") is None
+
+
+
+def test_club_names_stay_one_slot():
+    segment = split_line("🔴 88' Red card for AC Milan, Manchester United hold on")
+    assert segment.pattern == "🔴 {0}' Red card for {1}, {2} hold on"
+    assert segment.slots == ["88", "AC Milan", "Manchester United"]
+
+
+@pytest.mark.parametrize("line", ["Great goal by Spain tonight", "*Brilliant* save by Donnarumma",
+                                  "⚽ 90' Morata scores. Incredible scenes"])
+def test_capitalised_sentence_openers_are_not_slotted(line):
+    assert split_line(line) is None
+    assert split_message(f"⚽ GOAL\n{line}") is None
+
+
+def test_known_team_names_may_open_a_line(tmp_path):
+    registry = TeamRegistry(str(tmp_path / "teams.json"))
+    registry.add_team(1, "Spain")
+    registry.add_team(2, "Real Madrid")
+
+    segment = split_line("Spain win 2-0 against Georgia", registry.is_team_name)
+    assert segment.pattern == "{0} win {1} against {2}"
+    assert split_line("Real Madrid lead at half time", registry.is_team_name).slots == ["Real Madrid"]
+    assert split_line("Great goal by Spain tonight", registry.is_team_name) is None
+
+
+def test_memory_splits_with_its_known_names(tmp_path):
+    memory = TranslationMemory(str(tmp_path / "memory.sqlite3"), known_names={"Spain"}.__contains__)
+    assert [s.pattern for s in memory.split("Spain win!")] == ["{0} win!"]
+    assert memory.split("Superb win!") is None
+
+
+@pytest.mark.parametrize("language", [language for language in LABELS if language != "en"])
+def test_template_seeds_keep_the_slots_of_each_line(language):
+    seeds = template_seeds(language)
+    assert seeds
+    for pattern, translation in seeds.items():
+        assert valid_translation(pattern, translation)
+    # Every template line is seeded, none is lost to the sentence-start rule
+    assert len(seeds) == 20
+
+
+def test_template_seeds_translate_labels_and_keep_fields():
+    seeds = template_seeds("es")
+    assert seeds["⚽ *GOAL!*"] == "⚽ *GOL!*"
+    assert seeds["🔴 *LIVE: {0} vs {1}*"] == "🔴 *EN VIVO: {0} vs {1}*"
+    assert seeds["⚽ {0}' - {1} (assist: {2})"] == "⚽ {0}' - {1} (asistencia: {2})"